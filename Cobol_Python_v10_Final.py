@@ -4,7 +4,7 @@ import logging
 import threading
 import time
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, simpledialog
+from tkinter import ttk, scrolledtext, messagebox, simpledialog, filedialog
 import hashlib
 import base64
 import re
@@ -17,6 +17,19 @@ import json
 import urllib.request
 import shutil
 import subprocess
+import selectors
+import codecs
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import ssh_core
+from ssh_core import (
+    DEFAULT_PERMANENT_FILTER, SSHConnectionPool, QueryResultCache,
+    PS_AUX_COMMAND, build_server_ps_command, PermanentFilterMatcher,
+    parse_cpu_time, ProcessIndex, open_ssh_client, stream_process_snapshot,
+    fetch_process_snapshot, MenuExpect, compile_menu_prompts, run_menu_flow,
+    KILL_STATUS_LABELS, summarize_kill_results, ChannelReadStats, OperationRecorder,
+    MetricsRegistry, MetricsExporter
+)
 
 # Verificar se está rodando como executável empacotado (exe)
 IS_EXE = getattr(sys, 'frozen', False)
@@ -133,8 +146,526 @@ class InteractiveHostKeyPolicy(paramiko.MissingHostKeyPolicy):
                 messagebox.showerror("Erro", 
                     f"Falha ao salvar no known_hosts: {str(e)}")
 
+class TerminalRenderer:
+    """Renderização do terminal em quadros (um insert por quadro), com histórico limitado"""
+    def __init__(self, root, text_widget, max_fps=30, max_lines=5000, max_pending_bytes=1024 * 1024):
+        self.root = root
+        self.text_widget = text_widget
+        self.frame_interval = 1.0 / max(1, max_fps)
+        self.max_lines = max_lines
+        self.max_pending_bytes = max_pending_bytes
+        self._pending = []
+        self._pending_bytes = 0
+        self._dropped_bytes = 0
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self.counters = {
+            'chunks': 0,          # blocos recebidos
+            'merged': 0,          # blocos agrupados em um quadro já pendente
+            'dropped': 0,         # blocos descartados por excesso de pendência
+            'flushes': 0,         # inserções efetivas no widget
+            'trimmed_lines': 0    # linhas removidas do histórico
+        }
+
+    def write(self, text):
+        """Enfileira texto para o próximo quadro (seguro entre threads)"""
+        if not text:
+            return
+        with self._lock:
+            self.counters['chunks'] += 1
+            if self._pending:
+                self.counters['merged'] += 1
+            self._pending.append(text)
+            self._pending_bytes += len(text)
+            
+            # Descartar os blocos mais antigos se a interface não acompanhar
+            while self._pending_bytes > self.max_pending_bytes and len(self._pending) > 1:
+                dropped = self._pending.pop(0)
+                self._pending_bytes -= len(dropped)
+                self._dropped_bytes += len(dropped)
+                self.counters['dropped'] += 1
+            
+            if self._scheduled:
+                return
+            self._scheduled = True
+            delay = self._last_flush + self.frame_interval - time.monotonic()
+        self.root.after(max(0, int(delay * 1000)), self.flush)
+
+    def flush(self):
+        """Insere todo o texto pendente de uma vez (executado na thread da interface)"""
+        with self._lock:
+            text = "".join(self._pending)
+            dropped_bytes = self._dropped_bytes
+            self._pending = []
+            self._pending_bytes = 0
+            self._dropped_bytes = 0
+            self._scheduled = False
+            self._last_flush = time.monotonic()
+        if not text:
+            return
+        if dropped_bytes:
+            text = f"\n[... {dropped_bytes} bytes descartados ...]\n" + text
+        
+        widget = self.text_widget
+        widget.config(state=tk.NORMAL)
+        widget.insert(tk.END, text)
+        
+        # Manter apenas as últimas max_lines linhas
+        line_count = int(widget.index('end-1c').split('.')[0])
+        excess = line_count - self.max_lines
+        if self.max_lines > 0 and excess > 0:
+            widget.delete('1.0', f'{excess + 1}.0')
+            self.counters['trimmed_lines'] += excess
+        
+        widget.see(tk.END)
+        widget.config(state=tk.DISABLED)
+        self.counters['flushes'] += 1
+
+    def stats(self):
+        """Cópia dos contadores do pipeline"""
+        with self._lock:
+            return dict(self.counters)
+
+class VirtualTreeview(ttk.Treeview):
+    """Treeview virtualizada: o modelo guarda as linhas e só a janela visível vira item do Tk"""
+    OVERSCAN = 5  # linhas extras materializadas acima e abaixo da janela
+    WHEEL_UNITS = 3
+
+    def __init__(self, master=None, **kw):
+        self._yscrollcommand = kw.pop('yscrollcommand', None) or kw.pop('yscroll', None)
+        super().__init__(master, **kw)
+        self._columns = tuple(self.tk.splitlist(super().cget('columns')))
+        self._order = []          # iids na ordem de exibição
+        self._rows = {}           # iid -> [values, tags]
+        self._positions = None    # iid -> posição em _order (recalculado sob demanda)
+        self._order_dirty = False  # _order ainda contém iids removidos
+        self._selection = set()
+        self._anchor = None       # início da seleção estendida com Shift
+        self._materialized = []   # iids presentes no widget, em ordem
+        self._materialized_set = set()
+        self._first = 0
+        self._counter = 0
+        self._render_pending = False
+        self.sort_spec = []       # [(coluna, decrescente)], da chave principal à última
+        self.sort_key_funcs = {}  # coluna -> conversão do valor exibido em chave tipada
+        self._sort_keys = {}      # coluna -> {iid: chave} (cache)
+        self._sort_dirty = False
+        
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.bind(sequence, self._on_wheel, add='+')
+        for sequence in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            self.bind(sequence, self._on_key, add='+')
+        self.bind('<Button-1>', self._on_click, add='+')
+        self.bind('<Configure>', lambda event: self._schedule_render(), add='+')
+
+    # ----- Modelo -----
+
+    @staticmethod
+    def _as_tags(tags):
+        if not tags:
+            return ()
+        if isinstance(tags, str):
+            return tuple(tags.split())
+        return tuple(tags)
+
+    def _compact(self, sort=True):
+        """Retira de _order os iids já removidos do modelo e reaplica a ordenação pendente"""
+        if self._order_dirty:
+            self._order = [iid for iid in self._order if iid in self._rows]
+            self._positions = None
+            self._order_dirty = False
+        if sort and self._sort_dirty:
+            # Ordenações estáveis sucessivas, da última chave para a principal
+            for column, reverse in reversed(self.sort_spec):
+                self._order.sort(key=self._sort_key(column), reverse=reverse)
+            self._positions = None
+            self._sort_dirty = False
+
+    def _sort_key(self, column):
+        """Função de chave da coluna, convertendo cada valor uma única vez"""
+        cache = self._sort_keys.setdefault(column, {})
+        index = self._column_index(column)
+        convert = self.sort_key_funcs.get(column, lambda value: str(value).lower())
+        rows = self._rows
+        
+        def key(iid):
+            value = cache.get(iid)
+            if value is None:
+                values = rows[iid][0]
+                value = cache[iid] = convert(values[index] if index < len(values) else '')
+            return value
+        return key
+
+    def _forget_sort_keys(self, iid):
+        for cache in self._sort_keys.values():
+            cache.pop(iid, None)
+
+    def sort_by(self, spec, key_funcs=None):
+        """Ordena pelo modelo segundo [(coluna, decrescente), ...] (estável, várias colunas)"""
+        if key_funcs:
+            self.sort_key_funcs.update(key_funcs)
+        self.sort_spec = list(spec)
+        self._sort_dirty = bool(self.sort_spec)
+        self._schedule_render()
+
+    def _position_map(self):
+        self._compact()
+        if self._positions is None:
+            self._positions = {iid: pos for pos, iid in enumerate(self._order)}
+        return self._positions
+
+    def _row(self, item):
+        row = self._rows.get(str(item))
+        if row is None:
+            raise tk.TclError(f'Item {item} not found')
+        return row
+
+    def _column_index(self, column):
+        if isinstance(column, int) or (isinstance(column, str) and column.startswith('#')):
+            return int(str(column).lstrip('#')) - (1 if str(column).startswith('#') else 0)
+        return self._columns.index(column)
+
+    def insert(self, parent, index, iid=None, **kw):
+        if parent not in ('', None):
+            raise tk.TclError("VirtualTreeview suporta apenas linhas de primeiro nível")
+        at_end = index in (tk.END, 'end')
+        if not at_end:
+            # Posição relativa às linhas atuais; a ordenação pendente fica para a exibição
+            self._compact(sort=False)
+        if iid is None:
+            self._counter += 1
+            iid = f"V{self._counter:06d}"
+        iid = str(iid)
+        if iid in self._rows:
+            raise tk.TclError(f'Item {iid} already exists')
+        self._rows[iid] = [tuple(kw.get('values', ())), self._as_tags(kw.get('tags'))]
+        self._forget_sort_keys(iid)
+        if self.sort_spec:
+            self._sort_dirty = True
+        if at_end or int(index) >= len(self._order):
+            if self._positions is not None:
+                self._positions[iid] = len(self._order)
+            self._order.append(iid)
+        else:
+            self._order.insert(max(0, int(index)), iid)
+            self._positions = None
+        self._schedule_render()
+        return iid
+
+    def delete(self, *items):
+        for item in items:
+            iid = str(item)
+            if self._rows.pop(iid, None) is not None:
+                self._selection.discard(iid)
+                self._forget_sort_keys(iid)
+                self._order_dirty = True
+        if not self._rows:
+            self._order = []
+            self._positions = None
+            self._order_dirty = False
+            self._sort_keys = {}
+        self._schedule_render()
+
+    def get_children(self, item=None):
+        if item not in ('', None):
+            return ()
+        self._compact()
+        return tuple(self._order)
+
+    def set_children(self, item, *newchildren):
+        """Define a nova ordem das linhas (descartando a ordenação); as omitidas são removidas"""
+        if item not in ('', None):
+            raise tk.TclError("VirtualTreeview suporta apenas linhas de primeiro nível")
+        self._sync_selection()
+        order = [str(iid) for iid in newchildren if str(iid) in self._rows]
+        kept = set(order)
+        for iid in list(self._rows):
+            if iid not in kept:
+                del self._rows[iid]
+        self._selection &= kept
+        self._order = order
+        self._positions = None
+        self._order_dirty = False
+        self.sort_spec = []
+        self._sort_dirty = False
+        self._schedule_render()
+
+    def exists(self, item):
+        return str(item) in self._rows
+
+    def index(self, item):
+        return self._position_map()[str(item)]
+
+    def item(self, item, option=None, **kw):
+        iid = str(item)
+        row = self._row(iid)
+        if kw:
+            if 'values' in kw:
+                row[0] = tuple(kw['values'])
+                self._forget_sort_keys(iid)
+                if self.sort_spec:
+                    self._sort_dirty = True
+                    self._schedule_render()
+            if 'tags' in kw:
+                row[1] = self._as_tags(kw['tags'])
+            if iid in self._materialized_set:
+                super().item(iid, **kw)
+            return None
+        if option == 'values':
+            return row[0]
+        if option == 'tags':
+            return row[1]
+        if option is None:
+            return {'text': '', 'image': '', 'values': list(row[0]), 'open': 0, 'tags': list(row[1])}
+        return super().item(iid, option) if iid in self._materialized_set else ''
+
+    def set(self, item, column=None, value=None):
+        iid = str(item)
+        values = self._row(iid)[0]
+        if column is None:
+            return dict(zip(self._columns, values))
+        idx = self._column_index(column)
+        if value is None:
+            return values[idx] if idx < len(values) else ''
+        values = list(values) + [''] * (idx + 1 - len(values))
+        values[idx] = value
+        self.item(iid, values=values)
+        return None
+
+    def tag_has(self, tagname, item=None):
+        if item is not None:
+            return tagname in self._row(item)[1]
+        self._compact()
+        return tuple(iid for iid in self._order if tagname in self._rows[iid][1])
+
+    # ----- Seleção -----
+
+    def _sync_selection(self):
+        """Incorpora ao modelo a seleção feita pelo usuário na janela visível"""
+        if not self._materialized:
+            return
+        widget_selection = set(super().selection())
+        self._selection = (self._selection - self._materialized_set) | (widget_selection & set(self._rows))
+
+    def _apply_selection(self):
+        wanted = [iid for iid in self._materialized if iid in self._selection]
+        if set(wanted) != set(super().selection()):
+            super().selection_set(wanted)
+
+    @staticmethod
+    def _flatten(items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        return [str(item) for item in items]
+
+    def selection(self):
+        self._sync_selection()
+        positions = self._position_map()
+        return tuple(sorted(self._selection, key=positions.__getitem__))
+
+    def selection_set(self, *items):
+        self._selection = {iid for iid in self._flatten(items) if iid in self._rows}
+        self._apply_selection()
+
+    def selection_add(self, *items):
+        self._sync_selection()
+        self._selection |= {iid for iid in self._flatten(items) if iid in self._rows}
+        self._apply_selection()
+
+    def selection_remove(self, *items):
+        self._sync_selection()
+        self._selection -= set(self._flatten(items))
+        self._apply_selection()
+
+    # ----- Rolagem -----
+
+    def _visible_count(self):
+        """Quantidade de linhas que cabem na área visível (descontando o cabeçalho)"""
+        try:
+            rowheight = int(ttk.Style(self).lookup(self.cget('style') or 'Treeview', 'rowheight') or 20)
+        except (tk.TclError, ValueError):
+            rowheight = 20
+        height = self.winfo_height()
+        if height <= 1:
+            height = int(self.cget('height') or 10) * rowheight + rowheight
+        return max(1, height // rowheight - 1)
+
+    def _clamp_first(self, visible):
+        self._first = max(0, min(self._first, len(self._order) - visible))
+
+    def yview(self, *args):
+        self._compact()
+        total = len(self._order)
+        visible = self._visible_count()
+        if not args:
+            if not total:
+                return (0.0, 1.0)
+            return (self._first / total, min(1.0, (self._first + visible) / total))
+        if args[0] == 'moveto':
+            self._first = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = visible if str(args[2]).startswith('page') else 1
+            self._first += int(args[1]) * step
+        self._clamp_first(visible)
+        self._render()
+        return None
+
+    def yview_moveto(self, fraction):
+        self.yview('moveto', fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview('scroll', number, what)
+
+    def see(self, item):
+        position = self._position_map().get(str(item))
+        if position is None:
+            return
+        visible = self._visible_count()
+        if position < self._first or position >= self._first + visible:
+            self._first = position - visible // 2
+            self._clamp_first(visible)
+            self._render()
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, dict):
+            kw = {**cnf, **kw}
+            cnf = None
+        for key in ('yscrollcommand', 'yscroll'):
+            if key in kw:
+                self._yscrollcommand = kw.pop(key)
+                self._update_scrollbar()
+        if cnf is None and not kw:
+            return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand is not None:
+            first, last = self.yview()
+            self._yscrollcommand(first, last)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            direction = -1
+        elif event.num == 5:
+            direction = 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self.yview('scroll', direction * self.WHEEL_UNITS, 'units')
+        return "break"
+
+    def _on_click(self, event):
+        """Clique simples substitui a seleção, inclusive fora da janela visível"""
+        if not event.state & 0x0005:  # sem Shift/Control
+            self._selection &= self._materialized_set
+            self._anchor = self.identify_row(event.y) or self._anchor
+
+    def _on_key(self, event):
+        """Navegação por teclado além da janela materializada"""
+        self._compact()
+        total = len(self._order)
+        if not total:
+            return "break"
+        positions = self._position_map()
+        current = positions.get(super().focus(), self._first)
+        visible = self._visible_count()
+        target = {
+            'Up': current - 1, 'Down': current + 1,
+            'Prior': current - visible, 'Next': current + visible,
+            'Home': 0, 'End': total - 1
+        }.get(event.keysym, current)
+        target = max(0, min(total - 1, target))
+        iid = self._order[target]
+        anchor = positions.get(self._anchor, current)
+        if event.state & 0x0001 and anchor is not None and str(self.cget('selectmode')) == 'extended':
+            # Shift estende a seleção a partir da âncora, como no Treeview padrão
+            self._selection = set(self._order[min(anchor, target):max(anchor, target) + 1])
+        else:
+            self._selection = {iid}
+            self._anchor = iid
+        self.see(iid)
+        self._render()
+        super().focus(iid)
+        return "break"
+
+    # ----- Renderização -----
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        """Materializa no widget apenas a janela visível (mais OVERSCAN linhas)"""
+        self._render_pending = False
+        try:
+            self._compact()
+            self._sync_selection()
+            visible = self._visible_count()
+            self._clamp_first(visible)
+            start = max(0, self._first - self.OVERSCAN)
+            window = self._order[start:self._first + visible + self.OVERSCAN]
+            window_set = set(window)
+            
+            kept = [iid for iid in self._materialized if iid in window_set]
+            if kept == [iid for iid in window if iid in self._materialized_set]:
+                # Rolagem: remover o que saiu e inserir só o que entrou
+                stale = [iid for iid in self._materialized if iid not in window_set]
+                if stale:
+                    super().delete(*stale)
+                for position, iid in enumerate(window):
+                    if iid not in self._materialized_set:
+                        values, tags = self._rows[iid]
+                        super().insert('', position, iid=iid, values=values, tags=tags)
+            else:
+                # Ordem mudou: recriar a janela
+                if self._materialized:
+                    super().delete(*self._materialized)
+                for iid in window:
+                    values, tags = self._rows[iid]
+                    super().insert('', 'end', iid=iid, values=values, tags=tags)
+            
+            self._materialized = window
+            self._materialized_set = window_set
+            self._apply_selection()
+            super().yview_moveto(0)
+            if self._first > start:
+                super().yview_scroll(self._first - start, 'units')
+            self._update_scrollbar()
+        except tk.TclError:
+            # Widget destruído antes da renderização agendada
+            pass
+
 class SSHClientGUI:
     """Interface gráfica para cliente SSH com múltiplas funcionalidades"""
+    # Intervalo do batimento que mede travamentos da interface
+    UI_HEARTBEAT_MS = 250
+
+    # Painel de diagnóstico: intervalo de atualização e operações recentes exibidas
+    DIAGNOSTICS_REFRESH_MS = 2000
+    DIAGNOSTICS_RECENT = 200
+
+    # Espera após a última tecla antes de filtrar
+    LIVE_FILTER_DELAY_MS = 150
+
+    # Limites do bloco de leitura adaptativo da sessão interativa
+    MIN_READ_CHUNK = 4096
+    MAX_READ_CHUNK = 65536
+
+    # MaxSessions padrão do sshd (OpenSSH); o shell interativo já ocupa uma sessão
+    MAX_SESSIONS = 10
+
+    # Tamanho máximo de cada leitura do canal da listagem de processos
+    SNAPSHOT_READ_CHUNK = 32768
+
+    # Quantidade de linhas inseridas por bloco no preenchimento da tabela
+    PROCESS_INSERT_CHUNK = 500
+
+    # Consultas simultâneas ao menu (cada uma em um canal próprio)
+    MAX_PARALLEL_QUERIES = 4
+
     def __init__(self, root):
         self.root = root
         self.root.title(f"Gerenciador SSH Avançado v{SOFTWARE_VERSION}")
@@ -155,15 +686,18 @@ class SSHClientGUI:
         
         # Cache de processos
         self.all_processes = []
+        self.process_index = None     # Índice da lista atual para os filtros
+        self.live_filter_job = None   # Filtragem ao digitar (debounce)
         
         # Histórico de hosts
         self.host_history = []
         
         # Filtro permanente (interno, não visível)
         self.permanent_filter = {
-            'users': ['root', 'zabbix', 'sshd', 'postfix', 'nscd', 'message+', 'usertra+'],
-            'commands': []  # Pode ser estendido
+            'users': list(DEFAULT_PERMANENT_FILTER['users']),
+            'commands': list(DEFAULT_PERMANENT_FILTER['commands'])
         }
+        self.permanent_matcher = PermanentFilterMatcher(self.permanent_filter)
         
         # Configurar estilo visual moderno
         self.style = ttk.Style()
@@ -200,8 +734,10 @@ class SSHClientGUI:
         self.client = None
         self.shell = None
         self.current_host = None
+        self.current_pool_key = None  # (host, usuário, porta) da conexão ativa
         self.stop_receiver = threading.Event()
         self.receiver_thread = None
+        self.shell_read_stats = None  # Estatísticas de leitura da sessão interativa
         self.running = True  # Flag para controlar threads
         self.show_password = False  # Estado da visibilidade da senha
         self.caps_lock_warning_shown = False  # Controle de aviso de Caps Lock
@@ -267,7 +803,8 @@ class SSHClientGUI:
         self.connect_btn.pack(side=tk.LEFT, padx=2)
         
         self.disconnect_btn = ttk.Button(btn_frame, text="Desconectar", 
-                                        command=self.disconnect, state=tk.DISABLED,
+                                        command=lambda: self.disconnect(keep_pooled=False),
+                                        state=tk.DISABLED,
                                         style='Red.TButton', width=10)
         self.disconnect_btn.pack(side=tk.LEFT, padx=2)
         
@@ -281,6 +818,15 @@ class SSHClientGUI:
         )
         self.admin_btn.pack(side=tk.LEFT, padx=2)
         
+        # Botão Diagnóstico (tempos por operação)
+        diagnostics_btn = ttk.Button(
+            btn_frame,
+            text="Diagnóstico",
+            command=self.show_diagnostics,
+            width=11
+        )
+        diagnostics_btn.pack(side=tk.LEFT, padx=2)
+        
         # Botão Ajuda
         help_btn = ttk.Button(
             btn_frame, 
@@ -310,9 +856,15 @@ class SSHClientGUI:
                   command=self.list_processes, width=15)
         list_btn.pack(side=tk.TOP, pady=1)
         refresh_btn = ttk.Button(action_frame, text="Atualizar Lista", 
-                  command=self.list_processes, width=15)
+                  command=self.refresh_processes, width=15)
         refresh_btn.pack(side=tk.TOP, pady=1)
         
+        # Aplicar os filtros no servidor e trafegar apenas as colunas exibidas
+        self.server_filter_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(action_frame, text="Filtrar no servidor",
+                        variable=self.server_filter_var).pack(side=tk.TOP, anchor=tk.W)
+        self.snapshot_volatile_filtered = False  # Lista atual já veio com filtros voláteis
+        
         # Frame para filtros voláteis (visíveis)
         filter_frame = ttk.LabelFrame(top_frame, text="Filtros")
         filter_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=0)
@@ -323,6 +875,7 @@ class SSHClientGUI:
         user_filter_entry = ttk.Entry(filter_frame, textvariable=self.user_filter_var, width=10)
         user_filter_entry.pack(side=tk.LEFT, padx=(0,3))
         user_filter_entry.bind("<Return>", lambda event: self.apply_filters())
+        self.user_filter_var.trace_add('write', self.schedule_live_filter)
         
         # Filtro por PID (volátil)
         ttk.Label(filter_frame, text="PID:").pack(side=tk.LEFT, padx=(5,2))
@@ -330,6 +883,7 @@ class SSHClientGUI:
         pid_filter_entry = ttk.Entry(filter_frame, textvariable=self.pid_filter_var, width=6)
         pid_filter_entry.pack(side=tk.LEFT, padx=(0,3))
         pid_filter_entry.bind("<Return>", lambda event: self.apply_filters())
+        self.pid_filter_var.trace_add('write', self.schedule_live_filter)
         
         # Filtro por comando (volátil)
         ttk.Label(filter_frame, text="Command:").pack(side=tk.LEFT, padx=(5,2))
@@ -337,6 +891,7 @@ class SSHClientGUI:
         cmd_filter_entry = ttk.Entry(filter_frame, textvariable=self.cmd_filter_var, width=15)
         cmd_filter_entry.pack(side=tk.LEFT, padx=(0,3))
         cmd_filter_entry.bind("<Return>", lambda event: self.apply_filters())
+        self.cmd_filter_var.trace_add('write', self.schedule_live_filter)
         
         # Botão para aplicar filtros voláteis
         apply_btn = ttk.Button(filter_frame, text="Aplicar Filtros", 
@@ -381,12 +936,55 @@ class SSHClientGUI:
         )
         self.clear_button.pack(side=tk.LEFT, padx=2)
         
+        # Opções da derrubada (compartilhadas pelas três abas)
+        self.kill_direct_var = tk.BooleanVar(value=False)
+        self.kill_escalate_var = tk.BooleanVar(value=False)
+        self.kill_escalate_timeout_var = tk.StringVar(value="5")
+        self.add_kill_options(btn_action_frame)
+        
+        # Barra de progresso do carregamento da tabela
+        progress_frame = ttk.Frame(pid_frame)
+        progress_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=(0,2))
+        
+        self.process_progress = ttk.Progressbar(progress_frame, mode='determinate', length=200)
+        self.process_progress.pack(side=tk.RIGHT)
+        
+        # Atualização automática incremental
+        self.highlight_changes_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(progress_frame, text="Destacar mudanças",
+                        variable=self.highlight_changes_var).pack(side=tk.RIGHT, padx=(0,10))
+        
+        ttk.Label(progress_frame, text="s").pack(side=tk.RIGHT, padx=(0,10))
+        self.auto_refresh_interval_var = tk.StringVar(value="30")
+        ttk.Spinbox(progress_frame, from_=5, to=3600, increment=5, width=5,
+                    textvariable=self.auto_refresh_interval_var).pack(side=tk.RIGHT)
+        self.auto_refresh_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(progress_frame, text="Atualização automática a cada",
+                        variable=self.auto_refresh_var,
+                        command=self.toggle_auto_refresh).pack(side=tk.RIGHT, padx=(0,2))
+        
+        self.auto_refresh_job = None
+        self.process_refresh_running = False
+        
+        self.process_status_var = tk.StringVar(value="")
+        ttk.Label(progress_frame, textvariable=self.process_status_var,
+                  font=('Segoe UI', 8, 'italic')).pack(side=tk.LEFT)
+        
+        # Geração do preenchimento em andamento (cancela blocos de listagens antigas)
+        self.process_populate_generation = 0
+        self.process_stream_started = None  # Início da inserção progressiva
+        self.process_insert_queue = deque()  # Linhas recebidas aguardando inserção em blocos
+        self.process_insert_scheduled = False
+        self.process_rows_inserted = 0
+        self.process_streaming = False  # Listagem progressiva em andamento
+        self.process_filter_stale = False  # Filtros alterados durante a listagem
+        
         # Treeview para mostrar processos com scrollbar
         tree_frame = ttk.Frame(pid_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0,2))
         
         columns = ('user', 'pid', 'idle', 'command')
-        self.process_tree = ttk.Treeview(
+        self.process_tree = VirtualTreeview(
             tree_frame, columns=columns, show='headings', selectmode='extended'
         )
         
@@ -400,6 +998,7 @@ class SSHClientGUI:
                 command=lambda c=col: self.treeview_sort_column(self.process_tree, c, False)
             )
             self.process_tree.column(col, width=col_widths[idx], anchor=tk.W)
+        self.process_tree.bind('<Shift-Button-1>', self.on_heading_shift_click)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.process_tree.yview)
@@ -407,6 +1006,11 @@ class SSHClientGUI:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.process_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
+        # Destaque de processos novos/encerrados na atualização incremental
+        self.process_tree.tag_configure('new', background='#d4edda')
+        self.process_tree.tag_configure('gone', background='#f8d7da')
+        self.process_tree.tag_configure('kill_failed', foreground='#d9534f')
+        
         # Evento de seleção para adicionar PIDs
         self.process_tree.bind('<<TreeviewSelect>>', self.on_pid_select)
         
@@ -433,6 +1037,11 @@ class SSHClientGUI:
         )
         self.consultar_matricula_btn.pack(side=tk.LEFT)
         
+        # Consulta direta (lsof//proc) sem passar pelo menu; mesma opção nas duas abas
+        self.direct_query_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(input_frame, text="Consulta direta (sem menu)",
+                        variable=self.direct_query_var).pack(side=tk.LEFT, padx=(10,0))
+        
         # Frame de status da operação
         status_frame = ttk.LabelFrame(matricula_frame, text="Status da Operação")
         status_frame.pack(fill=tk.X, padx=5, pady=2)
@@ -477,6 +1086,7 @@ class SSHClientGUI:
             width=15
         )
         self.clear_matricula_button.pack(side=tk.LEFT, padx=2)
+        self.add_kill_options(btn_action_frame)
         
         # Tabela para resultados
         result_frame = ttk.LabelFrame(matricula_frame, text="Resultados da Consulta")
@@ -484,7 +1094,7 @@ class SSHClientGUI:
         
         # Treeview para mostrar resultados
         columns = ('user', 'pid', 'name')
-        self.result_tree = ttk.Treeview(
+        self.result_tree = VirtualTreeview(
             result_frame, 
             columns=columns, 
             show='headings',
@@ -501,12 +1111,14 @@ class SSHClientGUI:
                 command=lambda c=col: self.treeview_sort_column(self.result_tree, c, False)
             )
             self.result_tree.column(col, width=col_widths[idx], anchor=tk.W)
+        self.result_tree.bind('<Shift-Button-1>', self.on_heading_shift_click)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.result_tree.yview)
         self.result_tree.configure(yscroll=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.result_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.result_tree.tag_configure('kill_failed', foreground='#d9534f')
         
         # Vincular seleção na tabela ao campo de PIDs
         self.result_tree.bind('<<TreeviewSelect>>', self.on_matricula_pid_select)
@@ -536,6 +1148,9 @@ class SSHClientGUI:
         )
         self.consultar_tela_btn.pack(side=tk.LEFT)
         
+        ttk.Checkbutton(input_frame_tela, text="Consulta direta (sem menu)",
+                        variable=self.direct_query_var).pack(side=tk.LEFT, padx=(10,0))
+        
         # Frame de status da operação
         status_frame_tela = ttk.LabelFrame(tela_frame, text="Status da Operação")
         status_frame_tela.pack(fill=tk.X, padx=5, pady=2)
@@ -580,6 +1195,7 @@ class SSHClientGUI:
             width=15
         )
         self.clear_tela_button.pack(side=tk.LEFT, padx=2)
+        self.add_kill_options(btn_action_frame_tela)
         
         # Tabela para resultados
         result_frame_tela = ttk.LabelFrame(tela_frame, text="Resultados da Consulta")
@@ -587,7 +1203,7 @@ class SSHClientGUI:
         
         # Treeview para mostrar resultados
         columns = ('user', 'pid', 'name')
-        self.tela_tree = ttk.Treeview(
+        self.tela_tree = VirtualTreeview(
             result_frame_tela, 
             columns=columns, 
             show='headings',
@@ -604,12 +1220,14 @@ class SSHClientGUI:
                 command=lambda c=col: self.treeview_sort_column(self.tela_tree, c, False)
             )
             self.tela_tree.column(col, width=col_widths[idx], anchor=tk.W)
+        self.tela_tree.bind('<Shift-Button-1>', self.on_heading_shift_click)
         
         # Scrollbar
         scrollbar_tela = ttk.Scrollbar(result_frame_tela, orient=tk.VERTICAL, command=self.tela_tree.yview)
         self.tela_tree.configure(yscroll=scrollbar_tela.set)
         scrollbar_tela.pack(side=tk.RIGHT, fill=tk.Y)
         self.tela_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tela_tree.tag_configure('kill_failed', foreground='#d9534f')
         
         # Vincular seleção na tabela ao campo de PIDs
         self.tela_tree.bind('<<TreeviewSelect>>', self.on_tela_pid_select)
@@ -654,10 +1272,22 @@ class SSHClientGUI:
         self.commands_text.pack(fill=tk.X, pady=(0,2))
         self.commands_text.insert(tk.END, "ls -la\necho \"Teste SSH\"\nwhoami")
         
+        exec_options_frame = ttk.Frame(cmd_input_frame)
+        exec_options_frame.pack(fill=tk.X, pady=2)
+        
         exec_btn = ttk.Button(
-            cmd_input_frame, text="Executar Comandos", command=self.execute_commands
+            exec_options_frame, text="Executar Comandos", command=self.execute_commands
         )
-        exec_btn.pack(anchor=tk.E, pady=2)
+        exec_btn.pack(side=tk.RIGHT)
+        
+        # Execução concorrente em vários canais da mesma conexão
+        self.exec_concurrency_var = tk.StringVar(value="4")
+        ttk.Spinbox(exec_options_frame, from_=1, to=self.MAX_SESSIONS - 1, width=3,
+                    textvariable=self.exec_concurrency_var).pack(side=tk.RIGHT, padx=(0,10))
+        ttk.Label(exec_options_frame, text="Canais simultâneos:").pack(side=tk.RIGHT, padx=(0,2))
+        self.concurrent_exec_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(exec_options_frame, text="Execução concorrente",
+                        variable=self.concurrent_exec_var).pack(side=tk.RIGHT, padx=(0,10))
         
         # Frame de resultados
         result_frame = ttk.Frame(commands_frame)
@@ -671,6 +1301,85 @@ class SSHClientGUI:
         )
         self.result_text.pack(fill=tk.BOTH, expand=True)
         
+        # ===== ABA FROTA (SEXTA ABA) =====
+        fleet_frame = ttk.Frame(self.notebook)
+        self.notebook.add(fleet_frame, text=" Frota ")
+        
+        fleet_top_frame = ttk.Frame(fleet_frame)
+        fleet_top_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        # Lista de hosts
+        fleet_hosts_frame = ttk.LabelFrame(fleet_top_frame, text="Hosts (um por linha, host ou host:porta)")
+        fleet_hosts_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0,5))
+        
+        self.fleet_hosts_text = scrolledtext.ScrolledText(fleet_hosts_frame, height=6, width=40, font=('Consolas', 9))
+        self.fleet_hosts_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=2)
+        
+        fleet_load_frame = ttk.Frame(fleet_hosts_frame)
+        fleet_load_frame.pack(fill=tk.X, padx=5, pady=(0,2))
+        ttk.Button(fleet_load_frame, text="Carregar Histórico",
+                   command=self.load_fleet_history).pack(side=tk.LEFT, padx=(0,2))
+        ttk.Button(fleet_load_frame, text="Carregar Arquivo de Grupo...",
+                   command=self.load_fleet_group_file).pack(side=tk.LEFT)
+        
+        # Opções da operação
+        fleet_options_frame = ttk.LabelFrame(fleet_top_frame, text="Operação")
+        fleet_options_frame.pack(side=tk.LEFT, fill=tk.Y)
+        
+        self.fleet_operation_var = tk.StringVar(value="processes")
+        ttk.Radiobutton(fleet_options_frame, text="Listar processos",
+                        variable=self.fleet_operation_var, value="processes").pack(anchor=tk.W, padx=5)
+        ttk.Radiobutton(fleet_options_frame, text="Comandos da aba 'Executar Comandos'",
+                        variable=self.fleet_operation_var, value="commands").pack(anchor=tk.W, padx=5)
+        
+        fleet_workers_frame = ttk.Frame(fleet_options_frame)
+        fleet_workers_frame.pack(anchor=tk.W, padx=5, pady=2)
+        ttk.Label(fleet_workers_frame, text="Hosts simultâneos:").pack(side=tk.LEFT)
+        self.fleet_workers_var = tk.StringVar(value="8")
+        ttk.Spinbox(fleet_workers_frame, from_=1, to=64, width=4,
+                    textvariable=self.fleet_workers_var).pack(side=tk.LEFT, padx=(2,0))
+        
+        self.fleet_run_btn = ttk.Button(fleet_options_frame, text="Executar na Frota",
+                                        command=self.run_fleet, style='Blue.TButton')
+        self.fleet_run_btn.pack(anchor=tk.W, padx=5, pady=(2,5))
+        
+        self.fleet_status_var = tk.StringVar(value="Usa o usuário e a senha da conexão acima.")
+        ttk.Label(fleet_frame, textvariable=self.fleet_status_var,
+                  font=('Segoe UI', 9, 'italic')).pack(fill=tk.X, padx=5)
+        
+        # Resultados agregados por host
+        fleet_paned = ttk.PanedWindow(fleet_frame, orient=tk.VERTICAL)
+        fleet_paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0,2))
+        
+        fleet_tree_frame = ttk.Frame(fleet_paned)
+        columns = ('host', 'status', 'time', 'summary')
+        self.fleet_tree = ttk.Treeview(fleet_tree_frame, columns=columns, show='headings', selectmode='browse')
+        col_widths = [160, 80, 70, 500]
+        for idx, col in enumerate(columns):
+            self.fleet_tree.heading(
+                col, 
+                text=col.upper(), 
+                anchor=tk.W,
+                command=lambda c=col: self.treeview_sort_column(self.fleet_tree, c, False)
+            )
+            self.fleet_tree.column(col, width=col_widths[idx], anchor=tk.W)
+        self.fleet_tree.tag_configure('failed', foreground='#d9534f')
+        
+        fleet_scrollbar = ttk.Scrollbar(fleet_tree_frame, orient=tk.VERTICAL, command=self.fleet_tree.yview)
+        self.fleet_tree.configure(yscroll=fleet_scrollbar.set)
+        fleet_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.fleet_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.fleet_tree.bind('<<TreeviewSelect>>', self.on_fleet_select)
+        fleet_paned.add(fleet_tree_frame, weight=1)
+        
+        self.fleet_detail_text = scrolledtext.ScrolledText(
+            fleet_paned, wrap=tk.WORD, bg='#1e1e1e', fg='#d4d4d4', 
+            font=('Consolas', 10), height=8, state=tk.DISABLED
+        )
+        fleet_paned.add(self.fleet_detail_text, weight=1)
+        
+        self.fleet_details = {}  # iid do host -> saída detalhada
+        
         # Configurar foco
         self.password_entry.focus_set()
         
@@ -725,11 +1434,14 @@ class SSHClientGUI:
         # Configurar fechamento seguro
         root.protocol("WM_DELETE_WINDOW", self.safe_close)
 
-        # Variáveis para captura de saída
-        self.capturing_matricula = False
-        self.matricula_output = ""
-        self.capturing_tela = False
-        self.tela_output = ""
+        # Linhas já exibidas de cada consulta (resultados chegam em lotes)
+        self.query_rows_seen = {'matricula': set(), 'tela': set()}
+        self.matricula_query_id = 0
+        self.tela_query_id = 0
+        
+        # Conversas com o menu sobre a sessão interativa (uma por vez)
+        self.menu_expect = MenuExpect()
+        self.menu_lock = threading.Lock()
         
         # Configuração de senha e URL de atualização
         self.admin_config_file = os.path.join(os.path.expanduser("~"), ".ssh_tool_config")
@@ -740,6 +1452,58 @@ class SSHClientGUI:
         
         # Agora carregar a configuração
         self.admin_config = self.load_admin_config()
+        self.menu_prompts = compile_menu_prompts(self.admin_config.get('menu_prompts'))
+        
+        # Renderização do terminal interativo agrupada por quadro
+        self.terminal_renderer = TerminalRenderer(
+            self.root,
+            self.output_text,
+            max_fps=int(self.admin_config.get('terminal_max_fps', 30)),
+            max_lines=int(self.admin_config.get('terminal_max_lines', 5000))
+        )
+        
+        # Pool de conexões autenticadas (troca rápida entre hosts)
+        self.connection_pool = SSHConnectionPool(
+            max_size=int(self.admin_config.get('pool_max_size', 8)),
+            idle_timeout=int(self.admin_config.get('pool_idle_timeout', 600))
+        )
+        self.root.after(30000, self.evict_idle_connections)
+        
+        # Cache das consultas de matrícula/tela (ttl 0 desativa)
+        self.query_cache = QueryResultCache(
+            ttl=float(self.admin_config.get('query_cache_ttl', 60)),
+            max_entries=int(self.admin_config.get('query_cache_max_entries', 200))
+        )
+        
+        # Tempos por etapa de cada operação (painel de diagnóstico e arquivo JSONL opcional)
+        self.timings = OperationRecorder(
+            max_records=int(self.admin_config.get('timing_max_records', 1000)),
+            jsonl_path=self.admin_config.get('timing_jsonl_path') or None
+        )
+        self.diagnostics_window = None
+        
+        # Métricas da própria ferramenta (Prometheus: porta local e/ou arquivo texto)
+        self.metrics = MetricsRegistry()
+        self.metrics.describe('pool_connections', 'gauge', "Conexões SSH no pool")
+        self.metrics.describe('pool_connections_in_use', 'gauge', "Conexões do pool em uso")
+        self.metrics.describe('open_channels', 'gauge', "Canais SSH abertos nas conexões da ferramenta")
+        self.metrics.describe('connected', 'gauge', "1 se a interface está conectada a um host")
+        self.metrics.describe('ui_heartbeat_age_seconds', 'gauge', "Tempo desde o último ciclo do laço de eventos")
+        self.metrics.collectors.append(self.collect_metrics)
+        self.timings.listeners.append(self.metrics.observe_operation)
+        self.metrics_exporter = MetricsExporter(
+            self.metrics,
+            port=int(self.admin_config.get('metrics_port', 0) or 0),
+            bind=self.admin_config.get('metrics_bind', '127.0.0.1'),
+            textfile=self.admin_config.get('metrics_textfile') or None,
+            interval=float(self.admin_config.get('metrics_textfile_interval', 15))
+        )
+        try:
+            self.metrics_exporter.start()
+        except OSError as e:
+            logger.error(f"Não foi possível publicar as métricas na porta {self.metrics_exporter.port}: {str(e)}")
+        self.ui_heartbeat_last = time.monotonic()
+        self.root.after(self.UI_HEARTBEAT_MS, self.ui_heartbeat)
 
     def load_admin_config(self):
         """Carrega a configuração do administrador do arquivo"""
@@ -919,9 +1683,9 @@ class SSHClientGUI:
         commands_frame = ttk.LabelFrame(config_frame, text="Comandos Bloqueados (um por linha)")
         commands_frame.pack(fill=tk.X, pady=5)
         
-        self.commands_text = scrolledtext.ScrolledText(commands_frame, height=5, font=('Consolas', 9))
-        self.commands_text.pack(fill=tk.X, padx=5, pady=5)
-        self.commands_text.insert(tk.END, "\n".join(self.permanent_filter['commands']))
+        self.blocked_commands_text = scrolledtext.ScrolledText(commands_frame, height=5, font=('Consolas', 9))
+        self.blocked_commands_text.pack(fill=tk.X, padx=5, pady=5)
+        self.blocked_commands_text.insert(tk.END, "\n".join(self.permanent_filter['commands']))
         
         # Botões de ação
         btn_frame = ttk.Frame(config_frame)
@@ -929,11 +1693,12 @@ class SSHClientGUI:
         
         def save_admin_config():
             users = self.users_text.get("1.0", tk.END).splitlines()
-            commands = self.commands_text.get("1.0", tk.END).splitlines()
+            commands = self.blocked_commands_text.get("1.0", tk.END).splitlines()
             
             # Filtrar linhas vazias
             self.permanent_filter['users'] = [u.strip() for u in users if u.strip()]
             self.permanent_filter['commands'] = [c.strip() for c in commands if c.strip()]
+            self.permanent_matcher = PermanentFilterMatcher(self.permanent_filter)
             
             messagebox.showinfo("Sucesso", "Configuração salva com sucesso!", parent=top)
             top.destroy()
@@ -1028,13 +1793,16 @@ class SSHClientGUI:
                 data = json.loads(response.read().decode())
                 latest_version = data.get('version')
                 
-                # Selecionar URL de download apropriada
+                # Selecionar URL de download apropriada; o script precisa
+                # também do ssh_core.py (o executável já o traz embutido)
                 if IS_EXE:
                     download_url = data.get('exe_url')
+                    core_url = None
                 else:
                     download_url = data.get('py_url')
+                    core_url = data.get('core_url')
                 
-                if latest_version and download_url:
+                if latest_version and download_url and (IS_EXE or core_url):
                     # Comparar versões
                     if self.compare_versions(SOFTWARE_VERSION, latest_version) < 0:
                         # Nova versão disponível
@@ -1046,7 +1814,7 @@ class SSHClientGUI:
                         )
                         
                         if response:
-                            self.download_and_update(download_url)
+                            self.download_and_update(download_url, core_url)
                     else:
                         messagebox.showinfo(
                             "Sem Atualizações",
@@ -1085,8 +1853,8 @@ class SSHClientGUI:
                 return 1
         return 0
 
-    def download_and_update(self, download_url):
-        """Baixa e instala a atualização"""
+    def download_and_update(self, download_url, core_url=None):
+        """Baixa e instala a atualização (core_url: novo ssh_core.py, só no script)"""
         try:
             # Criar diretório temporário
             temp_dir = tempfile.mkdtemp()
@@ -1102,6 +1870,15 @@ class SSHClientGUI:
                 with open(temp_file, 'wb') as out_file:
                     shutil.copyfileobj(response, out_file)
             
+            # O script depende do ssh_core.py: baixar e substituir os dois juntos
+            core_file = None
+            core_path = os.path.abspath(ssh_core.__file__)
+            if core_url:
+                core_file = os.path.join(temp_dir, "ssh_core.py")
+                with urllib.request.urlopen(core_url, timeout=30) as response:
+                    with open(core_file, 'wb') as out_file:
+                        shutil.copyfileobj(response, out_file)
+            
             # Se for Windows, criar um script .bat para atualizar
             if sys.platform.startswith('win'):
                 # Determinar o caminho do executável/script atual
@@ -1121,6 +1898,8 @@ timeout /t 3 /nobreak >nul
                     script += f'taskkill /F /IM "python.exe" >nul 2>&1\n'
                     script += f'del /F /Q "{current_path}"\n'
                     script += f'move /Y "{temp_file}" "{current_path}"\n'
+                    if core_file:
+                        script += f'move /Y "{core_file}" "{core_path}"\n'
                     script += f'start "" "{current_path}"\n'
                 
                 script += f'rmdir /s /q "{temp_dir}"\n'
@@ -1138,7 +1917,8 @@ timeout /t 3 /nobreak >nul
                 messagebox.showinfo(
                     "Atualização Baixada",
                     f"A nova versão foi baixada em:\n{temp_file}\n"
-                    "Por favor, instale manualmente.",
+                    + (f"{core_file} (substituir {core_path})\n" if core_file else "")
+                    + "Por favor, instale manualmente.",
                     parent=self.root
                 )
             
@@ -1192,7 +1972,9 @@ timeout /t 3 /nobreak >nul
     def safe_close(self):
         """Fecha a aplicação de forma segura"""
         self.running = False
-        self.disconnect()
+        self.disconnect(keep_pooled=False)
+        self.connection_pool.close_all()
+        self.metrics_exporter.stop()
         
         # Remover arquivo temporário do ícone se existir
         if self.temp_ico_file and os.path.exists(self.temp_ico_file):
@@ -1223,20 +2005,36 @@ timeout /t 3 /nobreak >nul
             "1. CONEXÃO:\n"
             "   - Preencha os campos de host, usuário, senha e porta\n"
             "   - Clique em 'Conectar' ou pressione Enter no campo de senha\n"
-            "   - Caps Lock ativado será avisado automaticamente\n\n"
+            "   - Caps Lock ativado será avisado automaticamente\n"
+            "   - Conexões recentes ficam abertas em um pool: voltar a um host\n"
+            "     usado recentemente é instantâneo\n\n"
             "2. ABA 'DERRUBAR CONF':\n"
             "   - Lista todos os processos ativos do servidor\n"
             "   - Filtros automáticos bloqueiam usuários críticos\n"
-            "   - Use os filtros visíveis para refinar a busca\n"
-            "   - Selecione PIDs manualmente ou na tabela\n\n"
+            "   - Use os filtros visíveis para refinar a busca: a tabela é filtrada\n"
+            "     enquanto você digita (o PID casa pelo início do número)\n"
+            "   - Clique no cabeçalho para ordenar (de novo inverte); Shift+clique\n"
+            "     adiciona a coluna como critério seguinte. A ordem vale também\n"
+            "     para as atualizações da lista\n"
+            "   - Selecione PIDs manualmente ou na tabela\n"
+            "   - 'Kill direto' derruba centenas de PIDs em uma execução, sem o menu;\n"
+            "     'KILL após' força o término de quem ignorar o sinal no prazo\n"
+            "   - Ao final, uma tabela mostra o resultado de cada PID; os encerrados\n"
+            "     saem das tabelas e os que resistirem ficam destacados em vermelho\n\n"
             "3. ABA 'DERRUBAR MATRÍCULA E ROMANEIO':\n"
             "   - Consulta processos relacionados a matrículas ou romaneios\n"
             "   - Busca em /d/work por arquivos com o padrão especificado\n"
-            "   - Resultados mostrados em tabela com usuário, PID e nome\n\n"
+            "   - Resultados mostrados em tabela com usuário, PID e nome\n"
+            "   - Vários valores separados por espaço são consultados em paralelo\n\n"
             "4. ABA 'CONSULTAR TELA':\n"
             "   - Consulta processos por número de tela ou romaneio\n"
             "   - Busca em /d/dados por arquivos com o padrão especificado\n"
-            "   - Use '*' para listar todas as telas/romaneios\n\n"
+            "   - Use '*' para listar todas as telas/romaneios\n"
+            "   - As consultas usam canais próprios e não interferem no terminal\n"
+            "   - 'Consulta direta' obtém o resultado em uma única execução (lsof),\n"
+            "     usando o menu quando o servidor não oferece esse recurso\n"
+            "   - Consultas repetidas em até 60 s vêm do cache (idade no status);\n"
+            "     derrubar processos descarta os resultados que os continham\n\n"
             "5. ABA 'TERMINAL INTERATIVO':\n"
             "   - Sessão SSH interativa em tempo real\n"
             "   - Execute comandos diretamente no servidor\n"
@@ -1244,14 +2042,29 @@ timeout /t 3 /nobreak >nul
             "6. ABA 'EXECUTAR COMANDOS':\n"
             "   - Execute múltiplos comandos de uma vez\n"
             "   - Cada comando deve estar em uma linha separada\n\n"
-            "7. BOTÃO 'ADMINISTRADOR':\n"
+            "7. ABA 'FROTA':\n"
+            "   - Executa a listagem de processos ou os comandos da aba anterior\n"
+            "     em vários hosts ao mesmo tempo (histórico ou arquivo de grupo)\n"
+            "   - Usa o usuário e a senha da conexão; hosts ainda não confiados\n"
+            "     devem ser conectados manualmente uma vez\n"
+            "   - Clique em um host para ver a saída detalhada\n\n"
+            "8. BOTÃO 'ADMINISTRADOR':\n"
             "   - Configura filtros permanentes de usuários/comandos\n"
             "   - Requer senha de administração\n"
             "   - Opção para redefinir senha caso esquecida\n\n"
-            "8. ATUALIZAÇÕES:\n"
+            "9. BOTÃO 'DIAGNÓSTICO':\n"
+            "   - Tempos de cada operação (conexão, listagem, comandos, consultas,\n"
+            "     derrubadas) separados por etapa: TCP, handshake com autenticação,\n"
+            "     canal, execução remota, transferência, parsing, filtro e tabela\n"
+            "   - Percentis p50/p95 por operação e host mostram onde está a lentidão\n"
+            "   - Opcionalmente grava cada operação em um arquivo JSONL\n"
+            "   - Métricas para monitoramento (conexões, canais, consultas, derrubadas,\n"
+            "     travamentos da interface) no formato do Prometheus, em porta local\n"
+            "     ou arquivo texto, conforme a configuração\n\n"
+            "10. ATUALIZAÇÕES:\n"
             "   - Clique em 'Verificar Atualizações' no rodapé\n"
             "   - O software busca automaticamente novas versões\n\n"
-            "9. DICAS GERAIS:\n"
+            "11. DICAS GERAIS:\n"
             "   - Pressione Enter em campos de texto para ativar ações\n"
             "   - Clique nos cabeçalhos das tabelas para ordenar\n"
             "   - Use o botão 👁 para mostrar/ocultar senha\n"
@@ -1289,6 +2102,171 @@ timeout /t 3 /nobreak >nul
         # Centralizar a janela
         self.center_window(help_window)
 
+    def ui_heartbeat(self):
+        """Mede o atraso do laço de eventos do Tk em relação ao batimento agendado"""
+        now = time.monotonic()
+        stall = now - self.ui_heartbeat_last - self.UI_HEARTBEAT_MS / 1000
+        self.ui_heartbeat_last = now
+        self.metrics.observe('ui_stall_seconds', max(0.0, stall))
+        if self.running:
+            self.root.after(self.UI_HEARTBEAT_MS, self.ui_heartbeat)
+
+    def collect_metrics(self):
+        """Medidores do momento (chamado na thread de exposição, sem acessar o Tk)"""
+        pool = self.connection_pool.stats()
+        client = self.client
+        channels = pool['channels']
+        if client is not None and self.current_pool_key is None:
+            channels += SSHConnectionPool.open_channels(client)
+        return [
+            ('pool_connections', {}, pool['connections']),
+            ('pool_connections_in_use', {}, pool['in_use']),
+            ('open_channels', {}, channels),
+            ('connected', {}, 1 if client is not None else 0),
+            ('ui_heartbeat_age_seconds', {}, max(0.0, time.monotonic() - self.ui_heartbeat_last)),
+        ]
+
+    @staticmethod
+    def format_timing_counters(counters):
+        """Volumes de uma operação em texto curto (bytes em KB)"""
+        parts = []
+        for name, value in counters.items():
+            if name == 'bytes':
+                parts.append(f"{value / 1024:.1f} KB")
+            else:
+                parts.append(f"{name} {value}")
+        return ", ".join(parts)
+
+    def show_diagnostics(self):
+        """Painel com os tempos por etapa das operações recentes e exportação JSONL"""
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.deiconify()
+            self.diagnostics_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Diagnóstico - Tempos por Operação")
+        window.geometry("1000x600")
+        window.transient(self.root)
+        self.diagnostics_window = window
+        
+        main_frame = ttk.Frame(window)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def make_tree(parent, columns, headings, widths, height):
+            frame = ttk.Frame(parent)
+            frame.pack(fill=tk.BOTH, expand=True, pady=(2, 8))
+            tree = ttk.Treeview(frame, columns=columns, show='headings', height=height)
+            for col in columns:
+                tree.heading(col, text=headings[col])
+                tree.column(col, width=widths[col], stretch=(col == 'steps'))
+            scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+            tree.configure(yscrollcommand=scrollbar.set)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            tree.pack(fill=tk.BOTH, expand=True)
+            return tree
+        
+        # Percentis por operação e host (milissegundos)
+        ttk.Label(main_frame, text="Percentis recentes por operação e host (ms):").pack(anchor=tk.W)
+        summary_tree = make_tree(
+            main_frame, ('op', 'host', 'count', 'errors', 'p50', 'p95', 'max', 'steps'),
+            {'op': "Operação", 'host': "Host", 'count': "Qtde", 'errors': "Erros", 'p50': "p50",
+             'p95': "p95", 'max': "Máx", 'steps': "Etapas (p50 / p95)"},
+            {'op': 140, 'host': 120, 'count': 50, 'errors': 50, 'p50': 70, 'p95': 70, 'max': 70,
+             'steps': 400}, 8
+        )
+        
+        # Operações mais recentes primeiro
+        ttk.Label(main_frame, text="Operações recentes:").pack(anchor=tk.W)
+        recent_tree = make_tree(
+            main_frame, ('ts', 'op', 'host', 'total', 'steps', 'volume', 'status'),
+            {'ts': "Início", 'op': "Operação", 'host': "Host", 'total': "Total (ms)",
+             'steps': "Etapas (ms)", 'volume': "Volume", 'status': "Resultado"},
+            {'ts': 130, 'op': 130, 'host': 110, 'total': 80, 'steps': 330, 'volume': 120, 'status': 160}, 10
+        )
+        recent_tree.tag_configure('failed', foreground='red')
+        
+        # Gravação contínua em JSONL e exportação do histórico
+        options_frame = ttk.Frame(main_frame)
+        options_frame.pack(fill=tk.X)
+        jsonl_var = tk.BooleanVar(value=bool(self.timings.jsonl_path))
+        path_var = tk.StringVar(value=self.timings.jsonl_path or os.path.join(
+            os.path.expanduser("~"), "ssh_tool_timings.jsonl"
+        ))
+        metrics_targets = self.metrics_exporter.describe()
+        status_var = tk.StringVar(value=f"Métricas em {metrics_targets}" if metrics_targets else "")
+        
+        def apply_jsonl(event=None):
+            path = path_var.get().strip()
+            self.timings.jsonl_path = path if jsonl_var.get() and path else None
+            self.admin_config['timing_jsonl_path'] = self.timings.jsonl_path or ""
+            self.save_admin_config(self.admin_config)
+            status_var.set(f"Gravando em {path}" if self.timings.jsonl_path else "Gravação em JSONL desativada")
+        
+        def choose_path():
+            path = filedialog.asksaveasfilename(
+                parent=window, defaultextension=".jsonl",
+                initialfile=os.path.basename(path_var.get()),
+                filetypes=[("JSON lines", "*.jsonl"), ("Todos os arquivos", "*.*")]
+            )
+            if path:
+                path_var.set(path)
+                apply_jsonl()
+        
+        def export_now():
+            path = filedialog.asksaveasfilename(
+                parent=window, defaultextension=".jsonl",
+                filetypes=[("JSON lines", "*.jsonl"), ("Todos os arquivos", "*.*")]
+            )
+            if path:
+                records = self.timings.records()
+                self.timings.append_jsonl(path, records)
+                status_var.set(f"{len(records)} operações exportadas para {path}")
+        
+        def clear():
+            self.timings.clear()
+            refresh(reschedule=False)
+        
+        ttk.Checkbutton(options_frame, text="Gravar cada operação em JSONL:",
+                        variable=jsonl_var, command=apply_jsonl).pack(side=tk.LEFT)
+        path_entry = ttk.Entry(options_frame, textvariable=path_var, width=45)
+        path_entry.pack(side=tk.LEFT, padx=5)
+        path_entry.bind('<Return>', apply_jsonl)
+        ttk.Button(options_frame, text="Escolher...", command=choose_path).pack(side=tk.LEFT)
+        ttk.Button(options_frame, text="Exportar...", command=export_now).pack(side=tk.LEFT, padx=5)
+        ttk.Button(options_frame, text="Limpar", command=clear).pack(side=tk.LEFT)
+        ttk.Button(options_frame, text="Fechar", command=window.destroy).pack(side=tk.RIGHT)
+        ttk.Label(main_frame, textvariable=status_var).pack(anchor=tk.W, pady=(5, 0))
+        
+        def refresh(reschedule=True):
+            if not self.running or not window.winfo_exists():
+                return
+            summary_tree.delete(*summary_tree.get_children())
+            for group in self.timings.summary():
+                steps = "  ".join(
+                    f"{step} {stats['p50']:.0f}/{stats['p95']:.0f}" for step, stats in group['steps'].items()
+                )
+                summary_tree.insert('', tk.END, values=(
+                    group['op'], group['host'], group['count'], group['errors'],
+                    f"{group['total']['p50']:.0f}", f"{group['total']['p95']:.0f}",
+                    f"{group['total']['max']:.0f}", steps
+                ))
+            recent_tree.delete(*recent_tree.get_children())
+            for record in reversed(self.timings.records()[-self.DIAGNOSTICS_RECENT:]):
+                steps = "  ".join(f"{step} {ms:.0f}" for step, ms in record['steps_ms'].items())
+                status = "OK" if record['ok'] else f"Erro: {record['error']}"
+                if record['detail']:
+                    status = f"{status} ({record['detail']})"
+                recent_tree.insert('', tk.END, values=(
+                    record['ts'].replace('T', ' '), record['op'], record['host'],
+                    f"{record['total_ms']:.0f}", steps,
+                    self.format_timing_counters(record['counters']), status
+                ), tags=() if record['ok'] else ('failed',))
+            if reschedule:
+                self.root.after(self.DIAGNOSTICS_REFRESH_MS, refresh)
+        
+        refresh()
+
     def center_window(self, window):
         """Centraliza qualquer janela na tela"""
         window.update_idletasks()
@@ -1331,28 +2309,98 @@ timeout /t 3 /nobreak >nul
         """Chamado quando um novo host é selecionado no combobox"""
         new_host = self.host_var.get()
         
-        # Se estiver conectado a um host diferente
+        # Se estiver conectado a um host diferente, devolver a conexão ao pool
         if self.client and self.current_host != new_host:
             self.disconnect()
-
-    def treeview_sort_column(self, tv, col, reverse):
-        """Ordena as colunas ao clicar no cabeçalho"""
-        l = [(tv.set(k, col), k) for k in tv.get_children('')]
         
+        # Se o host já possui conexão autenticada no pool, reconectar na hora
+        if not self.client and self.connection_pool.has(new_host, self.user_var.get(), self.get_port()):
+            self.connect()
+
+    def evict_idle_connections(self):
+        """Fecha periodicamente as conexões ociosas do pool"""
+        if not self.running:
+            return
         try:
-            # Ordenação numérica para PID e Idle
-            if col in ('pid', 'idle'):
-                # Converter para float, tratar valores vazios como 0
-                l.sort(key=lambda t: float(t[0]) if t[0].strip() else 0.0, reverse=reverse)
-            else:
-                l.sort(key=lambda t: t[0].lower(), reverse=reverse)
+            evicted = self.connection_pool.evict_idle()
+            if evicted:
+                logger.info(f"{evicted} conexão(ões) ociosa(s) removida(s) do pool")
+        except Exception as e:
+            logger.error(f"Erro ao limpar pool de conexões: {str(e)}")
+        self.root.after(30000, self.evict_idle_connections)
+
+    def get_port(self):
+        """Retorna a porta informada, usando 22 se inválida"""
+        try:
+            return int(self.port_var.get())
         except ValueError:
-            l.sort(reverse=reverse)
+            return 22
+
+    @staticmethod
+    def column_sort_key(col):
+        """Conversão do valor exibido na chave tipada de ordenação da coluna"""
+        if col == 'pid':
+            return lambda value: int(value) if str(value).isdigit() else -1
+        if col == 'idle':
+            return parse_cpu_time
+        if col == 'time':
+            # Tempo da frota ("1.23s"); pendentes (vazio) ficam em -1
+            return lambda value: parse_cpu_time(str(value).rstrip('s'))
+        return lambda value: str(value).lower()
 
-        for index, (val, k) in enumerate(l):
-            tv.move(k, '', index)
+    def treeview_sort_column(self, tv, col, reverse, extend=False):
+        """Ordena pela coluna clicada (repetir inverte; com Shift vira critério adicional)"""
+        if not isinstance(tv, VirtualTreeview):
+            key = self.column_sort_key(col)
+            l = [(tv.set(k, col), k) for k in tv.get_children('')]
+            l.sort(key=lambda t: key(t[0]), reverse=reverse)
+            tv.set_children('', *(k for val, k in l))
+            tv.heading(col, command=lambda: self.treeview_sort_column(tv, col, not reverse))
+            return
         
-        tv.heading(col, command=lambda: self.treeview_sort_column(tv, col, not reverse))
+        spec = list(tv.sort_spec)
+        columns = [c for c, _ in spec]
+        if extend and col in columns:
+            position = columns.index(col)
+            spec[position] = (col, not spec[position][1])
+        elif extend:
+            spec.append((col, reverse))
+        elif columns == [col]:
+            spec = [(col, not spec[0][1])]
+        else:
+            spec = [(col, reverse)]
+        
+        started = time.perf_counter()
+        tv.sort_by(spec, {c: self.column_sort_key(c) for c, _ in spec})
+        tv.get_children()  # aplica a ordenação agora, para medir
+        logger.info(f"Ordenação {spec}: {len(tv.get_children())} linhas em "
+                    f"{(time.perf_counter() - started) * 1000:.1f} ms")
+        self.update_sort_headings(tv)
+
+    def update_sort_headings(self, tv):
+        """Indica nos cabeçalhos a direção e a prioridade de cada coluna ordenada"""
+        spec = tv.sort_spec
+        for col in tv['columns']:
+            text = col.upper()
+            for position, (sorted_col, reverse) in enumerate(spec):
+                if sorted_col == col:
+                    text += " ▼" if reverse else " ▲"
+                    if len(spec) > 1:
+                        text += str(position + 1)
+            tv.heading(col, text=text)
+
+    def on_heading_shift_click(self, event):
+        """Shift+clique no cabeçalho adiciona a coluna como critério de ordenação"""
+        tv = event.widget
+        if tv.identify_region(event.x, event.y) != 'heading':
+            return None
+        column = tv.identify_column(event.x)
+        try:
+            col = tv['columns'][int(column.lstrip('#')) - 1]
+        except (ValueError, IndexError):
+            return None
+        self.treeview_sort_column(tv, col, False, extend=True)
+        return "break"
 
     def on_pid_select(self, event):
         """Adiciona PIDs selecionados ao campo de entrada"""
@@ -1387,51 +2435,83 @@ timeout /t 3 /nobreak >nul
 
     def apply_filters(self):
         """Aplica os filtros voláteis na lista de processos"""
-        # Obter valores dos filtros voláteis
+        self.cancel_live_filter()
+        # Com filtragem no servidor, a lista precisa ser obtida novamente
+        if self.client and (self.server_filter_var.get() or self.snapshot_volatile_filtered):
+            self.list_processes()
+            return
+        self.refilter_process_tree()
+
+    def filter_processes(self, processes):
+        """Retorna os processos que correspondem aos filtros voláteis"""
         user_filter = self.user_filter_var.get().lower().strip()
         pid_filter = self.pid_filter_var.get().strip()
         cmd_filter = self.cmd_filter_var.get().lower().strip()
         
-        # Limpar a treeview
-        for item in self.process_tree.get_children():
-            self.process_tree.delete(item)
+        # A lista completa usa o índice; lotes avulsos (streaming) são percorridos
+        if processes is self.all_processes:
+            return self.get_process_index().filter(user_filter, pid_filter, cmd_filter)
         
-        # Adicionar apenas processos que correspondem aos filtros voláteis
-        for proc in self.all_processes:
+        filtered = []
+        for proc in processes:
             user_match = not user_filter or user_filter in proc['user'].lower()
             pid_match = not pid_filter or pid_filter in proc['pid']
             cmd_match = not cmd_filter or cmd_filter in proc['command'].lower()
             
             if user_match and pid_match and cmd_match:
-                self.add_process_to_tree(proc)
+                filtered.append(proc)
+        return filtered
+
+    def get_process_index(self):
+        """Índice da lista atual de processos (reconstruído quando a lista muda)"""
+        index = self.process_index
+        if index is None or index.source is not self.all_processes:
+            index = self.process_index = ProcessIndex(self.all_processes)
+        return index
+
+    def schedule_live_filter(self, *args):
+        """Reagenda a filtragem a cada alteração dos filtros (debounce)"""
+        self.cancel_live_filter()
+        self.live_filter_job = self.root.after(self.LIVE_FILTER_DELAY_MS, self.live_filter)
+
+    def cancel_live_filter(self):
+        if self.live_filter_job is not None:
+            self.root.after_cancel(self.live_filter_job)
+            self.live_filter_job = None
+
+    def live_filter(self):
+        """Filtra a lista já carregada enquanto o operador digita"""
+        self.live_filter_job = None
+        # Filtros aplicados no servidor exigem nova listagem: só com Enter/botão
+        if self.server_filter_var.get() or self.snapshot_volatile_filtered:
+            return
+        self.refilter_process_tree()
+
+    def refilter_process_tree(self):
+        """Mostra a lista carregada com os filtros atuais (após a listagem em andamento)"""
+        if self.process_streaming:
+            self.process_filter_stale = True
+            return
+        self.populate_process_tree(self.filter_processes(self.all_processes))
 
     def clear_filters(self):
         """Limpa todos os filtros voláteis e mostra todos os processos"""
         self.user_filter_var.set("")
         self.pid_filter_var.set("")
         self.cmd_filter_var.set("")
+        self.cancel_live_filter()
         
-        # Limpar e recarregar todos os processos
-        for item in self.process_tree.get_children():
-            self.process_tree.delete(item)
+        # Lista obtida com filtros voláteis no servidor: buscar novamente
+        if self.client and self.snapshot_volatile_filtered:
+            self.list_processes()
+            return
         
-        for proc in self.all_processes:
-            self.add_process_to_tree(proc)
+        # Recarregar todos os processos
+        self.refilter_process_tree()
 
     def append_output(self, text):
-        """Adiciona texto ao terminal interativo"""
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END)
-        self.output_text.config(state=tk.DISABLED)
-        
-        # Se estivermos capturando a saída para matrícula, adicionar ao buffer
-        if self.capturing_matricula:
-            self.matricula_output += text
-        
-        # Se estivermos capturando a saída para tela, adicionar ao buffer
-        if self.capturing_tela:
-            self.tela_output += text
+        """Adiciona texto ao terminal interativo (seguro entre threads)"""
+        self.terminal_renderer.write(text)
 
     def append_result(self, text):
         """Adiciona texto à área de resultados de comandos"""
@@ -1450,40 +2530,56 @@ timeout /t 3 /nobreak >nul
         host = new_host
         user = self.user_var.get()
         password = self.password_var.get()
+        port = self.get_port()
         
-        try:
-            port = int(self.port_var.get())
-        except ValueError:
-            port = 22
-            
-        self.client = self.create_ssh_client(host, user, password, port)
+        # Já conectado a este mesmo destino
+        if self.client and self.current_pool_key == SSHConnectionPool.make_key(host, user, port):
+            return
+        if self.client:
+            self.disconnect()
+        
+        # Reutilizar conexão autenticada do pool, se disponível
+        self.client = self.connection_pool.get(host, user, port)
+        reused = self.client is not None
+        if not reused:
+            self.client = self.create_ssh_client(host, user, password, port)
+            if self.client:
+                self.connection_pool.put(host, user, port, self.client)
         
         if self.client:
             self.current_host = host
+            self.current_pool_key = SSHConnectionPool.make_key(host, user, port)
             self.start_interactive_shell()
             self.connect_btn.config(state=tk.DISABLED)
             self.disconnect_btn.config(state=tk.NORMAL)
             # Atualizar status da conexão
-            self.connection_status.set(f"Status: Conectado a {host}")
+            if reused:
+                self.connection_status.set(f"Status: Conectado a {host} (conexão reutilizada)")
+            else:
+                self.connection_status.set(f"Status: Conectado a {host}")
             # Listar processos automaticamente após conectar
             self.list_processes()
 
-    def disconnect(self):
-        """Fecha a conexão SSH com o servidor"""
+    def disconnect(self, keep_pooled=True):
+        """Fecha a sessão com o servidor, devolvendo a conexão ao pool (keep_pooled=False encerra)"""
         if self.client:
             try:
                 self.stop_interactive_session()
-                self.client.close()
+                if self.current_pool_key is None:
+                    self.client.close()
+                elif keep_pooled and SSHConnectionPool.is_alive(self.client):
+                    self.connection_pool.release(*self.current_pool_key, client=self.client)
+                else:
+                    self.connection_pool.discard(*self.current_pool_key, client=self.client)
             except Exception as e:
                 logger.error(f"Erro ao desconectar: {str(e)}")
             finally:
                 self.client = None
                 self.current_host = None
+                self.current_pool_key = None
                 self.connect_btn.config(state=tk.NORMAL)
                 self.disconnect_btn.config(state=tk.DISABLED)
-                self.output_text.config(state=tk.NORMAL)
-                self.output_text.insert(tk.END, "\n--- Conexão encerrada ---\n")
-                self.output_text.config(state=tk.DISABLED)
+                self.append_output("\n--- Conexão encerrada ---\n")
                 # Atualizar status da conexão
                 self.connection_status.set("Status: Desconectado")
         else:
@@ -1493,25 +2589,13 @@ timeout /t 3 /nobreak >nul
 
     def create_ssh_client(self, host, user, password, port=22):
         """Cria e retorna um cliente SSH conectado"""
-        client = paramiko.SSHClient()
-        
-        # Usar política personalizada que recebe a janela principal e a porta
-        client.set_missing_host_key_policy(InteractiveHostKeyPolicy(self.root, port))
-        
-        try:
-            client.load_system_host_keys()
-        except Exception:
-            logger.warning("Não foi possível carregar host keys do sistema")
-
         try:
-            client.connect(
-                hostname=host,
-                username=user,
-                password=password,
-                port=port,
-                timeout=10,
-                banner_timeout=20
-            )
+            # Usar política personalizada que recebe a janela principal e a porta
+            with self.timings.operation('connect', host) as timing:
+                client = open_ssh_client(
+                    host, user, password, port,
+                    policy=InteractiveHostKeyPolicy(self.root, port), timing=timing
+                )
             
             # Salvar host no histórico
             self.save_host_history(host)
@@ -1555,20 +2639,48 @@ timeout /t 3 /nobreak >nul
             self.disconnect()
 
     def receive_output(self):
-        """Recebe a saída do servidor e atualiza a interface"""
-        while self.running and not self.stop_receiver.is_set() and self.shell:
-            try:
-                if self.shell.recv_ready():
-                    data = self.shell.recv(4096).decode(errors='ignore')
-                    if data:
-                        self.root.after(0, self.append_output, data)
-                else:
-                    time.sleep(0.1)
-            except Exception as e:
-                if self.running:
-                    logger.error(f"Erro na recepção: {str(e)}")
-                    self.root.after(0, self.disconnect)
-                break
+        """Recebe a saída do servidor via seletor, com bloco de leitura adaptativo"""
+        shell = self.shell
+        if not shell:
+            return
+        stats = ChannelReadStats()
+        self.shell_read_stats = stats
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        chunk_size = self.MIN_READ_CHUNK
+        selector = selectors.DefaultSelector()
+        try:
+            selector.register(shell.fileno(), selectors.EVENT_READ)
+            while self.running and not self.stop_receiver.is_set() and self.shell is shell:
+                # Timeout apenas para reavaliar as flags de parada
+                if not selector.select(timeout=0.5):
+                    continue
+                ready_at = time.monotonic()
+                if not shell.recv_ready():
+                    if shell.closed or shell.eof_received or shell.exit_status_ready():
+                        break
+                    continue
+                raw = shell.recv(chunk_size)
+                if not raw:
+                    break
+                data = decoder.decode(raw)
+                if data:
+                    self.append_output(data)
+                    self.menu_expect.feed(data)
+                stats.record(len(raw), time.monotonic() - ready_at)
+                
+                # Ajustar o tamanho do próximo bloco
+                if len(raw) >= chunk_size:
+                    chunk_size = min(chunk_size * 2, self.MAX_READ_CHUNK)
+                elif len(raw) < chunk_size // 4:
+                    chunk_size = max(chunk_size // 2, self.MIN_READ_CHUNK)
+        except Exception as e:
+            if self.running and self.shell is shell:
+                logger.error(f"Erro na recepção: {str(e)}")
+                self.root.after(0, self.disconnect)
+        finally:
+            selector.close()
+            logger.info(f"Sessão interativa: {stats.summary()}")
+            logger.info(f"Renderização do terminal: {self.terminal_renderer.stats()}")
 
     def send_command(self, event=None):
         """Envia um comando para o servidor"""
@@ -1586,13 +2698,19 @@ timeout /t 3 /nobreak >nul
             return
             
         try:
-            self.shell.send(command + "\n")
+            self.send_to_shell(command + "\n")
             self.cmd_var.set("")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao enviar comando: {str(e)}")
             self.host_combo.focus_set()
             self.disconnect()
 
+    def send_to_shell(self, text):
+        """Envia texto à sessão interativa, marcando o envio para a latência de resposta"""
+        if self.shell_read_stats:
+            self.shell_read_stats.mark_sent()
+        self.shell.send(text)
+
     def stop_interactive_session(self):
         """Encerra a sessão interativa"""
         if self.shell:
@@ -1622,34 +2740,45 @@ timeout /t 3 /nobreak >nul
         self.result_text.delete("1.0", tk.END)
         self.result_text.config(state=tk.DISABLED)
         
+        # Limite de canais simultâneos: as sessões livres além do shell interativo
+        concurrency = 1
+        if self.concurrent_exec_var.get():
+            try:
+                concurrency = min(self.MAX_SESSIONS - 1, max(1, int(self.exec_concurrency_var.get())))
+            except ValueError:
+                concurrency = 4
+        
         threading.Thread(
             target=self._execute_commands, 
-            args=(commands,),
+            args=(commands, concurrency),
             daemon=True
         ).start()
 
-    def _execute_commands(self, commands):
-        """Executa comandos em segundo plano"""
+    def _execute_commands(self, commands, concurrency=1):
+        """Executa comandos em segundo plano (em paralelo com concurrency > 1, exibidos em ordem)"""
+        commands = [cmd for cmd in commands if cmd.strip()]
+        started = time.perf_counter()
         try:
-            for cmd in commands:
-                if not cmd.strip() or not self.running:
-                    continue
-                    
-                _, stdout, stderr = self.client.exec_command(cmd, timeout=30)
-                exit_status = stdout.channel.recv_exit_status()
-                
-                output = stdout.read().decode(errors='ignore').strip()
-                error = stderr.read().decode(errors='ignore').strip()
-                
-                result = f"\n$ {cmd}\n"
-                if output:
-                    result += output + "\n"
-                if error:
-                    result += f"ERRO: {error}\n"
-                if exit_status != 0:
-                    result += f"Comando falhou com status: {exit_status}\n"
-                
-                self.root.after(0, self.append_result, result)
+            with self.timings.operation('execute_commands', self.current_host or "") as timing:
+                timing.detail = f"{concurrency} canal(is)"
+                timing.count('commands', len(commands))
+                if concurrency <= 1:
+                    for cmd in commands:
+                        if not self.running:
+                            break
+                        self.root.after(0, self.append_result, self._run_batch_command(cmd, timing=timing)['text'])
+                else:
+                    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                        futures = [executor.submit(self._run_batch_command, cmd, timing=timing)
+                                   for cmd in commands]
+                        # Exibir na ordem original, assim que cada resultado estiver pronto
+                        for future in futures:
+                            self.root.after(0, self.append_result, future.result()['text'])
+            
+            elapsed = time.perf_counter() - started
+            self.root.after(0, self.append_result,
+                            f"\n--- {len(commands)} comando(s) em {elapsed:.2f}s "
+                            f"({concurrency} canal(is)) ---\n")
                 
         except paramiko.SSHException as e:
             self.root.after(0, messagebox.showerror, "Erro", f"Falha na execução: {str(e)}")
@@ -1658,6 +2787,39 @@ timeout /t 3 /nobreak >nul
             self.root.after(0, messagebox.showerror, "Erro", f"Erro inesperado: {str(e)}")
             self.root.after(0, self.disconnect)
 
+    def _run_batch_command(self, cmd, retries=5, client=None, timing=None):
+        """Executa um comando em um canal próprio e retorna {'text', 'ok', 'exit_status', 'error'}"""
+        if not self.running:
+            return {'text': "", 'ok': False, 'exit_status': None, 'error': "Aplicação encerrada"}
+        client = client or self.client
+        started = time.perf_counter()
+        for attempt in range(retries):
+            try:
+                _, stdout, stderr = ssh_core.exec_command_timed(client, cmd, 30, timing)
+                break
+            except paramiko.ChannelException as e:
+                # Servidor recusou o canal (limite MaxSessions): aguardar e tentar de novo
+                if attempt == retries - 1:
+                    error = f"canal recusado pelo servidor: {str(e)}"
+                    return {'text': f"\n$ {cmd}\nERRO: {error}\n", 'ok': False, 'exit_status': None,
+                            'error': error}
+                time.sleep(0.2 * (attempt + 1))
+        
+        output, error = ssh_core.read_command_output(stdout, stderr, timing)
+        output = output.decode(errors='ignore').strip()
+        error = error.decode(errors='ignore').strip()
+        exit_status = stdout.channel.recv_exit_status()
+        elapsed = time.perf_counter() - started
+        
+        result = f"\n$ {cmd}  ({elapsed:.2f}s)\n"
+        if output:
+            result += output + "\n"
+        if error:
+            result += f"ERRO: {error}\n"
+        if exit_status != 0:
+            result += f"Comando falhou com status: {exit_status}\n"
+        return {'text': result, 'ok': exit_status == 0, 'exit_status': exit_status, 'error': error}
+
     def list_processes(self):
         """Lista os processos do servidor"""
         if not self.client:
@@ -1666,74 +2828,527 @@ timeout /t 3 /nobreak >nul
             return
             
         # Limpar treeview
-        for item in self.process_tree.get_children():
-            self.process_tree.delete(item)
-            
-        threading.Thread(target=self._list_processes, daemon=True).start()
+        self.clear_process_tree()
+        self.process_streaming = True
+        self.process_status_var.set("Obtendo lista de processos...")
+        self.process_progress.config(mode='indeterminate')
+        self.process_progress.start(50)
+        self.process_stream_started = None
+        
+        self.process_refresh_running = True
+        threading.Thread(
+            target=self._list_processes,
+            args=(False,) + self.build_process_listing_command() + (self.process_populate_generation,),
+            daemon=True
+        ).start()
 
-    def _list_processes(self):
-        """Obtém a lista de processos em segundo plano"""
+    def build_process_listing_command(self):
+        """Retorna (comando, projetado, com_filtros_voláteis) para a listagem"""
+        if not self.server_filter_var.get():
+            return PS_AUX_COMMAND, False, False
+        
+        user_filter = self.user_filter_var.get().strip()
+        pid_filter = self.pid_filter_var.get().strip()
+        cmd_filter = self.cmd_filter_var.get().strip()
+        command = build_server_ps_command(
+            self.permanent_filter, user_filter, pid_filter, cmd_filter
+        )
+        return command, True, bool(user_filter or pid_filter or cmd_filter)
+
+    def refresh_processes(self):
+        """Atualiza a lista aplicando apenas as diferenças por PID"""
+        if not self.client:
+            messagebox.showerror("Erro", "Não conectado!")
+            self.host_combo.focus_set()
+            return
+        
+        # Sem tabela carregada ainda, a atualização equivale a uma listagem completa
+        if not self.all_processes:
+            self.list_processes()
+            return
+        
+        self.process_status_var.set("Atualizando lista de processos...")
+        self.process_refresh_running = True
+        threading.Thread(
+            target=self._list_processes,
+            args=(True,) + self.build_process_listing_command(),
+            daemon=True
+        ).start()
+
+    def toggle_auto_refresh(self):
+        """Liga/desliga a atualização automática da lista de processos"""
+        if self.auto_refresh_job is not None:
+            self.root.after_cancel(self.auto_refresh_job)
+            self.auto_refresh_job = None
+        if self.auto_refresh_var.get():
+            self.schedule_auto_refresh()
+
+    def schedule_auto_refresh(self):
+        """Agenda o próximo ciclo de atualização automática"""
         try:
-            # Comando para listar todos os processos
-            cmd = "ps aux"
-            _, stdout, stderr = self.client.exec_command(cmd, timeout=30)
+            interval = max(5, int(self.auto_refresh_interval_var.get()))
+        except ValueError:
+            interval = 30
+        self.auto_refresh_job = self.root.after(interval * 1000, self.auto_refresh_tick)
+
+    def auto_refresh_tick(self):
+        """Executa um ciclo de atualização automática"""
+        self.auto_refresh_job = None
+        if not self.running or not self.auto_refresh_var.get():
+            return
+        
+        if not self.client:
+            pass
+        elif self.process_refresh_running:
+            # Atualização anterior ainda em andamento: pular este ciclo
+            logger.info("Atualização automática ignorada: atualização anterior em andamento")
+        else:
+            self.refresh_processes()
+        
+        self.schedule_auto_refresh()
+
+    # ===== FUNÇÕES para a aba "Frota" =====
+    def load_fleet_history(self):
+        """Preenche a lista da frota com os hosts do histórico"""
+        hosts = sorted(set(self.host_history) | set(self.load_host_history()))
+        self.fleet_hosts_text.delete("1.0", tk.END)
+        self.fleet_hosts_text.insert(tk.END, "\n".join(h for h in hosts if h))
+
+    def load_fleet_group_file(self):
+        """Preenche a lista da frota a partir de um arquivo de grupo (um host por linha)"""
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Arquivo de grupo de hosts",
+            filetypes=[("Texto", "*.txt"), ("Todos os arquivos", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            with open(path, 'r') as f:
+                hosts = [line.split('#', 1)[0].strip() for line in f]
+        except Exception as e:
+            messagebox.showerror("Erro", f"Falha ao ler arquivo de grupo: {str(e)}")
+            return
+        self.fleet_hosts_text.delete("1.0", tk.END)
+        self.fleet_hosts_text.insert(tk.END, "\n".join(h for h in hosts if h))
+
+    def parse_fleet_hosts(self):
+        """Retorna a lista (host, porta) da frota, sem duplicatas"""
+        default_port = self.get_port()
+        hosts = []
+        for line in self.fleet_hosts_text.get("1.0", tk.END).splitlines():
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            host, _, port = line.partition(':')
+            try:
+                port = int(port) if port else default_port
+            except ValueError:
+                port = default_port
+            if (host, port) not in hosts:
+                hosts.append((host, port))
+        return hosts
+
+    def run_fleet(self):
+        """Executa a operação selecionada em todos os hosts da frota"""
+        hosts = self.parse_fleet_hosts()
+        if not hosts:
+            messagebox.showwarning("Aviso", "Nenhum host informado!")
+            return
+        
+        user = self.user_var.get()
+        password = self.password_var.get()
+        if not user or not password:
+            messagebox.showwarning("Aviso", "Informe usuário e senha na configuração de conexão!")
+            self.password_entry.focus_set()
+            return
+        
+        operation = self.fleet_operation_var.get()
+        commands = []
+        if operation == "commands":
+            commands = [c for c in self.commands_text.get("1.0", tk.END).splitlines() if c.strip()]
+            if not commands:
+                messagebox.showwarning("Aviso", "Nenhum comando na aba 'Executar Comandos'!")
+                return
+        
+        try:
+            workers = min(64, max(1, int(self.fleet_workers_var.get())))
+        except ValueError:
+            workers = 8
+        
+        # Preparar tabela com todos os hosts aguardando
+        children = self.fleet_tree.get_children()
+        if children:
+            self.fleet_tree.delete(*children)
+        self.fleet_details = {}
+        for host, port in hosts:
+            self.fleet_tree.insert('', tk.END, iid=f"{host}:{port}", values=(host, "Aguardando", "", ""))
+        
+        self.fleet_run_btn.config(state=tk.DISABLED)
+        self.fleet_status_var.set(f"Executando em {len(hosts)} host(s), {workers} por vez...")
+        
+        threading.Thread(
+            target=self._run_fleet,
+            args=(hosts, user, password, operation, commands, workers, self.permanent_matcher),
+            daemon=True
+        ).start()
+
+    def _run_fleet(self, hosts, user, password, operation, commands, workers, matcher):
+        """Distribui a operação da frota em um pool limitado de threads"""
+        started = time.perf_counter()
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self._run_fleet_host, host, port, user, password,
+                                    operation, commands, matcher)
+                    for host, port in hosts
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    self.root.after(0, self.update_fleet_row, result)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.root.after(0, self.finish_fleet, results, elapsed)
+
+    def _run_fleet_host(self, host, port, user, password, operation, commands, matcher):
+        """Executa a operação da frota em um único host"""
+        result = {'host': host, 'port': port, 'ok': False, 'summary': "", 'details': ""}
+        started = time.perf_counter()
+        client = None
+        timing = self.timings.start(f"fleet_{operation}", host)
+        try:
+            if not self.running:
+                raise RuntimeError("Aplicação encerrada")
+            
+            # Reaproveitar conexão do pool; hosts novos precisam ser confiados antes
+            client = self.connection_pool.get(host, user, port)
+            if client is None:
+                client = open_ssh_client(host, user, password, port, timing=timing)
+                self.connection_pool.put(host, user, port, client)
+            else:
+                timing.detail = "conexão reutilizada"
+            
+            if operation == "commands":
+                outputs = [self._run_batch_command(cmd, client=client, timing=timing) for cmd in commands]
+                failed = sum(1 for out in outputs if not out['ok'])
+                result['details'] = "".join(out['text'] for out in outputs)
+                result['summary'] = f"{len(commands)} comando(s), {failed} com erro"
+                result['ok'] = failed == 0
+            else:
+                processes, error = fetch_process_snapshot(client, matcher, timing=timing)
+                if error:
+                    raise RuntimeError(error)
+                by_user = {}
+                for proc in processes:
+                    by_user[proc['user']] = by_user.get(proc['user'], 0) + 1
+                top_users = sorted(by_user.items(), key=lambda item: item[1], reverse=True)[:5]
+                result['summary'] = f"{len(processes)} processo(s); " + ", ".join(
+                    f"{u}: {n}" for u, n in top_users
+                )
+                result['details'] = "\n".join(
+                    f"{p['user']:<10} {p['pid']:>7} {p['idle']:>8}  {p['command']}" for p in processes
+                )
+                result['ok'] = True
+        except paramiko.AuthenticationException:
+            result['summary'] = "Autenticação falhou"
+        except paramiko.SSHException as e:
+            # RejectPolicy: host ainda não confiado nesta máquina
+            result['summary'] = f"Erro SSH: {str(e)}"
+        except Exception as e:
+            result['summary'] = f"Erro: {str(e)}"
+        finally:
+            if client is not None:
+                self.connection_pool.release(host, user, port, client=client)
+            result['elapsed'] = time.perf_counter() - started
+            self.timings.finish(timing, error=None if result['ok'] else result['summary'])
+        return result
+
+    def update_fleet_row(self, result):
+        """Atualiza a linha de um host com o resultado da frota"""
+        iid = f"{result['host']}:{result['port']}"
+        self.fleet_details[iid] = result['details'] or result['summary']
+        if not self.fleet_tree.exists(iid):
+            return
+        self.fleet_tree.item(
+            iid,
+            values=(result['host'], "OK" if result['ok'] else "Falha",
+                    f"{result['elapsed']:.2f}s", result['summary']),
+            tags=() if result['ok'] else ('failed',)
+        )
+
+    def finish_fleet(self, results, elapsed):
+        """Exibe o resumo da execução na frota"""
+        self.fleet_run_btn.config(state=tk.NORMAL)
+        failures = sum(1 for r in results if not r['ok'])
+        slowest = max(results, key=lambda r: r['elapsed'], default=None)
+        total_serial = sum(r['elapsed'] for r in results)
+        summary = f"{len(results)} host(s) em {elapsed:.2f}s, {failures} falha(s)"
+        if slowest:
+            summary += (f"; mais lento: {slowest['host']} ({slowest['elapsed']:.2f}s); "
+                        f"soma sequencial: {total_serial:.2f}s")
+        self.fleet_status_var.set(summary)
+        logger.info(f"Frota: {summary}")
+
+    def on_fleet_select(self, event):
+        """Mostra a saída detalhada do host selecionado"""
+        selection = self.fleet_tree.selection()
+        if not selection:
+            return
+        self.fleet_detail_text.config(state=tk.NORMAL)
+        self.fleet_detail_text.delete("1.0", tk.END)
+        self.fleet_detail_text.insert(tk.END, self.fleet_details.get(selection[0], ""))
+        self.fleet_detail_text.config(state=tk.DISABLED)
+
+    def _list_processes(self, incremental=False, cmd=PS_AUX_COMMAND, projected=False,
+                        volatile_filtered=False, generation=None, timing=None):
+        """Obtém a lista de processos em segundo plano, enviando as linhas à tabela ao chegarem"""
+        if timing is None:
+            timing = self.timings.start(
+                'refresh_processes' if incremental else 'list_processes', self.current_host or ""
+            )
+        # Enquanto a conclusão não for entregue à interface, a saída é uma falha
+        delivered = False
+        try:
+            pending = []
+            last_post = time.perf_counter()
+            
+            def on_rows(rows):
+                # Entregar as linhas à tabela em lotes de no máximo ~100 ms
+                nonlocal pending, last_post
+                pending.extend(rows)
+                now = time.perf_counter()
+                if now - last_post >= 0.1:
+                    self.root.after(0, self.append_process_rows, generation, pending, timing)
+                    pending = []
+                    last_post = now
+            
+            processes, error = stream_process_snapshot(
+                self.client, self.permanent_matcher, cmd, projected,
+                on_rows=None if incremental else on_rows, read_chunk=self.SNAPSHOT_READ_CHUNK,
+                timing=timing
+            )
             
-            output = stdout.read().decode(errors='ignore').strip()
-            error = stderr.read().decode(errors='ignore').strip()
+            if error and projected and not processes:
+                # Servidor sem suporte ao 'ps' projetado: voltar ao 'ps aux'
+                logger.warning(f"Filtragem no servidor indisponível ({error}); usando ps aux")
+                timing.detail = "ps aux (sem filtragem no servidor)"
+                delivered = True
+                self._list_processes(incremental, generation=generation, timing=timing)
+                return
             
             if error:
+                self.timings.finish(timing, error=error)
                 self.root.after(0, messagebox.showerror, "Erro", f"Erro ao listar processos: {error}")
                 return
-                
-            # Processar saída
-            processes = []
-            for line in output.split('\n')[1:]:  # Ignorar cabeçalho
-                if line.strip():
-                    parts = line.split(maxsplit=10)
-                    if len(parts) >= 11:
-                        user = parts[0]
-                        pid = parts[1]
-                        command = parts[10]
-                        
-                        # Aplicar filtro permanente
-                        skip = False
-                        
-                        # Verificar usuários bloqueados
-                        for blocked_user in self.permanent_filter['users']:
-                            # Verificação mais precisa usando regex
-                            if re.match(rf'^{blocked_user}(\+)?$', user, re.IGNORECASE):
-                                skip = True
-                                break
-                        
-                        # Verificar comandos bloqueados
-                        if not skip and self.permanent_filter['commands']:
-                            for blocked_cmd in self.permanent_filter['commands']:
-                                if blocked_cmd.lower() in command.lower():
-                                    skip = True
-                                    break
-                        
-                        if not skip:
-                            processes.append({
-                                'user': user,
-                                'pid': pid,
-                                'idle': parts[9],  # %CPU
-                                'command': command
-                            })
             
             # Armazenar todos os processos (já pré-filtrados)
+            previous = self.all_processes
+            with timing.step('index'):
+                self.process_index = ProcessIndex(processes)
             self.all_processes = processes
+            self.snapshot_volatile_filtered = volatile_filtered
             
-            # Adicionar à treeview
-            for proc in self.all_processes:
-                self.root.after(0, self.add_process_to_tree, proc)
+            if incremental:
+                # Aplicar somente as diferenças em relação à lista anterior
+                self.root.after(0, self.apply_process_diff, previous, processes, timing)
+            else:
+                if pending:
+                    self.root.after(0, self.append_process_rows, generation, pending, timing)
+                self.root.after(0, self.finish_process_stream, generation, len(processes), timing)
+            delivered = True
                 
         except Exception as e:
+            self.timings.finish(timing, error=f"{type(e).__name__}: {e}")
             self.root.after(0, messagebox.showerror, "Erro", f"Falha ao listar processos: {str(e)}")
             self.root.after(0, self.disconnect)
+        finally:
+            self.process_refresh_running = False
+            if not delivered:
+                self.root.after(0, self.reset_process_progress, generation)
+
+    def reset_process_progress(self, generation=None):
+        """Para a barra de progresso de uma listagem que terminou sem concluir"""
+        if generation is not None and generation != self.process_populate_generation:
+            return
+        self.process_streaming = self.process_filter_stale = False
+        self.process_progress.stop()
+        self.process_progress.config(mode='determinate', value=0)
+
+    def append_process_rows(self, generation, rows, timing=None):
+        """Filtra um lote de linhas recebido durante a listagem e o enfileira para inserção"""
+        if generation != self.process_populate_generation:
+            return
+        if self.process_stream_started is None:
+            self.process_stream_started = time.perf_counter()
+        with (timing or ssh_core.NULL_TIMING).step('filter'):
+            self.process_insert_queue.extend(self.filter_processes(rows))
+        if not self.process_insert_scheduled:
+            self.process_insert_scheduled = True
+            self._insert_queued_process_rows(generation, timing)
+
+    def _insert_queued_process_rows(self, generation, timing=None):
+        """Insere um bloco da fila da listagem e agenda o próximo, cedendo a interface"""
+        # Uma listagem mais recente limpou a fila e assumiu o agendamento
+        if generation != self.process_populate_generation or not self.running:
+            return
+        queue = self.process_insert_queue
+        with (timing or ssh_core.NULL_TIMING).step('render'):
+            for _ in range(min(self.PROCESS_INSERT_CHUNK, len(queue))):
+                self.add_process_to_tree(queue.popleft())
+                self.process_rows_inserted += 1
+        self.process_status_var.set(f"Recebendo processos... {self.process_rows_inserted} linhas")
+        if queue:
+            self.root.after(1, self._insert_queued_process_rows, generation, timing)
+        else:
+            self.process_insert_scheduled = False
+
+    def finish_process_stream(self, generation, total, timing=None):
+        """Conclui a listagem progressiva, exibindo a taxa de inserção"""
+        if generation != self.process_populate_generation:
+            if timing is not None:
+                timing.detail = "substituída por listagem mais recente"
+                self.timings.finish(timing)
+            return
+        if self.process_insert_scheduled:
+            # Ainda há blocos na fila: concluir depois deles
+            self.root.after(1, self.finish_process_stream, generation, total, timing)
+            return
+        self.process_progress.stop()
+        self.process_progress.config(mode='determinate', maximum=1, value=1)
+        
+        started = self.process_stream_started or time.perf_counter()
+        elapsed = time.perf_counter() - started
+        shown = len(self.process_tree.get_children())
+        rate = shown / elapsed if elapsed > 0 else 0
+        self.process_status_var.set(
+            f"{total} processos recebidos, {shown} exibidos em {elapsed:.2f}s ({rate:.0f} linhas/s)"
+        )
+        logger.info(f"Tabela de processos (streaming): {shown} linhas em {elapsed:.3f}s ({rate:.0f} linhas/s)")
+        if timing is not None:
+            timing.count('shown', shown)
+            self.timings.finish(timing)
+        
+        # Filtros digitados durante a listagem valem para a lista nova
+        self.process_streaming = False
+        if self.process_filter_stale:
+            self.process_filter_stale = False
+            if not (self.server_filter_var.get() or self.snapshot_volatile_filtered):
+                self.refilter_process_tree()
+
+    def apply_process_diff(self, previous, processes, timing=None):
+        """Atualiza a tabela inserindo/removendo/alterando apenas as linhas modificadas"""
+        started = time.perf_counter()
+        old_by_pid = {proc['pid']: proc for proc in previous}
+        new_by_pid = {proc['pid']: proc for proc in processes}
+        highlight = self.highlight_changes_var.get()
+        
+        # Remover destaques do ciclo anterior
+        for item in self.process_tree.tag_has('new'):
+            self.process_tree.item(item, tags=())
+        
+        filter_started = time.perf_counter()
+        visible = self.filter_processes(processes)
+        filter_elapsed = time.perf_counter() - filter_started
+        visible_pids = {proc['pid'] for proc in visible}
+        current_items = set(self.process_tree.get_children())
+        
+        # Linhas marcadas como encerradas que voltaram a aparecer
+        for iid in self.process_tree.tag_has('gone'):
+            if iid in visible_pids:
+                self.process_tree.item(iid, tags=())
+        
+        # Processos que sumiram (ou não passam mais nos filtros)
+        gone = [iid for iid in current_items if iid not in visible_pids]
+        if highlight:
+            for iid in gone:
+                self.process_tree.item(iid, tags=('gone',))
+            self.root.after(3000, self._remove_gone_rows, gone)
+        elif gone:
+            self.process_tree.delete(*gone)
+        
+        added = updated = 0
+        for proc in visible:
+            pid = proc['pid']
+            if pid not in current_items:
+                self.add_process_to_tree(proc, tags=('new',) if highlight else ())
+                added += 1
+            elif old_by_pid.get(pid) != proc:
+                self.process_tree.item(pid, values=(
+                    proc['user'], proc['pid'], proc['idle'], proc['command']
+                ))
+                updated += 1
+        
+        started_count = len(new_by_pid.keys() - old_by_pid.keys())
+        ended_count = len(old_by_pid.keys() - new_by_pid.keys())
+        self.process_status_var.set(
+            f"Atualizado às {time.strftime('%H:%M:%S')}: {len(processes)} processos "
+            f"(+{started_count} novos, -{ended_count} encerrados; "
+            f"{added} inseridas, {len(gone)} removidas, {updated} alteradas na tabela)"
+        )
+        if timing is not None:
+            timing.add('filter', filter_elapsed)
+            timing.add('render', time.perf_counter() - started - filter_elapsed)
+            timing.count('changed', added + len(gone) + updated)
+            self.timings.finish(timing)
+
+    def _remove_gone_rows(self, items):
+        """Remove linhas destacadas como encerradas que continuam ausentes"""
+        for iid in items:
+            if self.process_tree.exists(iid) and 'gone' in self.process_tree.item(iid, 'tags'):
+                self.process_tree.delete(iid)
     
-    def add_process_to_tree(self, proc):
-        """Adiciona um processo à treeview de forma segura"""
-        self.process_tree.insert('', tk.END, values=(
+    def clear_process_tree(self):
+        """Remove todas as linhas da tabela e cancela preenchimentos pendentes"""
+        self.process_populate_generation += 1
+        self.process_streaming = self.process_filter_stale = False
+        self.process_insert_queue.clear()
+        self.process_insert_scheduled = False
+        self.process_rows_inserted = 0
+        children = self.process_tree.get_children()
+        if children:
+            self.process_tree.delete(*children)
+        self.process_progress.stop()
+        self.process_progress.config(mode='determinate', value=0)
+
+    def populate_process_tree(self, processes):
+        """Preenche a tabela de processos em blocos, cedendo a interface entre eles"""
+        self.clear_process_tree()
+        generation = self.process_populate_generation
+        total = len(processes)
+        self.process_progress['maximum'] = max(total, 1)
+        self._insert_process_chunk(generation, processes, 0, time.perf_counter())
+
+    def _insert_process_chunk(self, generation, processes, start, started):
+        """Insere um bloco de linhas e agenda o próximo"""
+        # Uma listagem ou filtro mais recente substituiu este preenchimento
+        if generation != self.process_populate_generation or not self.running:
+            return
+        
+        total = len(processes)
+        end = min(start + self.PROCESS_INSERT_CHUNK, total)
+        for proc in processes[start:end]:
+            self.add_process_to_tree(proc)
+        self.process_progress['value'] = end
+        
+        if end < total:
+            self.process_status_var.set(f"Carregando processos... {end}/{total}")
+            self.root.after(1, self._insert_process_chunk, generation, processes, end, started)
+            return
+        
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed > 0 else 0
+        self.process_status_var.set(
+            f"{total} processos carregados em {elapsed:.2f}s ({rate:.0f} linhas/s)"
+        )
+        logger.info(f"Tabela de processos: {total} linhas em {elapsed:.3f}s ({rate:.0f} linhas/s)")
+
+    def add_process_to_tree(self, proc, tags=()):
+        """Adiciona um processo à treeview de forma segura (identificado pelo PID)"""
+        if self.process_tree.exists(proc['pid']):
+            return
+        self.process_tree.insert('', tk.END, iid=proc['pid'], tags=tags, values=(
             proc['user'], 
             proc['pid'], 
             proc['idle'], 
@@ -1764,12 +3379,57 @@ timeout /t 3 /nobreak >nul
             messagebox.showwarning("Aviso", "Nenhum PID válido encontrado!")
             return
             
+        self.start_kill(pids)
+
+    def run_shell_menu_flow(self, flow, **params):
+        """Conduz um fluxo do menu na sessão interativa e retorna os desfechos dos passos"""
+        with self.menu_lock:
+            self.menu_expect.begin()
+            try:
+                outcomes = run_menu_flow(
+                    self.menu_expect,
+                    self.send_to_shell,
+                    flow,
+                    params,
+                    self.menu_prompts,
+                    is_running=lambda: self.running,
+                    on_step=lambda value: self.append_output(f">>> Enviando: {value}\n")
+                )
+            finally:
+                self.menu_expect.end()
+        logger.info(f"Menu '{flow}': {outcomes}")
+        return outcomes
+
+    def add_kill_options(self, parent):
+        """Adiciona os controles das opções de derrubada (variáveis compartilhadas)"""
+        ttk.Checkbutton(parent, text="Kill direto (sem menu)",
+                        variable=self.kill_direct_var).pack(side=tk.LEFT, padx=(10,2))
+        ttk.Checkbutton(parent, text="KILL após (s):",
+                        variable=self.kill_escalate_var).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Spinbox(parent, from_=1, to=60, width=4,
+                    textvariable=self.kill_escalate_timeout_var).pack(side=tk.LEFT, padx=2)
+
+    def start_kill(self, pids):
+        """Confirma e inicia a derrubada dos PIDs com as opções escolhidas"""
+        # Valores da tabela podem voltar do Tk como números
+        pids = [str(pid) for pid in pids]
+        direct = self.kill_direct_var.get()
+        escalate_after = None
+        if self.kill_escalate_var.get():
+            try:
+                escalate_after = max(1, int(self.kill_escalate_timeout_var.get()))
+            except ValueError:
+                escalate_after = 5
+        
         # Confirmar ação
+        method = "kill direto no servidor" if direct else "o menu interativo do sistema"
         confirm_message = (
             f"Tem certeza que deseja derrubar {len(pids)} processo(s)?\n\n"
-            f"PIDs: {', '.join(pids)}\n\n"
-            "Esta operação usará o menu interativo do sistema."
+            f"PIDs: {', '.join(pids[:50])}{' ...' if len(pids) > 50 else ''}\n\n"
+            f"Esta operação usará {method}."
         )
+        if escalate_after is not None:
+            confirm_message += f"\nProcessos ativos após {escalate_after} s receberão KILL."
         
         confirm = messagebox.askyesno("Confirmar Operação", confirm_message)
         
@@ -1777,42 +3437,170 @@ timeout /t 3 /nobreak >nul
             return
             
         # Verificar se a sessão interativa está ativa
-        if not self.shell:
+        if not direct and not self.shell:
             messagebox.showerror("Erro", "Sessão interativa não está ativa!")
             self.host_combo.focus_set()
             return
             
         threading.Thread(
             target=self._kill_pids_interactive, 
-            args=(pids,),
+            args=(pids, direct, escalate_after, self.current_pool_key),
             daemon=True
         ).start()
 
-    def _kill_pids_interactive(self, pids):
-        """Executa o fluxo interativo para derrubar PIDs"""
+    def _kill_pids_interactive(self, pids, direct=False, escalate_after=None, session=None):
+        """Derruba os PIDs (pelo menu ou kill direto) e mostra o resultado de cada um"""
         try:
-            # Construir sequência de comandos
-            pids_str = " ".join(pids)
-            sequence = [
-                "3",               # Selecionar opção 3
-                pids_str,          # Inserir PIDs
-                ""                 # Enter final
-            ]
-            
-            # Enviar sequência
-            for cmd in sequence:
-                if not self.running:
-                    return
-                self.root.after(0, self.append_output, f">>> Enviando: {cmd}\n")
-                self.shell.send(cmd + "\n")
-                time.sleep(0.5)
+            # Resultados em cache com esses PIDs deixam de valer
+            self.query_cache.invalidate_pids(session, pids)
+            with self.timings.operation('kill', self.current_host or "") as timing:
+                timing.detail = "kill direto" if direct else "menu"
+                results = ssh_core.kill_pids(
+                    self.client, pids, direct=direct, escalate_after=escalate_after,
+                    chunk_size=int(self.admin_config.get('kill_chunk_size', 500)),
+                    menu_chunk_size=int(self.admin_config.get('kill_menu_chunk_size', 50)),
+                    # O menu é conduzido na sessão interativa, visível no terminal
+                    menu_runner=lambda chunk: self.run_shell_menu_flow('derrubar', pids=" ".join(chunk)),
+                    is_running=lambda: self.running, timing=timing
+                )
             
-            self.root.after(0, self.append_output, "\nComandos enviados. Verifique o terminal.\n")
+            summary = summarize_kill_results(results)
+            logger.info(f"Derrubada de {len(results)} PID(s): {summary}")
+            self.append_output(f"\nDerrubada concluída: {summary}\n")
+            self.root.after(0, self.show_kill_results, results, summary)
+            
+            # Tabelas atualizadas no lugar, sem nova listagem completa
+            ended = [pid for pid, status in results.items() if status in ('killed', 'killed_force', 'gone')]
+            if ended:
+                self.root.after(0, self.mark_pids_gone, ended)
+            pending = [pid for pid, status in results.items() if status == 'alive']
+            if pending:
+                self.verify_kills(pending)
             
         except Exception as e:
             self.root.after(0, messagebox.showerror, "Erro", f"Erro ao derrubar processos: {str(e)}")
             self.root.after(0, self.disconnect)
+
+    def verify_kills(self, pids):
+        """Acompanha os PIDs ainda ativos, atualizando as tabelas à medida que terminam"""
+        timeout = float(self.admin_config.get('kill_verify_timeout', 30))
+        
+        def on_gone(ended):
+            self.append_output(f"Encerrados após verificação: {' '.join(ended)}\n")
+            self.root.after(0, self.mark_pids_gone, ended)
+        
+        with self.timings.operation('verify_kills', self.current_host or "") as timing:
+            timing.count('pids', len(pids))
+            pending = ssh_core.verify_kills(
+                self.client, pids, timeout, on_gone=on_gone,
+                is_running=lambda: self.running and self.client is not None, timing=timing
+            )
+            timing.detail = f"{len(pending)} ainda ativo(s)"
+        if pending:
+            logger.warning(f"PIDs ainda ativos após {timeout:.0f} s: {' '.join(pending)}")
+            self.append_output(f"Ainda ativos após {timeout:.0f} s: {' '.join(pending)}\n")
+            self.root.after(0, self.mark_pids_surviving, pending)
+
+    def _rows_with_pids(self, tree, pids):
+        """Retorna as linhas de uma tabela de resultados cujo PID está em pids"""
+        return [item for item in tree.get_children()
+                if len(tree.item(item, 'values')) >= 2 and str(tree.item(item, 'values')[1]) in pids]
+
+    def mark_pids_gone(self, pids):
+        """Retira das tabelas os processos confirmados como encerrados"""
+        pids = set(pids)
+        self.all_processes = [proc for proc in self.all_processes if proc['pid'] not in pids]
+        
+        # Na lista de processos, o mesmo destaque da atualização automática
+        gone = [pid for pid in pids if self.process_tree.exists(pid)]
+        for iid in gone:
+            self.process_tree.item(iid, tags=('gone',))
+        if gone:
+            self.root.after(3000, self._remove_gone_rows, gone)
+        
+        for kind, tree in (('matricula', self.result_tree), ('tela', self.tela_tree)):
+            items = self._rows_with_pids(tree, pids)
+            for item in items:
+                self.query_rows_seen[kind].discard(tuple(str(v) for v in tree.item(item, 'values')))
+            if items:
+                tree.delete(*items)
+
+    def mark_pids_surviving(self, pids):
+        """Destaca nas tabelas os processos que continuam ativos após a derrubada"""
+        pids = set(pids)
+        for pid in pids:
+            if self.process_tree.exists(pid):
+                self.process_tree.item(pid, tags=('kill_failed',))
+        for tree in (self.result_tree, self.tela_tree):
+            for item in self._rows_with_pids(tree, pids):
+                tree.item(item, tags=('kill_failed',))
+
+    def show_kill_results(self, results, summary):
+        """Mostra a tabela com o resultado de cada PID derrubado"""
+        top = tk.Toplevel(self.root)
+        top.title("Resultado da Derrubada")
+        top.geometry("420x400")
+        top.transient(self.root)
+        
+        ttk.Label(top, text=summary, wraplength=400).pack(fill=tk.X, padx=10, pady=(10,5))
+        
+        tree_frame = ttk.Frame(top)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        tree = ttk.Treeview(tree_frame, columns=('PID', 'Resultado'), show='headings')
+        tree.heading('PID', text='PID')
+        tree.heading('Resultado', text='Resultado')
+        tree.column('PID', width=100, anchor=tk.CENTER)
+        tree.column('Resultado', width=250)
+        
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        
+        for pid, status in results.items():
+            tree.insert('', tk.END, values=(pid, KILL_STATUS_LABELS.get(status, status)))
+        
+        ttk.Button(top, text="Fechar", command=top.destroy).pack(pady=(0,10))
     
+    def lookup_locks(self, path, patterns, direct, on_rows, session, timing=None):
+        """Consulta os processos com arquivos abertos em path/*padrão (ver ssh_core.lookup_locks)"""
+        return ssh_core.lookup_locks(
+            self.client, path, patterns, self.menu_prompts, direct=direct, on_rows=on_rows,
+            cache=self.query_cache, session=session,
+            is_running=lambda: self.running, max_parallel=self.MAX_PARALLEL_QUERIES, timing=timing
+        )
+
+    def make_query_rows_callback(self, kind, query_id, timing=None):
+        """Cria o callback que envia lotes de linhas de uma consulta à tabela"""
+        def on_rows(rows):
+            self.root.after(0, self.append_query_rows, kind, query_id, rows, timing)
+        return on_rows
+
+    def append_query_rows(self, kind, query_id, rows, timing=None):
+        """Insere progressivamente as linhas de uma consulta em andamento"""
+        if kind == 'matricula':
+            tree, status_var, current_id = self.result_tree, self.matricula_status_var, self.matricula_query_id
+        else:
+            tree, status_var, current_id = self.tela_tree, self.tela_status_var, self.tela_query_id
+        if query_id != current_id:
+            return
+        
+        # Consultas paralelas podem retornar o mesmo processo
+        seen = self.query_rows_seen[kind]
+        with (timing or ssh_core.NULL_TIMING).step('render'):
+            for row in rows:
+                if row not in seen:
+                    seen.add(row)
+                    tree.insert('', tk.END, values=row)
+        status_var.set(f"Recebendo resultados... {len(seen)} processos")
+
+    @staticmethod
+    def split_query_patterns(text):
+        """Separa vários valores de consulta (espaço ou vírgula); vazio consulta tudo"""
+        patterns = [p for p in re.split(r'[,\s]+', text) if p]
+        return list(dict.fromkeys(patterns)) or [""]
+
     def consultar_matricula(self):
         """Consulta processos por matrícula"""
         if not self.client:
@@ -1831,41 +3619,33 @@ timeout /t 3 /nobreak >nul
         self.clear_matricula_results()
         self.matricula_pids_var.set("")  # Limpar campo de PIDs
         
-        # Iniciar captura de saída
-        self.capturing_matricula = True
-        self.matricula_output = ""
+        # Consultas mais recentes descartam o resultado das anteriores
+        self.matricula_query_id += 1
         
         threading.Thread(
             target=self._consultar_matricula, 
-            args=(matricula,),
+            args=(matricula, self.matricula_query_id, self.direct_query_var.get(), self.current_pool_key),
             daemon=True
         ).start()
 
-    def _consultar_matricula(self, matricula):
-        """Executa o fluxo interativo para consultar por matrícula"""
+    def _consultar_matricula(self, matricula, query_id, direct=False, session=None):
+        """Executa a consulta por matrícula (direta ou pelo menu)"""
+        timing = self.timings.start('query_matricula', self.current_host or "")
         try:
-            # Enviar comandos
-            sequence = [
-                "2",               # Selecionar opção 2
-                "/d/work",         # Informar caminho
-                f"*{matricula}",   # Padrão de pesquisa
-                ""                 # Enter final
-            ]
-            
-            for cmd in sequence:
-                if not self.running:
-                    return
-                self.root.after(0, self.append_output, f">>> Enviando: {cmd}\n")
-                self.shell.send(cmd + "\n")
-                time.sleep(1)
-            
-            time.sleep(2)
-            self.capturing_matricula = False
-            
-            self.root.after(0, self.process_matricula_output, matricula)
+            # Arquivos em /d/work; no menu, um canal por valor informado
+            source = self.lookup_locks(
+                "/d/work", self.split_query_patterns(matricula), direct,
+                self.make_query_rows_callback('matricula', query_id, timing), session, timing
+            )
+            timing.detail = source or ""
+            if not self.running or query_id != self.matricula_query_id:
+                self.timings.finish(timing)
+                return
+            
+            self.root.after(0, self.process_matricula_output, matricula, source, query_id, timing)
             
         except Exception as e:
-            self.capturing_matricula = False
+            self.timings.finish(timing, error=f"{type(e).__name__}: {e}")
             self.root.after(0, messagebox.showerror, "Erro", f"Erro ao consultar matrícula: {str(e)}")
             self.root.after(0, self.matricula_status_var.set, 
                           f"Erro na operação: {str(e)}")
@@ -1873,28 +3653,30 @@ timeout /t 3 /nobreak >nul
 
     def clear_matricula_results(self):
         """Limpa os resultados anteriores da consulta de matrícula"""
-        for item in self.result_tree.get_children():
-            self.result_tree.delete(item)
+        self.result_tree.delete(*self.result_tree.get_children())
+        self.query_rows_seen['matricula'].clear()
 
-    def process_matricula_output(self, matricula):
-        """Processa a saída capturada para extrair os resultados da matrícula"""
+    def process_matricula_output(self, matricula, source="menu", query_id=None, timing=None):
+        """Conclui a consulta da matrícula; as linhas já foram inseridas durante o recebimento"""
         try:
-            # Padrão regex para encontrar linhas com USER, PID e NAME
-            pattern = r'^(\S+)\s+(\d+)\s+(\S.*)$'
-            
-            matches = re.findall(pattern, self.matricula_output, re.MULTILINE)
+            if query_id is not None and query_id != self.matricula_query_id:
+                return
             
-            if not matches:
+            found = len(self.query_rows_seen['matricula'])
+            if not found:
                 self.matricula_status_var.set(f"Nenhum processo encontrado para {matricula}")
                 return
             
-            for match in matches:
-                self.result_tree.insert('', tk.END, values=match)
-            
-            self.matricula_status_var.set(f"Consulta concluída: {len(matches)} processos encontrados")
+            self.matricula_status_var.set(
+                f"Consulta concluída: {found} processos encontrados ({source})"
+            )
             
         except Exception as e:
             self.matricula_status_var.set(f"Erro ao processar resultados: {str(e)}")
+        finally:
+            if timing is not None:
+                timing.count('rows', len(self.query_rows_seen['matricula']))
+                self.timings.finish(timing)
     
     def derrubar_pid_selecionado(self):
         """Derruba os PIDs selecionados na tabela de resultados da matrícula"""
@@ -1920,29 +3702,7 @@ timeout /t 3 /nobreak >nul
             messagebox.showwarning("Aviso", "Nenhum PID válido selecionado!")
             return
             
-        # Confirmar ação
-        confirm_message = (
-            f"Tem certeza que deseja derrubar {len(pids)} processo(s)?\n\n"
-            f"PIDs: {', '.join(pids)}\n\n"
-            "Esta operação usará o menu interativo do sistema."
-        )
-        
-        confirm = messagebox.askyesno("Confirmar Operação", confirm_message)
-        
-        if not confirm:
-            return
-            
-        # Verificar se a sessão interativa está ativa
-        if not self.shell:
-            messagebox.showerror("Erro", "Sessão interativa não está ativa!")
-            self.host_combo.focus_set()
-            return
-            
-        threading.Thread(
-            target=self._kill_pids_interactive, 
-            args=(pids,),
-            daemon=True
-        ).start()
+        self.start_kill(pids)
     
     # ===== FUNÇÕES para a aba "Consultar Tela" =====
     def consultar_tela(self):
@@ -1963,41 +3723,34 @@ timeout /t 3 /nobreak >nul
         self.clear_tela_results()
         self.tela_pids_var.set("")  # Limpar campo de PIDs
         
-        # Iniciar captura de saída
-        self.capturing_tela = True
-        self.tela_output = ""
+        # Consultas mais recentes descartam o resultado das anteriores
+        self.tela_query_id += 1
         
         threading.Thread(
             target=self._consultar_tela, 
-            args=(tela,),
+            args=(tela, self.tela_query_id, self.direct_query_var.get(), self.current_pool_key),
             daemon=True
         ).start()
 
-    def _consultar_tela(self, tela):
-        """Executa o fluxo interativo para consultar por tela"""
+    def _consultar_tela(self, tela, query_id, direct=False, session=None):
+        """Executa a consulta por tela (direta ou pelo menu)"""
+        timing = self.timings.start('query_tela', self.current_host or "")
         try:
-            # Enviar comandos com caminho alterado para /d/dados
-            sequence = [
-                "2",               # Selecionar opção 2
-                "/d/dados",        # Informar caminho (ALTERADO)
-                f"*{tela}",        # Padrão de pesquisa
-                ""                 # Enter final
-            ]
-            
-            for cmd in sequence:
-                if not self.running:
-                    return
-                self.root.after(0, self.append_output, f">>> Enviando: {cmd}\n")
-                self.shell.send(cmd + "\n")
-                time.sleep(1)
-            
-            time.sleep(2)
-            self.capturing_tela = False
-            
-            self.root.after(0, self.process_tela_output, tela)
+            # Arquivos em /d/dados; no menu, um canal por valor informado
+            patterns = [p if p != "*" else "" for p in self.split_query_patterns(tela)]
+            source = self.lookup_locks(
+                "/d/dados", list(dict.fromkeys(patterns)), direct,
+                self.make_query_rows_callback('tela', query_id, timing), session, timing
+            )
+            timing.detail = source or ""
+            if not self.running or query_id != self.tela_query_id:
+                self.timings.finish(timing)
+                return
+            
+            self.root.after(0, self.process_tela_output, tela, source, query_id, timing)
             
         except Exception as e:
-            self.capturing_tela = False
+            self.timings.finish(timing, error=f"{type(e).__name__}: {e}")
             self.root.after(0, messagebox.showerror, "Erro", f"Erro ao consultar tela: {str(e)}")
             self.root.after(0, self.tela_status_var.set, 
                           f"Erro na operação: {str(e)}")
@@ -2005,28 +3758,30 @@ timeout /t 3 /nobreak >nul
 
     def clear_tela_results(self):
         """Limpa os resultados anteriores da consulta de tela"""
-        for item in self.tela_tree.get_children():
-            self.tela_tree.delete(item)
+        self.tela_tree.delete(*self.tela_tree.get_children())
+        self.query_rows_seen['tela'].clear()
 
-    def process_tela_output(self, tela):
-        """Processa a saída capturada para extrair os resultados da tela"""
+    def process_tela_output(self, tela, source="menu", query_id=None, timing=None):
+        """Conclui a consulta da tela; as linhas já foram inseridas durante o recebimento"""
         try:
-            # Padrão regex para encontrar linhas com USER, PID e NAME
-            pattern = r'^(\S+)\s+(\d+)\s+(\S.*)$'
-            
-            matches = re.findall(pattern, self.tela_output, re.MULTILINE)
+            if query_id is not None and query_id != self.tela_query_id:
+                return
             
-            if not matches:
+            found = len(self.query_rows_seen['tela'])
+            if not found:
                 self.tela_status_var.set(f"Nenhum processo encontrado para {tela}")
                 return
             
-            for match in matches:
-                self.tela_tree.insert('', tk.END, values=match)
-            
-            self.tela_status_var.set(f"Consulta concluída: {len(matches)} processos encontrados")
+            self.tela_status_var.set(
+                f"Consulta concluída: {found} processos encontrados ({source})"
+            )
             
         except Exception as e:
             self.tela_status_var.set(f"Erro ao processar resultados: {str(e)}")
+        finally:
+            if timing is not None:
+                timing.count('rows', len(self.query_rows_seen['tela']))
+                self.timings.finish(timing)
     
     def derrubar_pid_tela(self):
         """Derruba os PIDs selecionados na tabela de resultados da tela"""
@@ -2052,29 +3807,7 @@ timeout /t 3 /nobreak >nul
             messagebox.showwarning("Aviso", "Nenhum PID válido selecionado!")
             return
             
-        # Confirmar ação
-        confirm_message = (
-            f"Tem certeza que deseja derrubar {len(pids)} processo(s)?\n\n"
-            f"PIDs: {', '.join(pids)}\n\n"
-            "Esta operação usará o menu interativo do sistema."
-        )
-        
-        confirm = messagebox.askyesno("Confirmar Operação", confirm_message)
-        
-        if not confirm:
-            return
-            
-        # Verificar se a sessão interativa está ativa
-        if not self.shell:
-            messagebox.showerror("Erro", "Sessão interativa não está ativa!")
-            self.host_combo.focus_set()
-            return
-            
-        threading.Thread(
-            target=self._kill_pids_interactive, 
-            args=(pids,),
-            daemon=True
-        ).start()
+        self.start_kill(pids)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,89 @@
+"""Micro-benchmark do filtro permanente aplicado às linhas do 'ps aux'
+
+Compara o custo por linha do filtro original (uma regex por usuário e um
+laço de comandos por linha) com o PermanentFilterMatcher compilado.
+
+Uso: python benchmarks/bench_filtro_permanente.py [linhas] [repetições]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ssh_core import PermanentFilterMatcher
+
+FILTRO_PADRAO = {
+    'users': ['root', 'zabbix', 'sshd', 'postfix', 'nscd', 'message+', 'usertra+'],
+    'commands': ['bash', 'sleep', 'cron']
+}
+
+USUARIOS = ['root', 'zabbix', 'prod', 'op001', 'op002', 'sshd', 'message+', 'estoque', 'fatura']
+COMANDOS = [
+    '/u/cobol/bin/runcbl PED001', '/u/cobol/bin/runcbl EST220', '-bash',
+    'sshd: prod@pts/3', '/usr/sbin/crond -n', 'sleep 60', '/u/cobol/bin/runcbl FAT310 /d/work/123'
+]
+
+
+def gerar_linhas(quantidade, seed=42):
+    """Gera linhas no formato do 'ps aux' já divididas em colunas"""
+    rnd = random.Random(seed)
+    linhas = []
+    for pid in range(1000, 1000 + quantidade):
+        user = rnd.choice(USUARIOS)
+        command = rnd.choice(COMANDOS)
+        linhas.append(
+            f"{user:<8} {pid:>6}  0.0  0.1  12345  6789 pts/1    S+   08:00   0:01 {command}"
+        )
+    return linhas
+
+
+def filtro_original(permanent_filter, user, command):
+    """Reprodução do filtro anterior, para comparação"""
+    for blocked_user in permanent_filter['users']:
+        if re.match(rf'^{blocked_user}(\+)?$', user, re.IGNORECASE):
+            return True
+    for blocked_cmd in permanent_filter['commands']:
+        if blocked_cmd.lower() in command.lower():
+            return True
+    return False
+
+
+def medir(linhas, bloqueado, repeticoes):
+    """Retorna o melhor tempo por linha (em microssegundos) e o total mantido"""
+    melhor = None
+    mantidos = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        mantidos = 0
+        for line in linhas:
+            parts = line.split(maxsplit=10)
+            if not bloqueado(parts[0], parts[10]):
+                mantidos += 1
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(linhas) * 1e6, mantidos
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    linhas = gerar_linhas(quantidade)
+    matcher = PermanentFilterMatcher(FILTRO_PADRAO)
+
+    custo_original, mantidos_original = medir(
+        linhas, lambda u, c: filtro_original(FILTRO_PADRAO, u, c), repeticoes
+    )
+    custo_compilado, mantidos_compilado = medir(linhas, matcher.is_blocked, repeticoes)
+
+    print(f"Linhas: {quantidade} (melhor de {repeticoes})")
+    print(f"Filtro original : {custo_original:.3f} us/linha ({mantidos_original} mantidas)")
+    print(f"Filtro compilado: {custo_compilado:.3f} us/linha ({mantidos_compilado} mantidas)")
+    if custo_compilado:
+        print(f"Ganho: {custo_original / custo_compilado:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
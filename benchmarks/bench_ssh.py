@@ -0,0 +1,279 @@
+"""Suíte de benchmarks contra o servidor SSH simulado (servidor_simulado.py)
+
+Mede, sem depender de um servidor real:
+  - latência de conexão (handshake + autenticação);
+  - transferência + parsing do snapshot de processos ('ps aux' e projetado);
+  - filtro volátil (ProcessIndex, sequência de digitação) e ordenação tipada;
+  - taxa de inserção na Treeview (VirtualTreeview x ttk.Treeview), quando
+    houver display disponível.
+
+Os resultados são gravados em JSON em benchmarks/resultados/ e podem ser
+comparados com uma execução anterior (outra versão do código).
+
+Uso:
+    python benchmarks/bench_ssh.py [--linhas 1000 10000 50000] [--repeticoes 3]
+                                   [--rotulo v10] [--comparar resultados/anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paramiko
+
+from ssh_core import (DEFAULT_PERMANENT_FILTER, PS_AUX_COMMAND, PermanentFilterMatcher, ProcessIndex,
+                      build_server_ps_command, open_ssh_client, parse_cpu_time, stream_process_snapshot)
+from servidor_simulado import ServidorSimulado
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+# Sequência típica de digitação nos filtros voláteis (usuário, PID, comando)
+DIGITACAO = [
+    ('p', '', ''), ('pr', '', ''), ('pro', '', ''), ('prod', '', ''),
+    ('prod', '', 'r'), ('prod', '', 'run'), ('prod', '', 'runcbl'), ('prod', '', 'runcbl est'),
+    ('', '1', ''), ('', '12', ''), ('', '123', ''), ('', '1234', ''),
+]
+
+
+def rotulo_padrao():
+    """Commit atual (git) como rótulo da execução, ou 'local'"""
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return saida.stdout.strip() or 'local'
+    except (OSError, subprocess.SubprocessError):
+        return 'local'
+
+
+def resumo(tempos):
+    """Mediana, mínimo e máximo (em ms) de uma lista de tempos em segundos"""
+    ms = [t * 1000 for t in tempos]
+    return {
+        'mediana_ms': round(statistics.median(ms), 2),
+        'min_ms': round(min(ms), 2),
+        'max_ms': round(max(ms), 2),
+    }
+
+
+def conectar(servidor):
+    return open_ssh_client(servidor.host, servidor.user, servidor.password, servidor.port,
+                           policy=paramiko.AutoAddPolicy())
+
+
+def medir_conexao(servidor, repeticoes):
+    """Latência de abertura de conexões novas"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        client = conectar(servidor)
+        tempos.append(time.perf_counter() - inicio)
+        client.close()
+    return resumo(tempos)
+
+
+def medir_snapshot(client, linhas, repeticoes, matcher, projetado):
+    """Transferência + parsing do snapshot; retorna (métricas, processos)"""
+    cmd = build_server_ps_command(DEFAULT_PERMANENT_FILTER) if projetado else PS_AUX_COMMAND
+    tempos = []
+    processos = []
+    for _ in range(repeticoes):
+        recebidos = [0]
+
+        def on_rows(rows):
+            recebidos[0] += len(rows)
+
+        inicio = time.perf_counter()
+        processos, erro = stream_process_snapshot(client, matcher, cmd, projetado, on_rows=on_rows)
+        tempos.append(time.perf_counter() - inicio)
+        if erro:
+            raise RuntimeError(f"Erro no snapshot: {erro}")
+    melhor = min(tempos)
+    metricas = resumo(tempos)
+    metricas.update({
+        'linhas_servidor': linhas,
+        'processos': len(processos),
+        'linhas_por_s': round(linhas / melhor) if melhor else None,
+    })
+    return metricas, processos
+
+
+def medir_filtro(processos, repeticoes):
+    """Construção do ProcessIndex, sequência de digitação e varredura linear equivalente"""
+    construcao, digitacao, linear = [], [], []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        index = ProcessIndex(processos)
+        construcao.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for user, pid, cmd in DIGITACAO:
+            index.filter(user, pid, cmd)
+        digitacao.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for user, pid, cmd in DIGITACAO:
+            [p for p in processos
+             if user in p['user'].lower() and pid in p['pid'] and cmd in p['command'].lower()]
+        linear.append(time.perf_counter() - inicio)
+    return {
+        'indice': resumo(construcao),
+        'digitacao_indice': resumo(digitacao),
+        'digitacao_linear': resumo(linear),
+        'consultas': len(DIGITACAO),
+    }
+
+
+def medir_ordenacao(processos, repeticoes):
+    """Ordenação estável por usuário e tempo de CPU com chaves tipadas (como a interface)"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        chaves = {p['pid']: parse_cpu_time(p['idle']) for p in processos}
+        ordenados = sorted(processos, key=lambda p: chaves[p['pid']], reverse=True)
+        ordenados.sort(key=lambda p: p['user'].lower())
+        tempos.append(time.perf_counter() - inicio)
+    return resumo(tempos)
+
+
+def medir_treeview(processos, repeticoes):
+    """Inserção e ordenação na VirtualTreeview e inserção na ttk.Treeview comum
+
+    Requer display e as dependências da interface; caso contrário retorna o motivo.
+    """
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        from Cobol_Python_v10_Final import SSHClientGUI, VirtualTreeview
+        root = tk.Tk()
+    except Exception as e:
+        return {'ignorado': f"{type(e).__name__}: {e}"}
+
+    colunas = ('user', 'pid', 'idle', 'command')
+    valores = [(p['user'], p['pid'], p['idle'], p['command']) for p in processos]
+    resultado = {}
+    try:
+        root.withdraw()
+        for nome, classe in (('virtual', VirtualTreeview), ('ttk', ttk.Treeview)):
+            tempos = []
+            for _ in range(repeticoes):
+                tv = classe(root, columns=colunas, show='headings', height=25)
+                tv.pack()
+                inicio = time.perf_counter()
+                for row in valores:
+                    tv.insert('', tk.END, values=row)
+                root.update_idletasks()
+                tempos.append(time.perf_counter() - inicio)
+                if classe is VirtualTreeview:
+                    inicio = time.perf_counter()
+                    tv.sort_by([('user', False), ('idle', True)],
+                               {col: SSHClientGUI.column_sort_key(col) for col in colunas})
+                    tv.get_children()
+                    root.update_idletasks()
+                    resultado.setdefault('ordenacao_virtual', []).append(time.perf_counter() - inicio)
+                tv.destroy()
+            metricas = resumo(tempos)
+            metricas['linhas_por_s'] = round(len(valores) / min(tempos)) if min(tempos) else None
+            resultado[f'insercao_{nome}'] = metricas
+        if 'ordenacao_virtual' in resultado:
+            resultado['ordenacao_virtual'] = resumo(resultado['ordenacao_virtual'])
+    finally:
+        root.destroy()
+    return resultado
+
+
+def executar(linhas_lista, repeticoes, rotulo):
+    matcher = PermanentFilterMatcher(DEFAULT_PERMANENT_FILTER)
+    resultados = {
+        'rotulo': rotulo,
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'paramiko': paramiko.__version__,
+        'plataforma': platform.platform(),
+        'cenarios': {},
+    }
+    for linhas in linhas_lista:
+        print(f"== {linhas} linhas ==")
+        with ServidorSimulado(linhas_ps=linhas) as servidor:
+            cenario = {'conexao': medir_conexao(servidor, repeticoes)}
+            print(f"  conexão: {cenario['conexao']['mediana_ms']} ms")
+            client = conectar(servidor)
+            try:
+                cenario['snapshot_ps_aux'], processos = medir_snapshot(
+                    client, linhas, repeticoes, matcher, projetado=False)
+                cenario['snapshot_projetado'], _ = medir_snapshot(
+                    client, linhas, repeticoes, matcher, projetado=True)
+            finally:
+                client.close()
+        for chave in ('snapshot_ps_aux', 'snapshot_projetado'):
+            print(f"  {chave}: {cenario[chave]['mediana_ms']} ms ({cenario[chave]['linhas_por_s']} linhas/s)")
+        cenario['filtro'] = medir_filtro(processos, repeticoes)
+        print(f"  filtro: índice {cenario['filtro']['indice']['mediana_ms']} ms, digitação "
+              f"{cenario['filtro']['digitacao_indice']['mediana_ms']} ms "
+              f"(linear {cenario['filtro']['digitacao_linear']['mediana_ms']} ms)")
+        cenario['ordenacao'] = medir_ordenacao(processos, repeticoes)
+        print(f"  ordenação: {cenario['ordenacao']['mediana_ms']} ms")
+        cenario['treeview'] = medir_treeview(processos, repeticoes)
+        if 'ignorado' in cenario['treeview']:
+            print(f"  treeview: ignorado ({cenario['treeview']['ignorado']})")
+        else:
+            for chave, metricas in cenario['treeview'].items():
+                print(f"  {chave}: {metricas['mediana_ms']} ms")
+        resultados['cenarios'][str(linhas)] = cenario
+    return resultados
+
+
+def metricas_planas(dados, prefixo=''):
+    """{'cenario/metrica/mediana_ms': valor} para comparação entre execuções"""
+    planas = {}
+    for chave, valor in dados.items():
+        caminho = f"{prefixo}/{chave}" if prefixo else chave
+        if isinstance(valor, dict):
+            planas.update(metricas_planas(valor, caminho))
+        elif chave == 'mediana_ms':
+            planas[caminho] = valor
+    return planas
+
+
+def comparar(atual, anterior):
+    """Imprime a variação das medianas em relação a uma execução anterior"""
+    base = metricas_planas(anterior['cenarios'])
+    novo = metricas_planas(atual['cenarios'])
+    print(f"\nComparação: {anterior.get('rotulo')} -> {atual.get('rotulo')}")
+    for caminho in sorted(set(base) & set(novo)):
+        antes, depois = base[caminho], novo[caminho]
+        variacao = f"{(depois - antes) / antes * 100:+.1f}%" if antes else "n/d"
+        print(f"  {caminho:<55} {antes:>10.2f} -> {depois:>10.2f} ms  {variacao}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks contra o servidor SSH simulado")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help="Tamanhos do 'ps aux' simulado")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--rotulo', default=None, help="Identificação da versão (padrão: commit atual)")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, metavar='JSON', help="Resultado anterior para comparação")
+    args = parser.parse_args()
+
+    rotulo = args.rotulo or rotulo_padrao()
+    resultados = executar(args.linhas, args.repeticoes, rotulo)
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"bench_ssh-{rotulo}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            comparar(resultados, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
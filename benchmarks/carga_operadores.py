@@ -0,0 +1,179 @@
+"""Carga de operadores simultâneos contra o menu COBOL emulado
+
+Cada operador abre a própria conexão SSH com o servidor simulado e repete o
+ciclo da interface: consulta de matrícula (opção 2 do menu ou consulta
+direta), derrubada de parte dos PIDs encontrados (kill direto ou opção 3) e
+verificação de que terminaram. Mede latência (mediana, p95, máximo) e vazão
+por operação e acusa truncamento: consultas que devolveram menos linhas do
+que o menu enviou, típico de respostas lentas confundidas com fim da tabela.
+
+Uso:
+    python benchmarks/carga_operadores.py --operadores 8 --iteracoes 5 --linhas 200
+    python benchmarks/carga_operadores.py --pausa-tabela 2 --bloco-tabela 50   # resposta lenta
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paramiko
+
+from ssh_core import compile_menu_prompts, kill_pids, lookup_locks, open_ssh_client, probe_pids
+from menu_simulado import MenuSimulado
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+CAMINHO = '/d/work'
+
+
+def percentis(tempos):
+    """Mediana, p95 e máximo (em ms) de uma lista de tempos em segundos"""
+    if not tempos:
+        return {}
+    ms = sorted(t * 1000 for t in tempos)
+    return {
+        'n': len(ms),
+        'mediana_ms': round(statistics.median(ms), 1),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 1),
+        'max_ms': round(ms[-1], 1),
+    }
+
+
+class Operador(threading.Thread):
+    """Um operador: conexão própria e ciclos consulta → derrubada → verificação"""
+    def __init__(self, numero, servidor, menu, args, prompts, inicio):
+        super().__init__(daemon=True)
+        self.numero = numero
+        self.servidor = servidor
+        self.menu = menu
+        self.args = args
+        self.prompts = prompts
+        self.inicio = inicio
+        self.tempos = {'conexao': [], 'consulta': [], 'derrubada': []}
+        self.truncamentos = []
+        self.falhas_derrubada = 0
+        self.erros = []
+
+    def run(self):
+        self.inicio.wait()
+        try:
+            t0 = time.perf_counter()
+            client = open_ssh_client(self.servidor.host, self.servidor.user, self.servidor.password,
+                                     self.servidor.port, policy=paramiko.AutoAddPolicy())
+            self.tempos['conexao'].append(time.perf_counter() - t0)
+        except Exception as e:
+            self.erros.append(f"conexão: {e}")
+            return
+        try:
+            for iteracao in range(self.args.iteracoes):
+                try:
+                    self.ciclo(client, f"{self.numero:03d}{iteracao:04d}")
+                except Exception as e:
+                    self.erros.append(f"iteração {iteracao}: {type(e).__name__}: {e}")
+        finally:
+            client.close()
+
+    def ciclo(self, client, matricula):
+        esperadas = self.menu.travas(CAMINHO, matricula)
+        linhas = []
+        t0 = time.perf_counter()
+        lookup_locks(client, CAMINHO, [matricula], self.prompts, direct=self.args.consulta_direta,
+                     on_rows=linhas.extend)
+        self.tempos['consulta'].append(time.perf_counter() - t0)
+        recebidas = {row[1] for row in linhas}
+        if len(recebidas) < len(esperadas):
+            self.truncamentos.append((matricula, len(recebidas), len(esperadas)))
+
+        alvos = sorted(recebidas)[:self.args.derrubar]
+        if not alvos:
+            return
+        t0 = time.perf_counter()
+        resultados = kill_pids(client, alvos, self.prompts, direct=not self.args.derrubar_menu)
+        self.tempos['derrubada'].append(time.perf_counter() - t0)
+        ainda_ativos = [pid for pid, status in probe_pids(client, alvos).items() if status == 'alive']
+        if ainda_ativos or any(status not in ('killed', 'killed_force') for status in resultados.values()):
+            self.falhas_derrubada += 1
+
+
+def executar(args):
+    menu = MenuSimulado(
+        linhas_consulta=args.linhas, atraso_login=args.atraso_login, atraso_consulta=args.atraso_consulta,
+        pausa_tabela=args.pausa_tabela, bloco_tabela=args.bloco_tabela, atraso_derrubada=args.atraso_derrubada
+    )
+    prompts = compile_menu_prompts()
+    with menu.servidor() as servidor:
+        inicio = threading.Event()
+        operadores = [Operador(n, servidor, menu, args, prompts, inicio) for n in range(args.operadores)]
+        for operador in operadores:
+            operador.start()
+        t0 = time.perf_counter()
+        inicio.set()
+        for operador in operadores:
+            operador.join()
+        duracao = time.perf_counter() - t0
+
+    tempos = {chave: [t for op in operadores for t in op.tempos[chave]] for chave in ('conexao', 'consulta', 'derrubada')}
+    truncamentos = [t for op in operadores for t in op.truncamentos]
+    erros = [f"operador {op.numero}: {erro}" for op in operadores for erro in op.erros]
+    return {
+        'parametros': vars(args),
+        'duracao_s': round(duracao, 2),
+        'latencia': {chave: percentis(valores) for chave, valores in tempos.items()},
+        'vazao_ops_s': {
+            chave: round(len(tempos[chave]) / duracao, 2) if duracao else None
+            for chave in ('consulta', 'derrubada')
+        },
+        'truncamentos': [
+            {'matricula': matricula, 'recebidas': recebidas, 'esperadas': esperadas}
+            for matricula, recebidas, esperadas in truncamentos
+        ],
+        'falhas_derrubada': sum(op.falhas_derrubada for op in operadores),
+        'erros': erros,
+        'servidor': dict(menu.contadores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga de operadores contra o menu COBOL emulado")
+    parser.add_argument('--operadores', type=int, default=4)
+    parser.add_argument('--iteracoes', type=int, default=3)
+    parser.add_argument('--linhas', type=int, default=50, help="Linhas da tabela por consulta")
+    parser.add_argument('--derrubar', type=int, default=5, help="PIDs derrubados por ciclo")
+    parser.add_argument('--consulta-direta', action='store_true', help="Consulta direta em vez do menu")
+    parser.add_argument('--derrubar-menu', action='store_true', help="Opção 3 do menu em vez de kill direto")
+    parser.add_argument('--atraso-login', type=float, default=0.0)
+    parser.add_argument('--atraso-consulta', type=float, default=0.0, help="Segundos até a tabela")
+    parser.add_argument('--pausa-tabela', type=float, default=0.0, help="Pausa entre blocos da tabela")
+    parser.add_argument('--bloco-tabela', type=int, default=50)
+    parser.add_argument('--atraso-derrubada', type=float, default=0.0)
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de resultados")
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    for chave, metricas in resultado['latencia'].items():
+        if metricas:
+            print(f"{chave:<10} n={metricas['n']:<4} mediana {metricas['mediana_ms']} ms, "
+                  f"p95 {metricas['p95_ms']} ms, máx {metricas['max_ms']} ms")
+    print(f"Vazão: {resultado['vazao_ops_s']['consulta']} consultas/s, "
+          f"{resultado['vazao_ops_s']['derrubada']} derrubadas/s em {resultado['duracao_s']} s")
+    print(f"Truncamentos: {len(resultado['truncamentos'])}; falhas de derrubada: "
+          f"{resultado['falhas_derrubada']}; erros: {len(resultado['erros'])}")
+    for truncamento in resultado['truncamentos'][:10]:
+        print(f"  matrícula {truncamento['matricula']}: {truncamento['recebidas']} de {truncamento['esperadas']} linhas")
+    for erro in resultado['erros'][:10]:
+        print(f"  {erro}")
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"carga_operadores-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {saida}")
+    return 1 if resultado['truncamentos'] or resultado['erros'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
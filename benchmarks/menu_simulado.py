@@ -0,0 +1,221 @@
+"""Emulador do menu COBOL servido pelo servidor SSH simulado
+
+Reproduz o suficiente do menu proprietário para exercitar a automação de
+ponta a ponta: opção 2 (caminho e padrão → tabela USER PID NAME seguida do
+pedido de ENTER) e opção 3 (lista de PIDs a derrubar), com eco de terminal e
+atrasos configuráveis. Os comandos não interativos usados pelo núcleo
+(derrubada em massa, verificação de PIDs e consulta direta) são atendidos
+sobre o mesmo estado, de modo que um processo derrubado some das consultas
+seguintes.
+
+Uso:
+    menu = MenuSimulado(linhas_consulta=50, atraso_consulta=0.5)
+    with menu.servidor() as servidor:
+        ...
+"""
+import re
+import shlex
+import threading
+import time
+import zlib
+
+from servidor_simulado import ServidorSimulado
+
+LIMPAR_TELA = "\x1b[2J\x1b[H"
+
+MENU = (
+    LIMPAR_TELA
+    + "=== SISTEMA COMERCIAL - SUPORTE ===\r\n"
+    + "  1 - Usuarios conectados\r\n"
+    + "  2 - Consultar arquivos em uso\r\n"
+    + "  3 - Derrubar processos\r\n"
+    + "  9 - Sair\r\n"
+    + "Escolha a opcao: "
+)
+
+USUARIOS = ['prod', 'op001', 'op002', 'estoque', 'fatura']
+
+# Trechos que identificam os scripts não interativos do ssh_core
+_PIDS_REGEX = re.compile(r'^(?:for p in ([0-9 ]*); do|pending="([0-9 ]*)")', re.MULTILINE)
+_GLOBS_REGEX = re.compile(r'^set --; for f in (.*?); do')
+
+
+class MenuSimulado:
+    """Estado compartilhado do emulador (processos ativos e travas) e seus atendentes
+
+    linhas_consulta: linhas da tabela por padrão consultado; atraso_login:
+    segundos até o menu inicial; atraso_consulta: segundos até a tabela;
+    pausa_tabela: pausa a cada bloco_tabela linhas (respostas lentas);
+    atraso_derrubada: segundos para a opção 3 concluir.
+    """
+    def __init__(self, linhas_consulta=20, atraso_login=0.0, atraso_consulta=0.0, pausa_tabela=0.0,
+                 bloco_tabela=50, atraso_derrubada=0.0):
+        self.linhas_consulta = linhas_consulta
+        self.atraso_login = atraso_login
+        self.atraso_consulta = atraso_consulta
+        self.pausa_tabela = pausa_tabela
+        self.bloco_tabela = max(1, bloco_tabela)
+        self.atraso_derrubada = atraso_derrubada
+        self._lock = threading.Lock()
+        self._proximo_pid = 10000
+        self._travas = {}    # (caminho, padrão) -> [(usuário, pid, arquivo)]
+        self._ativos = set()
+        self.contadores = {'sessoes': 0, 'consultas_menu': 0, 'derrubadas_menu': 0,
+                           'consultas_diretas': 0, 'derrubadas_diretas': 0, 'verificacoes': 0}
+
+    def servidor(self, **kwargs):
+        """ServidorSimulado já ligado a este menu"""
+        return ServidorSimulado(shell_handler=self.atender_shell, tratador_comando=self.tratar_comando,
+                                **kwargs)
+
+    def _contar(self, chave):
+        with self._lock:
+            self.contadores[chave] += 1
+
+    # ===== Estado =====
+
+    def travas(self, caminho, padrao):
+        """Linhas (usuário, pid, arquivo) dos processos ativos com o padrão aberto
+
+        Cada (caminho, padrão) recebe PIDs próprios na primeira consulta.
+        """
+        caminho = caminho.rstrip('/')
+        padrao = padrao.lstrip('*')
+        with self._lock:
+            chave = (caminho, padrao)
+            if chave not in self._travas:
+                semente = zlib.crc32(f"{caminho}/{padrao}".encode())
+                linhas = []
+                for n in range(self.linhas_consulta):
+                    pid = str(self._proximo_pid)
+                    self._proximo_pid += 1
+                    self._ativos.add(pid)
+                    usuario = USUARIOS[(semente + n) % len(USUARIOS)]
+                    linhas.append((usuario, pid, f"{caminho}/ARQ{n:04d}{padrao}"))
+                self._travas[chave] = linhas
+            return [linha for linha in self._travas[chave] if linha[1] in self._ativos]
+
+    def derrubar(self, pids):
+        """Encerra os PIDs; retorna {pid: 'killed'|'gone'}"""
+        with self._lock:
+            resultado = {}
+            for pid in pids:
+                resultado[pid] = 'killed' if pid in self._ativos else 'gone'
+                self._ativos.discard(pid)
+            return resultado
+
+    def ativo(self, pid):
+        with self._lock:
+            return pid in self._ativos
+
+    # ===== Comandos não interativos =====
+
+    def tratar_comando(self, comando):
+        """Atende os scripts do ssh_core; None deixa o comando para o servidor"""
+        if comando.startswith('set --; for f in'):
+            return self._consulta_direta(comando)
+        match = _PIDS_REGEX.search(comando)
+        if match is None:
+            return None
+        pids = (match.group(1) or match.group(2)).split()
+        if re.search(r'^sent=""', comando, re.MULTILINE):
+            self._contar('derrubadas_diretas')
+            resultado = self.derrubar(pids)
+            return "".join(f"{pid} {status}\n" for pid, status in resultado.items()), 0
+        self._contar('verificacoes')
+        return "".join(f"{pid} {'alive' if self.ativo(pid) else 'gone'}\n" for pid in pids), 0
+
+    def _consulta_direta(self, comando):
+        self._contar('consultas_diretas')
+        match = _GLOBS_REGEX.match(comando)
+        if match is None:
+            return "", 4
+        linhas = []
+        for glob in shlex.split(match.group(1)):
+            caminho, _, padrao = glob.rpartition('/*')
+            linhas.extend(self.travas(caminho, padrao))
+        return "".join(f"{usuario} {pid} {arquivo}\n" for usuario, pid, arquivo in linhas), 0
+
+    # ===== Sessão interativa (menu) =====
+
+    def atender_shell(self, channel):
+        """Conduz uma sessão do menu até a opção 9 ou o fechamento do canal"""
+        self._contar('sessoes')
+        sessao = _Sessao(channel)
+        if self.atraso_login:
+            time.sleep(self.atraso_login)
+        sessao.enviar(MENU)
+        while True:
+            opcao = sessao.ler_linha()
+            if opcao is None or opcao == '9':
+                return
+            if opcao == '2':
+                self._opcao_consulta(sessao)
+            elif opcao == '3':
+                self._opcao_derrubar(sessao)
+            elif opcao:
+                sessao.enviar("Opcao invalida\r\n")
+            sessao.enviar(MENU)
+
+    def _aguardar_enter(self, sessao):
+        sessao.enviar("Tecle ENTER para continuar")
+        return sessao.ler_linha() is not None
+
+    def _opcao_consulta(self, sessao):
+        sessao.enviar("Informe o caminho: ")
+        caminho = sessao.ler_linha()
+        if caminho is None:
+            return
+        sessao.enviar("Informe o padrao do arquivo: ")
+        padrao = sessao.ler_linha()
+        if padrao is None:
+            return
+        self._contar('consultas_menu')
+        if self.atraso_consulta:
+            time.sleep(self.atraso_consulta)
+        linhas = self.travas(caminho, padrao)
+        sessao.enviar("USER     PID    NAME\r\n")
+        for inicio in range(0, len(linhas), self.bloco_tabela):
+            if inicio and self.pausa_tabela:
+                time.sleep(self.pausa_tabela)
+            bloco = linhas[inicio:inicio + self.bloco_tabela]
+            sessao.enviar("".join(f"{usuario:<8} {pid:>6} {arquivo}\r\n" for usuario, pid, arquivo in bloco))
+        sessao.enviar(f"{len(linhas)} processo(s) encontrado(s)\r\n")
+        self._aguardar_enter(sessao)
+
+    def _opcao_derrubar(self, sessao):
+        sessao.enviar("Informe os PIDs: ")
+        pids = sessao.ler_linha()
+        if pids is None:
+            return
+        self._contar('derrubadas_menu')
+        if self.atraso_derrubada:
+            time.sleep(self.atraso_derrubada)
+        for pid, status in self.derrubar(pids.split()).items():
+            sessao.enviar(f"PID {pid} {'derrubado' if status == 'killed' else 'nao encontrado'}\r\n")
+        self._aguardar_enter(sessao)
+
+
+class _Sessao:
+    """Leitura de linhas com eco, como um terminal (pty) faria"""
+    def __init__(self, channel):
+        self.channel = channel
+        self._buffer = ""
+
+    def enviar(self, texto):
+        self.channel.sendall(texto.encode())
+
+    def ler_linha(self):
+        """Próxima linha digitada (sem o fim de linha), ou None se o canal fechou"""
+        while True:
+            fim = min((i for i in (self._buffer.find('\n'), self._buffer.find('\r')) if i >= 0), default=-1)
+            if fim >= 0:
+                linha = self._buffer[:fim]
+                self._buffer = self._buffer[fim + 1:].lstrip('\r\n')
+                return linha.strip()
+            dados = self.channel.recv(1024)
+            if not dados:
+                return None
+            texto = dados.decode(errors='ignore')
+            self._buffer += texto
+            self.enviar(texto.replace('\r\n', '\n').replace('\n', '\r\n'))
@@ -0,0 +1,220 @@
+"""Servidor SSH simulado, em processo, para benchmarks e testes de carga
+
+Implementa um paramiko.ServerInterface que aceita autenticação por senha e
+responde aos comandos com saídas fabricadas: 'ps aux' (e o 'ps' projetado)
+com a quantidade de linhas configurada e respostas fixas para os demais
+comandos. Sessões interativas (shell) são entregues a shell_handler, o que
+permite acoplar o emulador do menu COBOL.
+
+Uso:
+    with ServidorSimulado(linhas_ps=10000) as servidor:
+        client = ssh_core.open_ssh_client(servidor.host, servidor.user,
+                                          servidor.password, servidor.port,
+                                          policy=paramiko.AutoAddPolicy())
+"""
+import logging
+import random
+import socket
+import threading
+import time
+
+import paramiko
+
+
+USUARIOS = ['prod', 'op001', 'op002', 'estoque', 'fatura', 'root', 'zabbix', 'sshd']
+COMANDOS = [
+    '/u/cobol/bin/runcbl PED001', '/u/cobol/bin/runcbl EST220 /d/work/123', '-bash',
+    'sshd: prod@pts/3', '/usr/sbin/crond -n', 'sleep 60', '/u/cobol/bin/runcbl FAT310 /d/dados/T45'
+]
+
+
+# O transporte do lado servidor registra como erro o fechamento normal das
+# conexões pelos clientes
+LOG_CHANNEL = 'servidor_simulado'
+logging.getLogger(LOG_CHANNEL).setLevel(logging.CRITICAL)
+
+# O paramiko só confirma o pedido (exec/shell) depois que o ServerInterface
+# retorna; fechar o canal antes disso faz o cliente ver "Channel closed"
+PAUSA_CONFIRMACAO = 0.02
+
+_HOST_KEY = None
+_HOST_KEY_LOCK = threading.Lock()
+
+
+def host_key():
+    """Chave do servidor, gerada uma vez por processo"""
+    global _HOST_KEY
+    with _HOST_KEY_LOCK:
+        if _HOST_KEY is None:
+            _HOST_KEY = paramiko.RSAKey.generate(2048)
+        return _HOST_KEY
+
+
+def gerar_ps_aux(linhas, seed=42):
+    """Saída no formato do 'ps aux' com o número de linhas pedido"""
+    rnd = random.Random(seed)
+    saida = ["USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND"]
+    for pid in range(1000, 1000 + linhas):
+        saida.append(
+            f"{rnd.choice(USUARIOS):<8} {pid:>6}  0.0  0.1  12345  6789 pts/1    S+   08:00 "
+            f"{rnd.randint(0, 300)}:{rnd.randint(0, 59):02d} {rnd.choice(COMANDOS)}"
+        )
+    return ("\n".join(saida) + "\n").encode()
+
+
+def gerar_ps_projetado(linhas, seed=42):
+    """Saída no formato do 'ps' projetado (USER PID TIME COMANDO), sem cabeçalho"""
+    rnd = random.Random(seed)
+    saida = []
+    for pid in range(1000, 1000 + linhas):
+        saida.append(
+            f"{rnd.choice(USUARIOS)} {pid} {rnd.randint(0, 300)}:{rnd.randint(0, 59):02d} "
+            f"{rnd.choice(COMANDOS)}"
+        )
+    return ("\n".join(saida) + "\n").encode()
+
+
+class _Interface(paramiko.ServerInterface):
+    """Regras de autenticação e canais do servidor simulado"""
+    def __init__(self, servidor):
+        self.servidor = servidor
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if username == self.servidor.user and password == self.servidor.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        command = command.decode(errors='ignore') if isinstance(command, bytes) else command
+        threading.Thread(target=self.servidor.responder_comando,
+                         args=(channel, command, time.monotonic()), daemon=True).start()
+        return True
+
+    def check_channel_shell_request(self, channel):
+        if self.servidor.shell_handler is None:
+            return False
+        threading.Thread(target=self.servidor.executar_shell, args=(channel,), daemon=True).start()
+        return True
+
+
+class ServidorSimulado:
+    """Servidor SSH local (127.0.0.1, porta livre) com respostas configuráveis
+
+    linhas_ps: linhas devolvidas pelo 'ps'; respostas: {comando: saída} para
+    outros comandos (os ausentes ecoam o próprio comando); tratador_comando(comando):
+    retorna (saída, status) ou None para seguir as regras anteriores;
+    atraso_comando: segundos antes de cada resposta; shell_handler(channel):
+    atende sessões interativas.
+    """
+    def __init__(self, linhas_ps=1000, respostas=None, atraso_comando=0.0, shell_handler=None,
+                 tratador_comando=None, user='bench', password='bench'):
+        self.linhas_ps = linhas_ps
+        self.respostas = respostas or {}
+        self.tratador_comando = tratador_comando
+        self.atraso_comando = atraso_comando
+        self.shell_handler = shell_handler
+        self.user = user
+        self.password = password
+        self.host = '127.0.0.1'
+        self.port = None
+        self._socket = None
+        self._transports = []
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._saidas_ps = {}
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    def iniciar(self):
+        host_key()  # gerar antes de medir a conexão
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, 0))
+        self._socket.listen(100)
+        self.port = self._socket.getsockname()[1]
+        threading.Thread(target=self._aceitar, daemon=True).start()
+
+    def parar(self):
+        self._parar.set()
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+        with self._lock:
+            transports = list(self._transports)
+            self._transports.clear()
+        for transport in transports:
+            transport.close()
+
+    def _aceitar(self):
+        while not self._parar.is_set():
+            try:
+                sock, _ = self._socket.accept()
+            except OSError:
+                break
+            transport = paramiko.Transport(sock)
+            transport.set_log_channel(LOG_CHANNEL)
+            transport.add_server_key(host_key())
+            with self._lock:
+                self._transports.append(transport)
+            try:
+                transport.start_server(server=_Interface(self))
+            except (paramiko.SSHException, EOFError, OSError):
+                transport.close()
+
+    def saida_ps(self, projetado):
+        """Saída do 'ps' (gerada uma vez por formato)"""
+        if projetado not in self._saidas_ps:
+            gerar = gerar_ps_projetado if projetado else gerar_ps_aux
+            self._saidas_ps[projetado] = gerar(self.linhas_ps)
+        return self._saidas_ps[projetado]
+
+    def responder_comando(self, channel, command, pedido_em):
+        """Responde a um exec_command e encerra o canal com o status da resposta"""
+        try:
+            if self.atraso_comando:
+                time.sleep(self.atraso_comando)
+            resposta = self.tratador_comando(command) if self.tratador_comando else None
+            if resposta is not None:
+                saida, status = resposta
+            elif command.startswith('ps aux'):
+                saida, status = self.saida_ps(False), 0
+            elif command.startswith('ps -eo'):
+                saida, status = self.saida_ps(True), 0
+            else:
+                saida, status = self.respostas.get(command, f"{command}\n"), 0
+            if isinstance(saida, str):
+                saida = saida.encode()
+            channel.sendall(saida)
+            channel.send_exit_status(status)
+            restante = PAUSA_CONFIRMACAO - (time.monotonic() - pedido_em)
+            if restante > 0:
+                time.sleep(restante)
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            channel.close()
+
+    def executar_shell(self, channel):
+        try:
+            self.shell_handler(channel)
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            channel.close()
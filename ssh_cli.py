@@ -0,0 +1,195 @@
+"""Linha de comando do Gerenciador SSH Avançado (sem interface gráfica)
+
+Lista processos, consulta travas de matrícula/tela e derruba PIDs usando o
+mesmo núcleo da interface (ssh_core), para uso em scripts, cron e medições.
+
+Exemplos:
+    python ssh_cli.py --host srv01 --user op list --filter-user prod --json
+    python ssh_cli.py --host srv01 --user op query --path /d/work --pattern 12345
+    python ssh_cli.py --host srv01 --user op kill 1234 5678 --escalate 5 --yes
+
+A senha vem de --password, da variável SSH_TOOL_PASSWORD ou é solicitada.
+"""
+import argparse
+import getpass
+import json
+import logging
+import os
+import sys
+import time
+
+import paramiko
+
+import ssh_core
+
+# Mesmo arquivo de configuração da interface (prompts do menu, lotes de derrubada)
+CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".ssh_tool_config")
+
+def load_config(path=CONFIG_FILE):
+    """Carrega a configuração compartilhada com a interface, se existir"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def connect(args, timing=None):
+    """Abre a conexão SSH a partir dos argumentos"""
+    password = args.password or os.environ.get('SSH_TOOL_PASSWORD')
+    if password is None:
+        password = getpass.getpass(f"Senha de {args.user}@{args.host}: ")
+    policy = paramiko.AutoAddPolicy() if args.accept_unknown_host else None
+    return ssh_core.open_ssh_client(args.host, args.user, password, args.port, policy=policy, timing=timing)
+
+def cmd_list(client, args, config, timing=None):
+    """Subcomando 'list': processos visíveis com os filtros informados"""
+    permanent_filter = {
+        'users': ssh_core.DEFAULT_PERMANENT_FILTER['users'] + args.block_user,
+        'commands': ssh_core.DEFAULT_PERMANENT_FILTER['commands'] + args.block_command,
+    }
+    processes, error = ssh_core.list_processes(
+        client, permanent_filter, args.filter_user, args.filter_pid, args.filter_cmd,
+        server_side=not args.client_side, timing=timing
+    )
+    if error and not processes:
+        raise RuntimeError(f"Erro ao listar processos: {error}")
+    return {'processes': processes}, [
+        (proc['user'], proc['pid'], proc['idle'], proc['command']) for proc in processes
+    ]
+
+def cmd_query(client, args, config, timing=None):
+    """Subcomando 'query': processos com arquivos abertos em path/*padrão"""
+    rows = []
+    source = ssh_core.lookup_locks(
+        client, args.path, args.pattern,
+        ssh_core.compile_menu_prompts(config.get('menu_prompts')),
+        direct=args.direct, on_rows=rows.extend, timing=timing
+    )
+    # Consultas paralelas podem retornar o mesmo processo
+    rows = list(dict.fromkeys(tuple(row) for row in rows))
+    return {
+        'source': source,
+        'rows': [{'user': user, 'pid': pid, 'name': name} for user, pid, name in rows],
+    }, rows
+
+def cmd_kill(client, args, config, timing=None):
+    """Subcomando 'kill': derruba os PIDs e informa o resultado de cada um"""
+    if not args.yes:
+        if not sys.stdin.isatty():
+            raise RuntimeError("Use --yes para derrubar processos sem confirmação interativa")
+        answer = input(f"Derrubar {len(args.pids)} processo(s) em {args.host}? [s/N] ")
+        if answer.strip().lower() not in ('s', 'sim', 'y', 'yes'):
+            raise RuntimeError("Operação cancelada")
+
+    results = ssh_core.kill_pids(
+        client, args.pids, ssh_core.compile_menu_prompts(config.get('menu_prompts')),
+        direct=not args.menu, escalate_after=args.escalate,
+        chunk_size=int(config.get('kill_chunk_size', 500)),
+        menu_chunk_size=int(config.get('kill_menu_chunk_size', 50)), timing=timing
+    )
+    pending = [pid for pid, status in results.items() if status == 'alive']
+    if pending and args.verify > 0:
+        surviving = set(ssh_core.verify_kills(client, pending, args.verify, timing=timing))
+        for pid in pending:
+            if pid not in surviving:
+                results[pid] = 'killed'
+
+    return {
+        'summary': ssh_core.summarize_kill_results(results),
+        'results': [{'pid': pid, 'status': status} for pid, status in results.items()],
+    }, [(pid, ssh_core.KILL_STATUS_LABELS.get(status, status)) for pid, status in results.items()]
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Gerenciador SSH Avançado - linha de comando")
+    parser.add_argument('--host', required=True)
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--port', type=int, default=22)
+    parser.add_argument('--password', help="Senha (preferível usar SSH_TOOL_PASSWORD)")
+    parser.add_argument('--accept-unknown-host', action='store_true',
+                        help="Aceitar host key desconhecida (padrão: rejeitar)")
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    parser.add_argument('--verbose', action='store_true', help="Exibir o log do núcleo e os tempos por etapa")
+    parser.add_argument('--timings-jsonl', metavar='ARQUIVO',
+                        help="Acrescentar os tempos da operação ao arquivo JSON-lines")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_list = sub.add_parser('list', help="Listar processos")
+    p_list.add_argument('--filter-user', default="")
+    p_list.add_argument('--filter-pid', default="")
+    p_list.add_argument('--filter-cmd', default="")
+    p_list.add_argument('--block-user', action='append', default=[],
+                        help="Usuário adicional do filtro permanente")
+    p_list.add_argument('--block-command', action='append', default=[],
+                        help="Trecho de comando adicional do filtro permanente")
+    p_list.add_argument('--client-side', action='store_true',
+                        help="Filtrar localmente (ps aux completo)")
+    p_list.set_defaults(func=cmd_list)
+
+    p_query = sub.add_parser('query', help="Consultar travas (matrícula/tela)")
+    p_query.add_argument('--path', required=True, help="Ex.: /d/work ou /d/dados")
+    p_query.add_argument('--pattern', action='append', required=True,
+                         help="Padrão do arquivo (pode repetir)")
+    p_query.add_argument('--direct', action='store_true', help="Consulta direta (lsof), sem menu")
+    p_query.set_defaults(func=cmd_query)
+
+    p_kill = sub.add_parser('kill', help="Derrubar PIDs")
+    p_kill.add_argument('pids', nargs='+')
+    p_kill.add_argument('--menu', action='store_true', help="Usar a opção 3 do menu em vez de kill direto")
+    p_kill.add_argument('--escalate', type=int, default=None, metavar='SEGUNDOS',
+                        help="Enviar KILL aos que não terminarem no prazo")
+    p_kill.add_argument('--verify', type=float, default=0, metavar='SEGUNDOS',
+                        help="Acompanhar os que continuarem ativos por até SEGUNDOS")
+    p_kill.add_argument('--yes', action='store_true', help="Não pedir confirmação")
+    p_kill.set_defaults(func=cmd_kill)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    config = load_config()
+
+    recorder = ssh_core.OperationRecorder(jsonl_path=args.timings_jsonl)
+    timing = recorder.start(args.command, args.host)
+    started = time.perf_counter()
+    client = None
+    try:
+        client = connect(args, timing)
+        connected = time.perf_counter()
+        payload, rows = args.func(client, args, config, timing)
+    except Exception as e:
+        recorder.finish(timing, error=f"{type(e).__name__}: {e}")
+        if args.json:
+            print(json.dumps({'host': args.host, 'command': args.command, 'error': str(e)}, ensure_ascii=False))
+        else:
+            print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if client is not None:
+            client.close()
+
+    finished = time.perf_counter()
+    record = recorder.finish(timing)
+    if args.json:
+        payload.update({
+            'host': args.host,
+            'command': args.command,
+            'connect_ms': round((connected - started) * 1000, 1),
+            'elapsed_ms': round((finished - started) * 1000, 1),
+            'steps_ms': record['steps_ms'],
+            'counters': record['counters'],
+        })
+        print(json.dumps(payload, ensure_ascii=False))
+    else:
+        for row in rows:
+            print("\t".join(str(value) for value in row))
+        if 'summary' in payload:
+            print(payload['summary'], file=sys.stderr)
+        if 'source' in payload:
+            print(f"{len(rows)} processo(s) ({payload['source']})", file=sys.stderr)
+        if args.verbose:
+            steps = ", ".join(f"{step} {ms:.1f} ms" for step, ms in record['steps_ms'].items())
+            print(f"Tempos: total {record['total_ms']:.1f} ms ({steps})", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1817 @@
+"""Núcleo SSH do Gerenciador SSH Avançado, sem dependência de interface gráfica
+
+Conexão e pool, listagem e filtragem de processos, conversa com o menu COBOL,
+consultas de travas (matrícula/tela) e derrubada de processos. Usado pela
+interface Tk (Cobol_Python_v10_Final.py), pela linha de comando (ssh_cli.py)
+e pelos benchmarks.
+"""
+import paramiko
+import os
+import logging
+import threading
+import time
+import re
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+import fnmatch
+import bisect
+import selectors
+import codecs
+import shlex
+import socket
+import json
+import math
+import http.server
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('ssh_tool')
+
+# Filtro permanente padrão: usuários de sistema ocultados da listagem
+DEFAULT_PERMANENT_FILTER = {
+    'users': ['root', 'zabbix', 'sshd', 'postfix', 'nscd', 'message+', 'usertra+'],
+    'commands': []  # Pode ser estendido
+}
+
+class SSHConnectionPool:
+    """Pool de conexões SSH autenticadas, indexado por (host, usuário, porta)
+
+    Mantém os Transports do paramiko vivos entre trocas de host, para que voltar
+    a um servidor usado recentemente não exija novo handshake e autenticação.
+    Cada get/put registra um uso, devolvido por release ou discard; um cliente
+    substituído ou descartado enquanto outros o usam só é fechado no último uso.
+    """
+    def __init__(self, max_size=8, idle_timeout=600):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._entries = OrderedDict()  # chave -> {'client', 'last_used', 'refs'}
+        self._retired = []  # entradas fora do pool ainda em uso, fechadas no último release
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(host, user, port):
+        """Normaliza a chave do pool"""
+        return (host.strip().lower(), user.strip(), int(port))
+
+    @staticmethod
+    def is_alive(client):
+        """Verifica se o Transport do cliente ainda está ativo"""
+        try:
+            transport = client.get_transport()
+            return transport is not None and transport.is_active()
+        except Exception:
+            return False
+
+    def get(self, host, user, port):
+        """Retorna um cliente vivo do pool (ou None), registrando mais um uso"""
+        key = self.make_key(host, user, port)
+        dead = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not self.is_alive(entry['client']):
+                dead = self._entries.pop(key)['client']
+            else:
+                entry['refs'] += 1
+                entry['last_used'] = time.monotonic()
+                self._entries.move_to_end(key)
+                return entry['client']
+        self._close_clients([dead])
+        return None
+
+    def has(self, host, user, port):
+        """Indica se existe conexão viva no pool para a chave"""
+        key = self.make_key(host, user, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self.is_alive(entry['client'])
+
+    def put(self, host, user, port, client):
+        """Adiciona um cliente recém-conectado ao pool, registrando um uso"""
+        key = self.make_key(host, user, port)
+        to_close = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            refs = 1
+            if old is not None and old['client'] is client:
+                refs += old['refs']
+            elif old is not None:
+                self._retire(old, to_close)
+            self._entries[key] = {
+                'client': client,
+                'last_used': time.monotonic(),
+                'refs': refs
+            }
+            # Respeitar o tamanho máximo removendo as conexões ociosas mais antigas
+            for old_key in list(self._entries):
+                if len(self._entries) <= self.max_size:
+                    break
+                if self._entries[old_key]['refs'] <= 0:
+                    to_close.append(self._entries.pop(old_key)['client'])
+        self._close_clients(to_close)
+
+    def release(self, host, user, port, client=None):
+        """Devolve o cliente ao pool, mantendo a conexão aberta
+
+        Informar client garante que o uso devolvido é o dele, mesmo que a
+        chave já aponte para outra conexão.
+        """
+        key = self.make_key(host, user, port)
+        to_close = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (client is None or entry['client'] is client):
+                entry['refs'] = max(0, entry['refs'] - 1)
+                entry['last_used'] = time.monotonic()
+            else:
+                self._release_retired(client, to_close)
+        self._close_clients(to_close)
+
+    def discard(self, host, user, port, client=None):
+        """Remove a conexão associada à chave, devolvendo o uso de quem a descarta
+
+        A conexão é fechada agora ou, se outros ainda a usam, no último release.
+        """
+        key = self.make_key(host, user, port)
+        to_close = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (client is None or entry['client'] is client):
+                del self._entries[key]
+                entry['refs'] -= 1
+                self._retire(entry, to_close)
+            else:
+                self._release_retired(client, to_close)
+        self._close_clients(to_close)
+
+    def _retire(self, entry, to_close):
+        """Tira a entrada do pool: fecha já ou no último uso (chamado com o lock)"""
+        if entry['refs'] > 0:
+            self._retired.append(entry)
+        else:
+            to_close.append(entry['client'])
+
+    def _release_retired(self, client, to_close):
+        """Devolve um uso de um cliente já retirado do pool (chamado com o lock)"""
+        for entry in self._retired:
+            if entry['client'] is client:
+                entry['refs'] -= 1
+                if entry['refs'] <= 0:
+                    self._retired.remove(entry)
+                    to_close.append(client)
+                return
+
+    def evict_idle(self):
+        """Fecha conexões ociosas além do tempo limite ou já encerradas"""
+        now = time.monotonic()
+        to_close = []
+        with self._lock:
+            for key in list(self._entries):
+                entry = self._entries[key]
+                expired = entry['refs'] <= 0 and now - entry['last_used'] > self.idle_timeout
+                if expired or not self.is_alive(entry['client']):
+                    to_close.append(self._entries.pop(key)['client'])
+        self._close_clients(to_close)
+        return len(to_close)
+
+    def close_all(self):
+        """Fecha todas as conexões do pool"""
+        with self._lock:
+            clients = [entry['client'] for entry in self._entries.values()]
+            clients += [entry['client'] for entry in self._retired]
+            self._entries.clear()
+            self._retired = []
+        self._close_clients(clients)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Conexões no pool, quantas estão em uso e canais abertos nos seus Transports"""
+        with self._lock:
+            entries = list(self._entries.values()) + self._retired
+        return {
+            'connections': len(entries),
+            'in_use': sum(1 for entry in entries if entry['refs'] > 0),
+            'channels': sum(self.open_channels(entry['client']) for entry in entries),
+        }
+
+    @staticmethod
+    def open_channels(client):
+        """Canais abertos no Transport do cliente (0 se indisponível)"""
+        try:
+            # O paramiko não expõe a contagem de canais publicamente
+            return len(client.get_transport()._channels)
+        except Exception:
+            return 0
+
+    def _close_clients(self, clients):
+        for client in clients:
+            if client is None:
+                continue
+            try:
+                client.close()
+            except Exception as e:
+                logger.error(f"Erro ao fechar conexão do pool: {str(e)}")
+
+class QueryResultCache:
+    """Cache dos resultados das consultas de travas, indexado por (sessão, caminho, padrão)
+
+    A sessão identifica a conexão consultada, por exemplo a chave
+    (host, usuário, porta) do SSHConnectionPool. Entradas expiram após ttl segundos; além de max_entries, as menos usadas
+    são descartadas. Derrubar processos invalida as entradas que os contêm.
+    """
+    def __init__(self, ttl=60, max_entries=200):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # chave -> (instante, linhas)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(session, path, pattern):
+        """Normaliza a chave do cache"""
+        return (session, path.rstrip('/'), pattern)
+
+    def get(self, session, path, pattern):
+        """Retorna (linhas, idade em segundos) ou None se ausente/expirado"""
+        if not self.enabled:
+            return None
+        key = self.make_key(session, path, pattern)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(entry[1]), age
+
+    def put(self, session, path, pattern, rows):
+        """Armazena as linhas de uma consulta concluída"""
+        if not self.enabled:
+            return
+        key = self.make_key(session, path, pattern)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), tuple(rows))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_pids(self, session, pids):
+        """Remove as entradas da sessão que contêm algum dos PIDs informados"""
+        pids = {str(pid) for pid in pids}
+        with self._lock:
+            stale = [
+                key for key, (_, rows) in self._entries.items()
+                if key[0] == session and any(row[1] in pids for row in rows)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+# Listagem completa de processos (filtrada no cliente)
+PS_AUX_COMMAND = "ps aux"
+
+def _awk_regex_escape(text):
+    """Escapa texto literal para uso dentro de /regex/ do awk"""
+    return re.sub(r'([\\^$.|?*+()\[\]{}/])', r'\\\1', text)
+
+def _awk_string_escape(text):
+    """Escapa texto literal para uso dentro de "string" do awk"""
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+def build_server_ps_command(permanent_filter, user_filter="", pid_filter="", cmd_filter=""):
+    """Monta um 'ps' projetado (USER PID TIME COMANDO) com os filtros aplicados no servidor
+
+    Os usuários bloqueados usam a mesma regra do filtro local (nome exato, com
+    '+' opcional de truncamento) e os comandos bloqueados e filtros voláteis
+    são comparados como trechos, sem diferenciar maiúsculas. O PID também
+    casa por trecho, como no filtro local.
+    """
+    rules = ["u = tolower($1)"]
+    
+    users = [u for u in permanent_filter.get('users', []) if u]
+    if users:
+        alternation = "|".join(_awk_regex_escape(u.lower()) for u in users)
+        rules.append(f"if (u ~ /^({alternation})\\+?$/) next")
+    
+    # Comando = linha sem as três primeiras colunas
+    rules.append('cmd = $0; for (i = 0; i < 3; i++) sub(/^[ \\t]*[^ \\t]+/, "", cmd); sub(/^[ \\t]+/, "", cmd)')
+    rules.append("lc = tolower(cmd)")
+    
+    for blocked_cmd in permanent_filter.get('commands', []):
+        if blocked_cmd:
+            rules.append(f'if (index(lc, "{_awk_string_escape(blocked_cmd.lower())}")) next')
+    
+    # Filtros voláteis
+    if user_filter:
+        rules.append(f'if (!index(u, "{_awk_string_escape(user_filter.lower())}")) next')
+    if pid_filter:
+        rules.append(f'if (!index($2, "{_awk_string_escape(pid_filter)}")) next')
+    if cmd_filter:
+        rules.append(f'if (!index(lc, "{_awk_string_escape(cmd_filter.lower())}")) next')
+    
+    rules.append("print $1, $2, $3, cmd")
+    program = "{ " + "; ".join(rules) + " }"
+    return f"ps -eo user=,pid=,bsdtime=,args= | awk {shlex.quote(program)}"
+
+class ProcessSnapshotParser:
+    """Interpreta a saída do ps de forma incremental, linha a linha
+
+    Recebe blocos de bytes à medida que chegam do canal, decodifica de forma
+    incremental (sem quebrar caracteres multibyte) e mantém em memória apenas
+    a linha ainda incompleta.
+    """
+    def __init__(self, matcher, projected=False):
+        self.matcher = matcher
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self._partial = ""
+        # 'ps aux' tem cabeçalho e 11 colunas; a versão projetada tem apenas
+        # USER PID TIME COMANDO, sem cabeçalho
+        self._skip_header = not projected
+        self.maxsplit, self.time_col = (3, 2) if projected else (10, 9)
+
+    def feed(self, data):
+        """Consome um bloco de bytes e retorna os processos das linhas completas"""
+        text = self._partial + self._decoder.decode(data)
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        return self._parse_lines(lines)
+
+    def close(self):
+        """Finaliza a leitura, interpretando a última linha pendente"""
+        text = self._partial + self._decoder.decode(b'', final=True)
+        self._partial = ""
+        return self._parse_lines([text])
+
+    def _parse_lines(self, lines):
+        processes = []
+        maxsplit = self.maxsplit
+        for line in lines:
+            if self._skip_header:
+                self._skip_header = False  # Ignorar cabeçalho
+                continue
+            if not line.strip():
+                continue
+            parts = line.split(maxsplit=maxsplit)
+            if len(parts) > maxsplit:
+                user = parts[0]
+                command = parts[maxsplit].rstrip('\r')
+                
+                # Aplicar filtro permanente
+                if not self.matcher.is_blocked(user, command):
+                    processes.append({
+                        'user': user,
+                        'pid': parts[1],
+                        'idle': parts[self.time_col],  # TIME
+                        'command': command
+                    })
+        return processes
+
+class PermanentFilterMatcher:
+    """Filtro permanente compilado uma única vez
+
+    Usuários bloqueados viram uma única expressão ancorada (com o '+' de nomes
+    truncados pelo ps opcional) e os comandos bloqueados uma única alternância
+    de trechos literais, avaliadas pelo motor de regex em C.
+    """
+    def __init__(self, permanent_filter):
+        users = [u for u in permanent_filter.get('users', []) if u]
+        commands = [c for c in permanent_filter.get('commands', []) if c]
+        
+        self.users_regex = None
+        if users:
+            alternation = "|".join(re.escape(u) for u in users)
+            self.users_regex = re.compile(rf'^(?:{alternation})(\+)?$', re.IGNORECASE)
+        
+        self.commands_regex = None
+        if commands:
+            alternation = "|".join(re.escape(c) for c in commands)
+            self.commands_regex = re.compile(alternation, re.IGNORECASE)
+
+    def is_blocked(self, user, command):
+        """Indica se o processo deve ser ocultado"""
+        if self.users_regex is not None and self.users_regex.match(user):
+            return True
+        if self.commands_regex is not None and self.commands_regex.search(command):
+            return True
+        return False
+
+def parse_cpu_time(value):
+    """Converte o TIME do ps ("M:SS", "HH:MM:SS" ou "D-HH:MM:SS") em segundos"""
+    text = str(value).strip()
+    days = 0
+    if '-' in text:
+        day_text, text = text.split('-', 1)
+        days = int(day_text) if day_text.isdigit() else 0
+    seconds = 0.0
+    for part in text.split(':'):
+        try:
+            seconds = seconds * 60 + float(part)
+        except ValueError:
+            return -1.0
+    return days * 86400 + seconds
+
+class ProcessIndex:
+    """Índice em memória de uma lista de processos para a filtragem ao digitar
+
+    Construído uma vez por lista: campos já em minúsculas, mapa usuário →
+    posições e índice das palavras do comando; o PID casa por trecho. Um filtro que apenas estende o anterior (o operador continua
+    digitando) é avaliado somente sobre o resultado anterior.
+    """
+    def __init__(self, processes):
+        self.source = processes
+        self.processes = list(processes)
+        self.user_lower = []
+        self.command_lower = []
+        self.users = {}   # usuário em minúsculas -> posições
+        self.tokens = {}  # palavra do comando em minúsculas -> posições
+        for position, proc in enumerate(self.processes):
+            user = proc['user'].lower()
+            command = proc['command'].lower()
+            self.user_lower.append(user)
+            self.command_lower.append(command)
+            self.users.setdefault(user, []).append(position)
+            for token in set(command.split()):
+                self.tokens.setdefault(token, []).append(position)
+        self.pids = [proc['pid'] for proc in self.processes]
+        self._last = None  # (filtros, posições) da última consulta
+
+    def _matches(self, position, user, pid, cmd):
+        return ((not user or user in self.user_lower[position])
+                and (not pid or pid in self.pids[position])
+                and (not cmd or cmd in self.command_lower[position]))
+
+    def _lookup(self, user, pid, cmd):
+        """Posições que passam nos filtros, combinando os índices de cada campo"""
+        sets = []
+        if user:
+            sets.append({p for name, positions in self.users.items() if user in name for p in positions})
+        if pid:
+            sets.append({p for p, key in enumerate(self.pids) if pid in key})
+        if cmd:
+            if any(ch.isspace() for ch in cmd):
+                # Trecho com espaços pode abranger várias palavras
+                candidates = set.intersection(*sets) if sets else range(len(self.processes))
+                sets.append({p for p in candidates if cmd in self.command_lower[p]})
+            else:
+                sets.append({p for token, positions in self.tokens.items() if cmd in token for p in positions})
+        sets.sort(key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            result = result & other
+        return sorted(result)
+
+    def filter(self, user="", pid="", cmd=""):
+        """Retorna os processos (na ordem original) que passam nos filtros voláteis"""
+        user, pid, cmd = user.lower().strip(), pid.strip(), cmd.lower().strip()
+        key = (user, pid, cmd)
+        if not any(key):
+            self._last = None
+            return list(self.processes)
+        
+        last = self._last
+        if last is not None and last[0] == key:
+            positions = last[1]
+        elif (last is not None and last[0][0] in user and last[0][1] in pid
+              and last[0][2] in cmd):
+            # Filtro mais restrito que o anterior: basta refinar o resultado anterior
+            positions = [p for p in last[1] if self._matches(p, user, pid, cmd)]
+        else:
+            positions = self._lookup(user, pid, cmd)
+        self._last = (key, positions)
+        return [self.processes[p] for p in positions]
+
+# ===== Instrumentação por operação =====
+
+def percentile(values, fraction):
+    """Percentil (posição mais próxima) de uma lista de valores"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))]
+
+class OperationTiming:
+    """Tempos por etapa de uma operação (conexão, canal, execução, transferência, parsing...)
+
+    As etapas acumulam: canais paralelos somam seus tempos e a conversa com
+    o menu inclui o parsing feito durante ela. Os contadores registram
+    volumes como bytes e linhas. Seguro entre threads.
+    """
+    def __init__(self, name, host=""):
+        self.name = name
+        self.host = host
+        self.detail = ""
+        self.error = None
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.total = None
+        self.steps = OrderedDict()
+        self.counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, step, seconds):
+        """Soma 'seconds' ao tempo da etapa"""
+        with self._lock:
+            self.steps[step] = self.steps.get(step, 0.0) + seconds
+
+    def count(self, counter, value=1):
+        """Soma 'value' ao contador (bytes, linhas, PIDs...)"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    @contextmanager
+    def step(self, name):
+        """Cronometra o bloco como a etapa 'name'"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def as_record(self):
+        """Registro serializável (uma linha do JSONL)"""
+        with self._lock:
+            return {
+                'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'op': self.name,
+                'host': self.host,
+                'ok': self.error is None,
+                'total_ms': round((self.total or 0.0) * 1000, 2),
+                'steps_ms': {step: round(seconds * 1000, 2) for step, seconds in self.steps.items()},
+                'counters': dict(self.counters),
+                'detail': self.detail,
+                'error': self.error,
+            }
+
+class _NullTiming:
+    """Substituto sem custo quando a operação não é cronometrada"""
+    def add(self, step, seconds):
+        pass
+
+    def count(self, counter, value=1):
+        pass
+
+    @contextmanager
+    def step(self, name):
+        yield
+
+NULL_TIMING = _NullTiming()
+
+class OperationRecorder:
+    """Histórico recente das operações cronometradas, com percentis e exportação JSONL
+
+    Cada operação concluída vira um registro; com jsonl_path definido, os
+    registros também são acrescentados ao arquivo, um JSON por linha.
+    listeners recebem cada registro (chamados na thread que concluiu a operação).
+    """
+    def __init__(self, max_records=1000, jsonl_path=None):
+        self._records = deque(maxlen=max(1, int(max_records)))
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.jsonl_path = jsonl_path or None
+        self.listeners = []
+
+    def start(self, name, host=""):
+        """Inicia a cronometragem de uma operação"""
+        return OperationTiming(name, host)
+
+    def finish(self, timing, error=None):
+        """Conclui a operação e registra o resultado (uma única vez)"""
+        with timing._lock:
+            if timing.total is not None:
+                return None
+            timing.total = time.perf_counter() - timing.started
+            if error is not None and timing.error is None:
+                timing.error = str(error)
+        record = timing.as_record()
+        with self._lock:
+            self._records.append(record)
+            path = self.jsonl_path
+        if path:
+            self.append_jsonl(path, [record])
+        for listener in list(self.listeners):
+            try:
+                listener(record)
+            except Exception as e:
+                logger.error(f"Erro ao publicar métricas da operação: {str(e)}")
+        return record
+
+    @contextmanager
+    def operation(self, name, host=""):
+        """Cronometra o bloco como uma operação, registrando a exceção como erro"""
+        timing = self.start(name, host)
+        try:
+            yield timing
+        except Exception as e:
+            self.finish(timing, error=f"{type(e).__name__}: {e}")
+            raise
+        self.finish(timing)
+
+    def append_jsonl(self, path, records):
+        """Acrescenta registros ao arquivo JSON-lines"""
+        try:
+            with self._write_lock, open(path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Erro ao gravar tempos em {path}: {str(e)}")
+
+    def records(self):
+        """Registros recentes, do mais antigo ao mais novo"""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """Percentis (p50, p95, máximo, em ms) do total e de cada etapa, por operação e host"""
+        groups = OrderedDict()
+        for record in self.records():
+            group = groups.setdefault((record['op'], record['host']), {
+                'totals': [], 'steps': OrderedDict(), 'errors': 0, 'counters': OrderedDict()
+            })
+            group['totals'].append(record['total_ms'])
+            if not record['ok']:
+                group['errors'] += 1
+            for step, ms in record['steps_ms'].items():
+                group['steps'].setdefault(step, []).append(ms)
+            for counter, value in record['counters'].items():
+                group['counters'][counter] = group['counters'].get(counter, 0) + value
+        
+        def stats(values):
+            return {'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95), 'max': max(values)}
+        
+        return [
+            {
+                'op': op, 'host': host, 'count': len(group['totals']), 'errors': group['errors'],
+                'total': stats(group['totals']),
+                'steps': OrderedDict((step, stats(values)) for step, values in group['steps'].items()),
+                'counters': group['counters'],
+            }
+            for (op, host), group in groups.items()
+        ]
+
+# ===== Métricas (exposição no formato do Prometheus) =====
+
+# Limites dos histogramas, em segundos
+METRICS_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_STALL_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_metric_value(value):
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+def _format_metric_labels(labels):
+    """{nome="valor",...} com o escape do formato texto"""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class MetricsRegistry:
+    """Contadores, medidores e histogramas exportados no formato texto do Prometheus
+
+    observe_operation é inscrito em OperationRecorder.listeners e converte cada
+    operação concluída em métricas. collectors são chamados a cada exposição
+    e retornam medidores do momento como [(nome, {rótulos}, valor)].
+    """
+    def __init__(self, prefix='ssh_tool'):
+        self.prefix = prefix
+        self._metrics = OrderedDict()  # nome -> {'kind', 'help', 'buckets', 'samples'}
+        self._lock = threading.Lock()
+        self.collectors = []
+        self.describe('start_time_seconds', 'gauge', "Início do processo (epoch)")
+        self.set('start_time_seconds', time.time())
+        self.describe('operations_total', 'counter', "Operações concluídas por tipo, host e resultado")
+        self.describe('operation_duration_seconds', 'histogram', "Duração das operações",
+                      METRICS_LATENCY_BUCKETS)
+        self.describe('operation_step_seconds_total', 'counter', "Tempo acumulado por etapa das operações")
+        self.describe('operation_items_total', 'counter', "Volumes das operações (bytes, linhas, PIDs...)")
+        self.describe('connections_total', 'counter', "Conexões SSH abertas por host e resultado")
+        self.describe('channels_opened_total', 'counter', "Canais SSH abertos pelas operações")
+        self.describe('kills_total', 'counter', "PIDs tratados pelas derrubadas, por status")
+        self.describe('ui_stall_seconds', 'histogram', "Atraso do laço de eventos da interface",
+                      METRICS_STALL_BUCKETS)
+
+    def describe(self, name, kind, help_text, buckets=None):
+        """Declara uma métrica ('counter', 'gauge' ou 'histogram')"""
+        with self._lock:
+            self._metrics.setdefault(name, {
+                'kind': kind, 'help': help_text, 'buckets': tuple(buckets or ()), 'samples': OrderedDict()
+            })
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Soma 'value' ao contador"""
+        key = self._key(labels)
+        with self._lock:
+            samples = self._metrics[name]['samples']
+            samples[key] = samples.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Define o valor atual do medidor"""
+        with self._lock:
+            self._metrics[name]['samples'][self._key(labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Registra uma observação no histograma"""
+        key = self._key(labels)
+        with self._lock:
+            metric = self._metrics[name]
+            sample = metric['samples'].get(key)
+            if sample is None:
+                sample = metric['samples'][key] = {'counts': [0] * len(metric['buckets']), 'sum': 0.0, 'count': 0}
+            index = bisect.bisect_left(metric['buckets'], value)
+            if index < len(metric['buckets']):
+                sample['counts'][index] += 1
+            sample['sum'] += value
+            sample['count'] += 1
+
+    def observe_operation(self, record):
+        """Converte o registro de uma operação (OperationRecorder) em métricas"""
+        op, host = record['op'], record['host']
+        self.inc('operations_total', op=op, host=host, result='ok' if record['ok'] else 'error')
+        self.observe('operation_duration_seconds', record['total_ms'] / 1000, op=op)
+        for step, ms in record['steps_ms'].items():
+            self.inc('operation_step_seconds_total', ms / 1000, op=op, step=step)
+        for counter, value in record['counters'].items():
+            if counter == 'connections':
+                self.inc('connections_total', value, host=host, result='ok')
+            elif counter == 'connection_failures':
+                self.inc('connections_total', value, host=host, result='error')
+            elif counter == 'channels':
+                self.inc('channels_opened_total', value, op=op)
+            elif counter.startswith('kill_'):
+                self.inc('kills_total', value, op=op, status=counter[len('kill_'):])
+            else:
+                self.inc('operation_items_total', value, op=op, item=counter)
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        collected = []
+        for collector in list(self.collectors):
+            try:
+                collected.extend(collector())
+            except Exception as e:
+                logger.error(f"Erro ao coletar métricas: {str(e)}")
+        for name, labels, value in collected:
+            self.set(name, value, **labels)
+        
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full_name} {metric['help']}")
+                lines.append(f"# TYPE {full_name} {metric['kind']}")
+                for key, sample in metric['samples'].items():
+                    if metric['kind'] != 'histogram':
+                        lines.append(f"{full_name}{_format_metric_labels(key)} {_format_metric_value(sample)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(metric['buckets'], sample['counts']):
+                        cumulative += count
+                        labels = _format_metric_labels(key + (('le', _format_metric_value(bound)),))
+                        lines.append(f"{full_name}_bucket{labels} {cumulative}")
+                    labels = _format_metric_labels(key + (('le', '+Inf'),))
+                    lines.append(f"{full_name}_bucket{labels} {sample['count']}")
+                    lines.append(f"{full_name}_sum{_format_metric_labels(key)} {_format_metric_value(sample['sum'])}")
+                    lines.append(f"{full_name}_count{_format_metric_labels(key)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Publica um MetricsRegistry por HTTP (GET /metrics) e/ou em um arquivo texto
+
+    O servidor HTTP escuta apenas em bind (localhost por padrão). O arquivo é
+    reescrito a cada interval segundos via arquivo temporário e renomeação,
+    como espera o coletor textfile do node_exporter.
+    """
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    
+    def __init__(self, registry, port=None, bind='127.0.0.1', textfile=None, interval=15):
+        self.registry = registry
+        self.port = port or None
+        self.bind = bind or '127.0.0.1'
+        self.textfile = textfile or None
+        self.interval = max(1.0, float(interval))
+        self._server = None
+        self._stop = threading.Event()
+        self._writer = None
+
+    def start(self):
+        """Inicia o servidor HTTP e a gravação do arquivo configurados (OSError se a porta estiver ocupada)"""
+        self._stop.clear()
+        if self.port and self._server is None:
+            registry = self.registry
+            content_type = self.CONTENT_TYPE
+            
+            class Handler(http.server.BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                
+                def log_message(self, format, *args):
+                    logger.debug(f"Métricas: {format % args}")
+            
+            self._server = http.server.ThreadingHTTPServer((self.bind, int(self.port)), Handler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            logger.info(f"Métricas em http://{self.bind}:{self.port}/metrics")
+        if self.textfile and self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+
+    def stop(self):
+        """Encerra o servidor HTTP e grava o arquivo uma última vez"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+            self._writer = None
+
+    def describe(self):
+        """Destinos ativos em texto curto"""
+        targets = []
+        if self._server is not None:
+            targets.append(f"http://{self.bind}:{self.port}/metrics")
+        if self._writer is not None:
+            targets.append(self.textfile)
+        return ", ".join(targets)
+
+    def write_textfile(self):
+        """Reescreve o arquivo de métricas de forma atômica"""
+        tmp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.registry.render())
+            os.replace(tmp_path, self.textfile)
+        except OSError as e:
+            logger.error(f"Erro ao gravar métricas em {self.textfile}: {str(e)}")
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+        self.write_textfile()
+
+def exec_command_timed(client, command, timeout, timing=None):
+    """exec_command registrando a abertura do canal e o pedido de execução ('channel', 'channels')"""
+    started = time.perf_counter()
+    result = client.exec_command(command, timeout=timeout)
+    timing = timing or NULL_TIMING
+    timing.add('channel', time.perf_counter() - started)
+    timing.count('channels')
+    return result
+
+def read_channel(channel, on_data, timing=None, read_chunk=32768):
+    """Lê um canal de execução até o fim, entregando cada bloco de bytes a on_data
+
+    Registra a espera até o primeiro byte ('exec'), a transferência
+    ('transfer', sem o tempo gasto em on_data, registrado como 'parse') e
+    o volume ('bytes').
+    """
+    timing = timing or NULL_TIMING
+    started = time.perf_counter()
+    first = None
+    handling = 0.0
+    nbytes = 0
+    while True:
+        data = channel.recv(read_chunk)
+        if first is None:
+            first = time.perf_counter()
+            timing.add('exec', first - started)
+        if not data:
+            break
+        nbytes += len(data)
+        handled = time.perf_counter()
+        on_data(data)
+        handling += time.perf_counter() - handled
+    timing.add('transfer', time.perf_counter() - first - handling)
+    timing.add('parse', handling)
+    timing.count('bytes', nbytes)
+
+def read_command_output(stdout, stderr, timing=None, read_chunk=32768):
+    """Lê a saída e os erros de um comando juntos e retorna (saída, erros) em bytes
+
+    O stderr é drenado em paralelo: um comando que escreve muito nele não
+    trava esperando a janela do canal enquanto o stdout é lido.
+    """
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(stderr.read()), daemon=True)
+    reader.start()
+    chunks = []
+    read_channel(stdout.channel, chunks.append, timing, read_chunk)
+    reader.join()
+    return b"".join(chunks), b"".join(errors)
+
+def open_ssh_client(host, user, password, port=22, policy=None, timing=None):
+    """Abre uma conexão SSH autenticada (levanta exceção em caso de falha)
+
+    Sem política informada, hosts ausentes do known_hosts são rejeitados.
+    timing recebe as etapas 'tcp' e 'handshake' (todo o connect() do
+    paramiko: troca de chaves, verificação da host key e autenticação) e os
+    contadores 'connections' ou 'connection_failures'.
+    """
+    timing = timing or NULL_TIMING
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(policy or paramiko.RejectPolicy())
+    
+    try:
+        client.load_system_host_keys()
+    except Exception:
+        logger.warning("Não foi possível carregar host keys do sistema")
+    
+    sock = None
+    try:
+        with timing.step('tcp'):
+            sock = socket.create_connection((host, port), timeout=10)
+        with timing.step('handshake'):
+            client.connect(
+                hostname=host,
+                username=user,
+                password=password,
+                port=port,
+                timeout=10,
+                banner_timeout=20,
+                sock=sock
+            )
+    except Exception:
+        timing.count('connection_failures')
+        client.close()
+        if sock is not None:
+            sock.close()
+        raise
+    timing.count('connections')
+    
+    # Manter o transporte vivo enquanto estiver ocioso no pool
+    transport = client.get_transport()
+    if transport is not None:
+        transport.set_keepalive(30)
+    return client
+
+# Prompts do menu COBOL (regex avaliadas no fim da saída recebida).
+# Podem ser sobrescritos pela chave 'menu_prompts' da configuração.
+MENU_PROMPTS = {
+    'menu': r'(?i)(op[cç][aã]o|escolha|selecione)[^\n]*[:>?]\s*$',
+    'path': r'(?i)(caminho|diret[oó]rio|path)[^\n]*[:>?]\s*$',
+    'pattern': r'(?i)(padr[aã]o|arquivo|pesquis|nome)[^\n]*[:>?]\s*$',
+    'pids': r'(?i)pids?[^\n]*[:>?]\s*$',
+    # Linha própria iniciada pelo verbo: linhas da tabela (ex.: ENTERPRISE01.dat) não casam
+    'continue': r'(?im)^[ \t]*(tecle|pressione|aperte|press)\b[^\n]*\benter\b[^\n]*$',
+    # Rodapé da tabela de resultados ("N processo(s) encontrado(s)")
+    'table_end': r'(?im)^[ \t]*\d+\s+processo',
+}
+
+# Fluxos do menu descritos como dados: texto enviado em cada passo, prompt
+# esperado em seguida, tempo limite do passo e silêncio aceito como fim da
+# resposta quando o prompt não for reconhecido. Os passos que recebem uma
+# tabela de resultados não aceitam silêncio (quiet None): uma pausa do
+# servidor no meio da tabela não indica que ela terminou. Nesses passos,
+# end_quiet segundos de silêncio depois do rodapé da tabela (prompt
+# 'table_end') também encerram o passo, caso o prompt não seja reconhecido.
+MENU_FLOWS = {
+    # Opção 2: processos com arquivos abertos que casam com o padrão no caminho
+    'consulta': [
+        {'send': '2', 'expect': 'path', 'timeout': 10, 'quiet': 0.5},
+        {'send': '{path}', 'expect': 'pattern', 'timeout': 10, 'quiet': 0.5},
+        {'send': '{pattern}', 'expect': 'continue', 'timeout': 60, 'quiet': None,
+         'end': 'table_end', 'end_quiet': 4.0},
+        {'send': '', 'expect': 'menu', 'timeout': 10, 'quiet': 0.5},
+    ],
+    # Opção 3: derrubar a lista de PIDs
+    'derrubar': [
+        {'send': '3', 'expect': 'pids', 'timeout': 10, 'quiet': 0.5},
+        {'send': '{pids}', 'expect': 'continue', 'timeout': 30, 'quiet': None},
+        {'send': '', 'expect': 'menu', 'timeout': 10, 'quiet': 0.5},
+    ],
+}
+
+class MenuExpect:
+    """Motor estilo expect sobre a saída do menu COBOL
+
+    Recebe a saída do canal via feed() e permite aguardar um prompt, com
+    tempo limite, em vez de pausas fixas. Só acumula saída entre begin() e
+    end(); os blocos são guardados em lista e os prompts procurados apenas
+    no trecho final, sem concatenações repetidas do buffer inteiro.
+    """
+    # Trecho final da saída onde os prompts são procurados
+    PROMPT_WINDOW = 2048
+
+    def __init__(self, on_output=None):
+        self._cond = threading.Condition()
+        self._chunks = []
+        self._length = 0
+        self._tail = ""
+        self._active = False
+        self._received_at = 0.0
+        # Chamado com cada bloco recebido durante a captura (ex.: parser incremental)
+        self.on_output = on_output
+
+    def begin(self):
+        """Inicia a captura de uma conversa com o menu"""
+        with self._cond:
+            self._chunks = []
+            self._length = 0
+            self._tail = ""
+            self._active = True
+
+    def end(self):
+        """Encerra a captura e retorna toda a saída recebida"""
+        with self._cond:
+            self._active = False
+            text = "".join(self._chunks)
+            self._chunks = []
+            self._length = 0
+            self._tail = ""
+            return text
+
+    def feed(self, text):
+        """Entrega saída recebida do servidor (seguro entre threads)"""
+        with self._cond:
+            if not self._active or not text:
+                return
+            self._chunks.append(text)
+            self._length += len(text)
+            self._tail = (self._tail + text)[-2 * self.PROMPT_WINDOW:]
+            self._received_at = time.monotonic()
+            self._cond.notify_all()
+        if self.on_output is not None:
+            self.on_output(text)
+
+    def mark(self):
+        """Posição atual da saída recebida"""
+        with self._cond:
+            return self._length
+
+    def wait_for(self, regex, start, timeout, quiet=0.5, min_bytes=0, end_regex=None, end_quiet=None):
+        """Aguarda o prompt após 'start'
+
+        Retorna 'prompt' se o padrão apareceu, 'quiet' se a saída parou por
+        'quiet' segundos depois de ao menos min_bytes novos (eco do envio),
+        'end' se parou por end_quiet segundos depois de end_regex aparecer ou
+        'timeout'. Com quiet None, só o prompt, o fim ou o tempo limite encerram.
+        """
+        deadline = time.monotonic() + timeout
+        ended = False
+        with self._cond:
+            while True:
+                received = self._length - start
+                if received > 0:
+                    tail_offset = self._length - len(self._tail)
+                    search_from = max(start - tail_offset, len(self._tail) - self.PROMPT_WINDOW, 0)
+                    if regex is not None and regex.search(self._tail, search_from):
+                        return 'prompt'
+                    if end_regex is not None and not ended:
+                        ended = end_regex.search(self._tail, search_from) is not None
+                
+                now = time.monotonic()
+                answered = received > min_bytes
+                silence = now - self._received_at
+                if answered and quiet and silence >= quiet:
+                    return 'quiet'
+                if ended and end_quiet and silence >= end_quiet:
+                    return 'end'
+                if now >= deadline:
+                    return 'timeout'
+                
+                wait_time = deadline - now
+                if answered and quiet:
+                    wait_time = min(wait_time, quiet - silence)
+                if ended and end_quiet:
+                    wait_time = min(wait_time, end_quiet - silence)
+                self._cond.wait(max(0.01, wait_time))
+
+class QueryResultParser:
+    """Interpreta incrementalmente a saída das consultas (linhas USER PID NAME)
+
+    Consome blocos à medida que chegam, guardando apenas a linha incompleta.
+    Quando o menu imprime o cabeçalho da tabela, só as linhas entre o
+    cabeçalho e o fim da tabela são aceitas, descartando prompts e ecos.
+    """
+    ROW_REGEX = re.compile(r'^(\S+)\s+(\d+)\s+(\S.*)$')
+    HEADER_REGEX = re.compile(r'^\s*USER\s+PID\s+NAME\b', re.IGNORECASE)
+    ANSI_REGEX = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+
+    def __init__(self):
+        self._partial = ""
+        self._seen_header = False
+        self._in_table = False
+        self._seen = set()
+
+    def feed(self, text):
+        """Consome um bloco de texto e retorna as novas linhas da tabela"""
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        return self._parse_lines(lines)
+
+    def close(self):
+        """Interpreta a última linha pendente"""
+        text, self._partial = self._partial, ""
+        return self._parse_lines([text])
+
+    def _parse_lines(self, lines):
+        rows = []
+        for line in lines:
+            line = self.ANSI_REGEX.sub('', line).strip('\r').rstrip()
+            if self.HEADER_REGEX.match(line):
+                self._seen_header = self._in_table = True
+                continue
+            if not line.strip():
+                continue
+            match = self.ROW_REGEX.match(line)
+            if match is None:
+                # Qualquer outra linha encerra a tabela atual
+                self._in_table = False
+                continue
+            if self._seen_header and not self._in_table:
+                continue
+            row = match.groups()
+            if row not in self._seen:
+                self._seen.add(row)
+                rows.append(row)
+        return rows
+
+def compile_menu_prompts(overrides=None):
+    """Compila os prompts do menu, aplicando sobrescritas da configuração"""
+    prompts = dict(MENU_PROMPTS)
+    prompts.update(overrides or {})
+    return {name: re.compile(pattern) for name, pattern in prompts.items() if pattern}
+
+def run_menu_flow(expect, send, flow, params, prompts, is_running=None, on_step=None):
+    """Executa um fluxo do menu passo a passo, aguardando cada prompt
+
+    Retorna a lista de desfechos ('prompt', 'quiet', 'end' ou 'timeout') por
+    passo; só um fluxo em que todos os passos terminaram no prompt (ou, na
+    tabela, no rodapé seguido de silêncio) está completo.
+    """
+    outcomes = []
+    for step in MENU_FLOWS[flow]:
+        if is_running is not None and not is_running():
+            break
+        value = step['send'].format(**params)
+        if on_step is not None:
+            on_step(value)
+        start = expect.mark()
+        send(value + "\n")
+        outcome = expect.wait_for(
+            prompts.get(step['expect']), start, step['timeout'],
+            quiet=step['quiet'], min_bytes=len(value) + 2,
+            end_regex=prompts.get(step.get('end')), end_quiet=step.get('end_quiet')
+        )
+        if outcome == 'end':
+            logger.warning(f"Menu: prompt '{step['expect']}' não reconhecido; tabela encerrada pelo "
+                           f"rodapé (ajuste 'menu_prompts' na configuração)")
+        elif outcome == 'timeout' and expect.mark() - start > len(value) + 2:
+            logger.error(f"Menu: prompt '{step['expect']}' não reconhecido na resposta a '{value}' "
+                         f"(ajuste 'menu_prompts' na configuração)")
+        elif outcome == 'timeout':
+            logger.warning(f"Menu: tempo esgotado aguardando '{step['expect']}' após enviar '{value}'")
+        outcomes.append(outcome)
+    return outcomes
+
+def menu_flow_complete(flow, outcomes):
+    """Indica se todos os passos do fluxo terminaram no prompt esperado (ou no rodapé da tabela)"""
+    return len(outcomes) == len(MENU_FLOWS[flow]) and all(outcome in ('prompt', 'end') for outcome in outcomes)
+
+def pump_channel(channel, expect, stop_event, read_chunk=32768):
+    """Lê um canal até ele fechar, entregando a saída ao MenuExpect"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    selector = selectors.DefaultSelector()
+    try:
+        selector.register(channel.fileno(), selectors.EVENT_READ)
+        while not stop_event.is_set():
+            if not selector.select(timeout=0.5):
+                continue
+            if not channel.recv_ready():
+                if channel.closed or channel.eof_received:
+                    break
+                continue
+            data = channel.recv(read_chunk)
+            if not data:
+                break
+            expect.feed(decoder.decode(data))
+    except Exception as e:
+        if not stop_event.is_set():
+            logger.error(f"Erro na leitura do canal do menu: {str(e)}")
+    finally:
+        selector.close()
+
+def run_channel_menu_flow(client, flow, params, prompts, is_running=None, login_timeout=15,
+                          on_output=None, timing=None):
+    """Executa um fluxo do menu em um canal interativo próprio e retorna os desfechos
+
+    O canal é aberto no mesmo Transport da conexão, isolado do terminal
+    interativo, e fechado ao final. A largura do pty evita quebra das linhas
+    longas da tabela de resultados. on_output recebe cada bloco recebido após
+    o menu inicial. timing recebe 'channel', 'login', 'menu' e 'channels'.
+    """
+    timing = timing or NULL_TIMING
+    with timing.step('channel'):
+        channel = client.invoke_shell(width=250, height=50)
+    timing.count('channels')
+    expect = MenuExpect()
+    stop_event = threading.Event()
+    expect.begin()
+    reader = threading.Thread(target=pump_channel, args=(channel, expect, stop_event), daemon=True)
+    reader.start()
+    try:
+        # Aguardar o menu inicial do login
+        with timing.step('login'):
+            login = expect.wait_for(prompts.get('menu'), 0, login_timeout, quiet=1.0)
+        if login == 'timeout':
+            raise paramiko.SSHException("Menu não respondeu no novo canal")
+        
+        expect.on_output = on_output
+        with timing.step('menu'):
+            outcomes = run_menu_flow(expect, channel.send, flow, params, prompts, is_running)
+        logger.info(f"Menu '{flow}' em canal dedicado: {outcomes}")
+        timing.count('bytes', expect.mark())
+        expect.end()
+        return outcomes
+    finally:
+        stop_event.set()
+        try:
+            channel.close()
+        except Exception:
+            pass
+
+# Caracteres aceitos nos padrões da consulta direta (expandidos pelo shell remoto)
+LOCK_QUERY_SAFE_PATTERN = re.compile(r'^[\w.*?\-]*$')
+
+# Script da consulta direta: lista "USER PID NAME" dos processos com arquivos
+# abertos que casam com os globs, via lsof ou, na falta dele, varrendo /proc.
+# Os arquivos ficam nos parâmetros posicionais (sem nova separação nem
+# expansão de nomes com espaços ou curingas) e a varredura de /proc aceita
+# apenas arquivos diretamente no caminho e sem ponto inicial, como a
+# expansão dos globs.
+# Código de saída 4 indica que nenhum dos dois métodos está disponível.
+LOCK_QUERY_SCRIPT = """\
+set --; for f in {globs}; do [ -e "$f" ] && set -- "$@" "$f"; done
+[ $# -gt 0 ] || exit 0
+if command -v lsof >/dev/null 2>&1; then
+  lsof -w -F pLn -- "$@" 2>/dev/null | awk '/^p/ {{pid = substr($0, 2)}} /^L/ {{user = substr($0, 2)}} /^n/ {{print user, pid, substr($0, 2)}}'
+  exit 0
+fi
+[ -d /proc/self/fd ] || exit 4
+for d in /proc/[0-9]*; do
+  pid=${{d#/proc/}}
+  for fd in "$d"/fd/*; do
+    t=$(readlink "$fd" 2>/dev/null) || continue
+    case "$t" in {cases}) ;; *) continue;; esac
+    case "${{t#{path}/}}" in */*|.*) continue;; esac
+    echo "$(stat -c %U "$d" 2>/dev/null) $pid $t"
+  done
+done 2>/dev/null | sort -u
+"""
+
+def build_lock_query_command(path, patterns):
+    """Monta a consulta direta de travas (uma única execução não interativa)
+
+    Retorna None se algum padrão tiver caracteres que não podem ser passados
+    com segurança ao shell remoto.
+    """
+    if not all(LOCK_QUERY_SAFE_PATTERN.match(p) for p in patterns):
+        return None
+    quoted_path = shlex.quote(path.rstrip('/'))
+    globs = " ".join(f"{quoted_path}/*{p}" for p in patterns)
+    cases = "|".join(f"{quoted_path}/*{p}" for p in patterns)
+    return LOCK_QUERY_SCRIPT.format(globs=globs, cases=cases, path=quoted_path)
+
+def run_direct_lock_query(client, path, patterns, timeout=30, on_output=None, read_chunk=32768,
+                          timing=None):
+    """Executa a consulta direta e retorna a saída "USER PID NAME", ou None se indisponível
+
+    on_output recebe a saída em blocos, à medida que chega.
+    """
+    command = build_lock_query_command(path, patterns)
+    if command is None:
+        return None
+    _, stdout, stderr = exec_command_timed(client, command, timeout, timing)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    chunks = []
+    
+    def on_text(text):
+        if text:
+            chunks.append(text)
+            if on_output is not None:
+                on_output(text)
+    
+    read_channel(stdout.channel, lambda data: on_text(decoder.decode(data)), timing, read_chunk)
+    on_text(decoder.decode(b'', final=True))
+    output = "".join(chunks)
+    error = stderr.read().decode(errors='ignore').strip()
+    exit_status = stdout.channel.recv_exit_status()
+    if exit_status != 0:
+        logger.warning(f"Consulta direta indisponível (status {exit_status}): {error}")
+        return None
+    return output
+
+# Prazo (segundos) para um processo sinalizado terminar antes de ser
+# classificado como ainda ativo: tratadores de sinal e processos em
+# encerramento não somem no mesmo instante
+KILL_GRACE = 2.0
+
+# Funções comuns aos scripts de PIDs: alive_pid ignora zumbis (State Z em
+# /proc) e tick espera 0,2 s (1 s onde o sleep só aceita inteiros),
+# contando em t os intervalos de 0,2 s decorridos
+PID_SHELL_FUNCTIONS = """\
+alive_pid() {{
+  {{ kill -0 "$1" 2>/dev/null || [ -d "/proc/$1" ]; }} || return 1
+  [ "$(sed -n 's/^State:[[:space:]]*\\(.\\).*/\\1/p' "/proc/$1/status" 2>/dev/null)" != Z ]
+}}
+tick() {{
+  if sleep 0.2 2>/dev/null; then t=$((t+1)); else sleep 1; t=$((t+5)); fi
+}}
+"""
+
+# Derrubada em massa: uma execução remota por lote de PIDs, com o resultado
+# de cada PID em uma linha "PID STATUS". Os sinalizados são verificados a
+# cada 0,2 s por até {ticks} intervalos; os que não terminam recebem KILL
+# quando {escalate} = 1.
+BULK_KILL_SCRIPT = PID_SHELL_FUNCTIONS + """\
+sent=""
+for p in {pids}; do
+  if err=$(kill -{signal} "$p" 2>&1); then
+    sent="$sent $p"
+  else
+    case "$err" in
+      *[Nn]o\ such\ process*) echo "$p gone";;
+      *[Nn]ot\ permitted*|*[Pp]ermission*) echo "$p denied";;
+      *) echo "$p error";;
+    esac
+  fi
+done
+t=0
+while :; do
+  alive=""
+  for p in $sent; do
+    if alive_pid "$p"; then alive="$alive $p"; else echo "$p killed"; fi
+  done
+  sent=$alive
+  [ -n "$sent" ] && [ $t -lt {ticks} ] || break
+  tick
+done
+[ -n "$sent" ] || exit 0
+if [ {escalate} = 1 ]; then
+  for p in $sent; do kill -KILL "$p" 2>/dev/null; done
+  t=0
+  while :; do
+    alive=""
+    for p in $sent; do
+      if alive_pid "$p"; then alive="$alive $p"; else echo "$p killed_force"; fi
+    done
+    sent=$alive
+    [ -n "$sent" ] && [ $t -lt {ticks_force} ] || break
+    tick
+  done
+  for p in $sent; do echo "$p alive"; done
+else
+  for p in $sent; do echo "$p alive"; done
+fi
+"""
+
+# Verificação de PIDs: "PID alive", "PID gone" ou "PID denied" (ativo, mas
+# sem permissão para sinalizá-lo) para cada um, aguardando por até {ticks}
+# intervalos de 0,2 s que os ativos terminem
+PID_PROBE_SCRIPT = PID_SHELL_FUNCTIONS + """\
+pending="{pids}"
+t=0
+while :; do
+  alive=""
+  for p in $pending; do
+    if alive_pid "$p"; then alive="$alive $p"; else echo "$p gone"; fi
+  done
+  pending=$alive
+  [ -n "$pending" ] && [ $t -lt {ticks} ] || break
+  tick
+done
+for p in $pending; do
+  if err=$(kill -0 "$p" 2>&1); then echo "$p alive"; else
+    case "$err" in
+      *[Nn]ot\ permitted*|*[Pp]ermission*) echo "$p denied";;
+      *) echo "$p alive";;
+    esac
+  fi
+done
+"""
+
+def grace_ticks(seconds):
+    """Intervalos de 0,2 s dos scripts de PIDs equivalentes a 'seconds'"""
+    return max(0, int(round(float(seconds) * 5)))
+
+# Resultados possíveis por PID e seus rótulos na interface
+KILL_STATUS_LABELS = {
+    'killed': "Derrubado",
+    'killed_force': "Derrubado (KILL)",
+    'gone': "Já encerrado",
+    'denied': "Sem permissão",
+    'alive': "Ainda ativo",
+    'invalid': "PID inválido",
+    'error': "Erro",
+}
+
+def chunked(items, size):
+    """Divide uma lista em lotes de até size itens"""
+    size = max(1, int(size))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _run_pid_script(client, script, timeout, timing=None):
+    """Executa um script de PIDs e retorna {pid: status} a partir das linhas PID STATUS"""
+    _, stdout, _ = exec_command_timed(client, script, timeout, timing)
+    chunks = []
+    read_channel(stdout.channel, chunks.append, timing)
+    statuses = {}
+    for line in b"".join(chunks).decode(errors='ignore').splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0].isdigit():
+            statuses[parts[0]] = parts[1]
+    return statuses
+
+def probe_pids(client, pids, chunk_size=500, timeout=30, timing=None, grace=0):
+    """Verifica em uma execução por lote quais PIDs ainda existem ({pid: 'alive'|'gone'|'denied'})
+
+    Com grace (segundos), os ativos são reverificados a cada 0,2 s até
+    terminarem ou o prazo acabar.
+    """
+    statuses = {}
+    for chunk in chunked([pid for pid in pids if pid.isdigit()], chunk_size):
+        statuses.update(_run_pid_script(
+            client, PID_PROBE_SCRIPT.format(pids=" ".join(chunk), ticks=grace_ticks(grace)),
+            timeout + grace, timing
+        ))
+    return statuses
+
+def run_bulk_kill(client, pids, signal='TERM', escalate_after=None, chunk_size=500, timeout=60,
+                  timing=None, grace=KILL_GRACE):
+    """Derruba PIDs em lotes, uma execução remota por lote
+
+    Os processos sinalizados têm grace segundos para terminar antes de
+    serem dados como ativos. Com escalate_after (segundos, no lugar de
+    grace), os que sobrevivem ao sinal recebem KILL. Retorna {pid: status},
+    na ordem informada, com os status de KILL_STATUS_LABELS.
+    """
+    results = OrderedDict((pid, 'invalid') for pid in pids)
+    valid = [pid for pid in results if pid.isdigit()]
+    wait = max(0.0, float(escalate_after)) if escalate_after is not None else grace
+    for chunk in chunked(valid, chunk_size):
+        script = BULK_KILL_SCRIPT.format(
+            pids=" ".join(chunk), signal=signal, ticks=grace_ticks(wait), ticks_force=grace_ticks(grace),
+            escalate=1 if escalate_after is not None else 0
+        )
+        statuses = _run_pid_script(client, script, timeout + wait + grace, timing)
+        for pid in chunk:
+            results[pid] = statuses.get(pid, 'error')
+    return results
+
+class ChannelReadStats:
+    """Estatísticas de uma sessão interativa (latência de resposta, leitura e volume)
+
+    A latência de resposta vai do envio (mark_sent) até a chegada do primeiro
+    dado seguinte; o tempo de leitura vai do seletor acordar até o fim do recv().
+    """
+    def __init__(self):
+        self.started = time.monotonic()
+        self.reads = 0
+        self.bytes = 0
+        self.total_read_time = 0.0
+        self.max_read_time = 0.0
+        self.responses = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.sent_at = None
+
+    def mark_sent(self):
+        """Registra o instante de um envio ao servidor"""
+        self.sent_at = time.monotonic()
+
+    def record(self, nbytes, read_time):
+        """Registra uma leitura e, se houver envio pendente, a latência de resposta"""
+        self.reads += 1
+        self.bytes += nbytes
+        self.total_read_time += read_time
+        self.max_read_time = max(self.max_read_time, read_time)
+        sent_at, self.sent_at = self.sent_at, None
+        if sent_at is not None:
+            latency = time.monotonic() - sent_at
+            self.responses += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def summary(self):
+        """Resumo legível das estatísticas"""
+        read_ms = (self.total_read_time / self.reads * 1000) if self.reads else 0.0
+        latency_ms = (self.total_latency / self.responses * 1000) if self.responses else 0.0
+        return (
+            f"{self.reads} leituras, {self.bytes} bytes em "
+            f"{time.monotonic() - self.started:.1f}s, tempo de leitura médio {read_ms:.2f} ms "
+            f"(máximo {self.max_read_time * 1000:.2f} ms), latência de resposta em "
+            f"{self.responses} envio(s): média {latency_ms:.2f} ms, "
+            f"máxima {self.max_latency * 1000:.2f} ms"
+        )
+
+def summarize_kill_results(results):
+    """Resume os resultados da derrubada por status"""
+    counts = OrderedDict()
+    for status in results.values():
+        counts[status] = counts.get(status, 0) + 1
+    return ", ".join(f"{KILL_STATUS_LABELS.get(status, status)}: {count}"
+                     for status, count in counts.items())
+
+# ===== API de alto nível (usada pela interface, pela linha de comando e pelos benchmarks) =====
+
+def stream_process_snapshot(client, matcher, cmd=PS_AUX_COMMAND, projected=False,
+                            on_rows=None, read_chunk=32768, timing=None):
+    """Executa a listagem de processos, entregando as linhas a on_rows à medida que chegam
+
+    Retorna (processos, erro).
+    """
+    timing = timing or NULL_TIMING
+    _, stdout, stderr = exec_command_timed(client, cmd, 30, timing)
+    parser = ProcessSnapshotParser(matcher, projected)
+    processes = []
+    
+    def deliver(rows):
+        processes.extend(rows)
+        if rows and on_rows is not None:
+            on_rows(rows)
+    
+    read_channel(stdout.channel, lambda data: deliver(parser.feed(data)), timing, read_chunk)
+    with timing.step('parse'):
+        deliver(parser.close())
+    error = stderr.read().decode(errors='ignore').strip()
+    timing.count('rows', len(processes))
+    return processes, error
+
+def fetch_process_snapshot(client, matcher, cmd=PS_AUX_COMMAND, projected=False, read_chunk=32768,
+                           timing=None):
+    """Executa a listagem de processos e retorna (processos, erro)"""
+    return stream_process_snapshot(client, matcher, cmd, projected, read_chunk=read_chunk, timing=timing)
+
+def list_processes(client, permanent_filter, user_filter="", pid_filter="", cmd_filter="",
+                   server_side=True, timing=None):
+    """Lista os processos visíveis, aplicando o filtro permanente e os voláteis
+
+    Com server_side, a filtragem é feita no servidor (awk), voltando ao
+    'ps aux' filtrado localmente se o servidor não oferecer suporte.
+    Retorna (processos, erro).
+    """
+    matcher = PermanentFilterMatcher(permanent_filter)
+    if server_side:
+        command = build_server_ps_command(permanent_filter, user_filter, pid_filter, cmd_filter)
+        processes, error = fetch_process_snapshot(client, matcher, command, projected=True, timing=timing)
+        if not (error and not processes):
+            return processes, error
+        logger.warning(f"Filtragem no servidor indisponível ({error}); usando ps aux")
+    processes, error = fetch_process_snapshot(client, matcher, timing=timing)
+    with (timing or NULL_TIMING).step('filter'):
+        processes = ProcessIndex(processes).filter(user_filter, pid_filter, cmd_filter)
+    return processes, error
+
+def run_menu_queries(client, path, patterns, prompts, on_rows=None, is_running=None, max_parallel=4,
+                     timing=None):
+    """Executa a opção 2 do menu para vários padrões em paralelo, em canais dedicados
+
+    Retorna ({padrão: linhas} das consultas completas, [padrões incompletos]);
+    uma consulta é incompleta se algum passo não terminou no prompt.
+    """
+    def query(pattern):
+        # Um parser por canal: as saídas de canais paralelos não se misturam
+        parser = QueryResultParser()
+        found = []
+        
+        def on_output(text):
+            rows = parser.feed(text)
+            if rows:
+                found.extend(rows)
+                if on_rows is not None:
+                    on_rows(rows)
+        
+        outcomes = run_channel_menu_flow(
+            client, 'consulta', {'path': path, 'pattern': f"*{pattern}"},
+            prompts, is_running=is_running, on_output=on_output, timing=timing
+        )
+        rows = parser.close()
+        if rows:
+            found.extend(rows)
+            if on_rows is not None:
+                on_rows(rows)
+        return pattern, found, menu_flow_complete('consulta', outcomes)
+    
+    if len(patterns) == 1:
+        results = [query(patterns[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(patterns))) as executor:
+            results = list(executor.map(query, patterns))
+    complete = {pattern: found for pattern, found, ok in results if ok}
+    incomplete = [pattern for pattern, found, ok in results if not ok]
+    return complete, incomplete
+
+def lookup_locks(client, path, patterns, prompts=None, direct=False, on_rows=None,
+                 cache=None, session=None, is_running=None, max_parallel=4, timing=None):
+    """Consulta os processos com arquivos abertos em path/*padrão
+
+    As linhas encontradas são entregues a on_rows à medida que chegam (na
+    consulta direta, de uma vez, após o status de saída) e a origem é
+    retornada. Padrões consultados há pouco na mesma sessão
+    (chave da conexão, ver QueryResultCache) vêm do cache; os
+    demais usam a consulta direta (uma única execução remota) ou o menu,
+    que continua como alternativa quando ela não está disponível. Consultas
+    do menu que não chegaram ao fim da tabela são indicadas na origem como
+    incompletas e não vão para o cache.
+    """
+    timing = timing or NULL_TIMING
+    prompts = prompts or compile_menu_prompts()
+    missing = []
+    oldest = None
+    for pattern in patterns:
+        cached = cache.get(session, path, pattern) if cache is not None else None
+        if cached is None:
+            missing.append(pattern)
+            continue
+        rows, age = cached
+        oldest = age if oldest is None else max(oldest, age)
+        timing.count('cached_patterns')
+        if rows and on_rows is not None:
+            on_rows(rows)
+    cache_note = f"cache de {int(oldest)} s" if oldest is not None else None
+    if not missing:
+        return cache_note
+    
+    source = None
+    incomplete = []
+    if direct:
+        # Linhas retidas até o status de saída: numa falha a consulta é
+        # refeita pelo menu, que entrega as suas próprias linhas
+        parser = QueryResultParser()
+        found = []
+        
+        def on_output(text):
+            found.extend(parser.feed(text))
+        
+        output = run_direct_lock_query(client, path, missing, on_output=on_output, timing=timing)
+        if output is not None:
+            found.extend(parser.close())
+            if found and on_rows is not None:
+                on_rows(found)
+            # Uma execução cobre todos os padrões: separar pelo nome do arquivo
+            results = {
+                pattern: [row for row in found
+                          if fnmatch.fnmatchcase(os.path.basename(row[2]), f"*{pattern}")]
+                for pattern in missing
+            }
+            source = "consulta direta"
+        else:
+            logger.info("Consulta direta indisponível; usando o menu")
+    if source is None:
+        results, incomplete = run_menu_queries(client, path, missing, prompts, on_rows, is_running,
+                                               max_parallel, timing)
+        source = "menu"
+        if incomplete:
+            timing.count('incomplete_patterns', len(incomplete))
+            logger.warning(f"Consulta pelo menu incompleta (tabela não terminou): {', '.join(incomplete)}")
+            source = f"menu; incompleta para {' '.join(incomplete)}"
+    
+    if cache is not None:
+        for pattern, rows in results.items():
+            cache.put(session, path, pattern, rows)
+    return f"{source}; {cache_note}" if cache_note else source
+
+def kill_pids(client, pids, prompts=None, direct=True, escalate_after=None, chunk_size=500,
+              menu_chunk_size=50, menu_runner=None, is_running=None, timing=None):
+    """Derruba PIDs por kill direto ou pela opção 3 do menu e retorna {pid: status}
+
+    No menu, os PIDs já encerrados ficam como 'gone' e os demais são enviados
+    em lotes de menu_chunk_size (o campo do menu tem tamanho limitado), por
+    padrão em um canal dedicado; menu_runner(chunk) permite conduzir o fluxo
+    em outra sessão e retorna os desfechos dos passos. O primeiro lote
+    cujo fluxo não termina encerra o envio e ele e os seguintes ficam como
+    'error'; os demais são verificados depois e, com
+    escalate_after, os sobreviventes recebem KILL.
+    timing conta os PIDs ('pids') e cada status final ('kill_<status>').
+    """
+    timing = timing or NULL_TIMING
+    pids = list(dict.fromkeys(str(pid) for pid in pids))
+    timing.count('pids', len(pids))
+    if direct:
+        results = run_bulk_kill(client, pids, escalate_after=escalate_after, chunk_size=chunk_size,
+                                timing=timing)
+        count_kill_statuses(results, timing)
+        return results
+    
+    if menu_runner is None:
+        prompts = prompts or compile_menu_prompts()
+        
+        def run_menu(chunk):
+            return run_channel_menu_flow(client, 'derrubar', {'pids': " ".join(chunk)}, prompts,
+                                         is_running, timing=timing)
+    else:
+        def run_menu(chunk):
+            with timing.step('menu'):
+                return menu_runner(chunk)
+    
+    results = OrderedDict((pid, 'invalid' if not pid.isdigit() else 'error') for pid in pids)
+    valid = [pid for pid in pids if pid.isdigit()]
+    
+    # Os já encerrados não vão para o menu
+    for pid, status in probe_pids(client, valid, timing=timing).items():
+        if status == 'gone' and pid in results:
+            results[pid] = 'gone'
+    
+    sent = []
+    for chunk in chunked([pid for pid in valid if results[pid] != 'gone'], menu_chunk_size):
+        if is_running is not None and not is_running():
+            break
+        outcomes = run_menu(chunk)
+        if not menu_flow_complete('derrubar', outcomes):
+            # Os lotes seguintes esperariam o mesmo prompt; ficam como 'error'
+            logger.warning(f"Menu 'derrubar' não concluiu ({outcomes}) para os PIDs: {' '.join(chunk)}")
+            break
+        sent.extend(chunk)
+    
+    # O menu retorna antes de os processos terminarem; sem status na
+    # verificação o PID continua como 'error'
+    statuses = probe_pids(client, sent, timing=timing, grace=KILL_GRACE)
+    for pid in sent:
+        status = statuses.get(pid)
+        if status == 'gone':
+            results[pid] = 'killed'
+        elif status in ('alive', 'denied'):
+            results[pid] = status
+    
+    # Sobreviventes recebem KILL direto após o prazo; quem terminou sozinho
+    # durante a espera conta como derrubado pelo TERM do menu
+    alive = [pid for pid, status in results.items() if status == 'alive']
+    if alive and escalate_after is not None:
+        with timing.step('wait'):
+            time.sleep(escalate_after)
+        forced = run_bulk_kill(client, alive, signal='KILL', timing=timing)
+        for pid, status in forced.items():
+            results[pid] = {'killed': 'killed_force', 'gone': 'killed'}.get(status, status)
+    count_kill_statuses(results, timing)
+    return results
+
+def count_kill_statuses(results, timing):
+    """Soma cada status de {pid: status} no contador 'kill_<status>'"""
+    for status in results.values():
+        timing.count(f"kill_{status}")
+
+def verify_kills(client, pids, timeout=30, on_gone=None, is_running=None,
+                 first_delay=0.5, max_delay=8.0, timing=None):
+    """Acompanha os PIDs ainda ativos até terminarem ou o prazo acabar
+
+    Cada rodada é uma única verificação remota só desses PIDs, com
+    intervalo crescente entre as rodadas. on_gone recebe cada grupo de PIDs
+    encerrados; retorna os que continuam ativos.
+    """
+    deadline = time.monotonic() + timeout
+    delay = first_delay
+    pending = list(pids)
+    while pending and (is_running is None or is_running()):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        with (timing or NULL_TIMING).step('wait'):
+            time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+        statuses = probe_pids(client, pending, timing=timing)
+        ended = [pid for pid in pending if statuses.get(pid) == 'gone']
+        if ended:
+            pending = [pid for pid in pending if pid not in ended]
+            logger.info(f"PIDs encerrados após a derrubada: {' '.join(ended)}")
+            if on_gone is not None:
+                on_gone(ended)
+    return pending